@@ -2,15 +2,28 @@
 Q-Sec: Simulador Interactivo del Protocolo BB84
 Archivo principal de la aplicación con arquitectura de 3 capas
 """
+import multiprocessing
 import os
+import sys
 from flask import Flask
 from flask_login import LoginManager
 from dotenv import load_dotenv
 from views.routes import configure_routes
+from views.cli import configure_cli
+from business.simulation_jobs import job_queue
+from business.password_verifier import password_verifier
+from business.rate_limiter import simulation_admission
+from business.simulation_warmup import start_warm_up
+from business.bb84_sampling import configure_sampling
 # Importar la base de datos desde la capa de datos
 from datos import db
+from datos.engine import build_engine_options, configure_engine
+from datos.session_writer import session_writer
+from datos.user_cache import user_cache
+from datos.password_hasher import configure_password_hashing
+from datos.migrations import upgrade_schema
 # Importar TODOS los modelos para que SQLAlchemy los registre
-from datos.models import User, SimulationSession
+from datos.models import User, SimulationSession, UserStats, ExperimentSummary
     
 # Cargar variables de entorno
 load_dotenv()
@@ -21,6 +34,12 @@ load_dotenv()
 # Crear la aplicación Flask
 app = Flask(__name__, template_folder='views/templates', static_folder='views/static')
 
+# Los procesos del pool de qiskit_parallel (contexto 'spawn') vuelven a importar el
+# módulo principal como __mp_main__: solo el proceso que sirve la aplicación arranca
+# pools e hilos, migra la base y reinserta el diario de sesiones
+_reimported_main = getattr(sys.modules.get('__mp_main__'), '__name__', None) == '__mp_main__'
+SERVING_PROCESS = not _reimported_main and multiprocessing.parent_process() is None
+
 # Configuración
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
 
@@ -30,8 +49,78 @@ db_path = os.path.join(basedir, 'qsec.db')
 app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', f'sqlite:///{db_path}')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Perfil del motor: PRAGMAs de SQLite (WAL, busy_timeout...) o pool para bases de servidor
+# DB_PROFILE=default deja la configuración por defecto de SQLAlchemy
+app.config['DB_PROFILE'] = os.getenv('DB_PROFILE', 'tuned')
+for option in ('DB_POOL_SIZE', 'DB_MAX_OVERFLOW', 'SQLITE_JOURNAL_MODE', 'SQLITE_SYNCHRONOUS',
+               'SQLITE_BUSY_TIMEOUT', 'SQLITE_MMAP_SIZE', 'SQLITE_CACHE_SIZE'):
+    if os.getenv(option):
+        app.config[option] = os.getenv(option)
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = build_engine_options(app.config['SQLALCHEMY_DATABASE_URI'], app.config)
+
+# Cola de simulaciones asíncronas
+app.config['SIMULATION_WORKERS'] = int(os.getenv('SIMULATION_WORKERS', 2))
+app.config['SIMULATION_QUEUE_SIZE'] = int(os.getenv('SIMULATION_QUEUE_SIZE', 32))
+app.config['SIMULATION_JOBS_PER_USER'] = int(os.getenv('SIMULATION_JOBS_PER_USER', 2))
+
+# Escritura diferida de sesiones: inserta por lotes en lugar de un commit por simulación
+app.config['SESSION_WRITE_BEHIND'] = os.getenv('SESSION_WRITE_BEHIND', 'false').lower() == 'true'
+app.config['SESSION_BATCH_SIZE'] = int(os.getenv('SESSION_BATCH_SIZE', 100))
+app.config['SESSION_FLUSH_INTERVAL'] = float(os.getenv('SESSION_FLUSH_INTERVAL', 1.0))
+# Ruta del diario: una distinta por proceso, varios workers sobre el mismo archivo pierden filas
+app.config['SESSION_WRITE_JOURNAL'] = os.getenv('SESSION_WRITE_JOURNAL')
+
+# Caché de identidades para el user_loader y credencial firmada para /api/run-simulation
+app.config['USER_CACHE_ENABLED'] = os.getenv('USER_CACHE_ENABLED', 'true').lower() == 'true'
+app.config['USER_CACHE_TTL'] = float(os.getenv('USER_CACHE_TTL', 60))
+app.config['USER_CACHE_SIZE'] = int(os.getenv('USER_CACHE_SIZE', 1024))
+app.config['USER_IDENTITY_CLAIM'] = os.getenv('USER_IDENTITY_CLAIM', 'false').lower() == 'true'
+app.config['USER_CLAIM_TTL'] = float(os.getenv('USER_CLAIM_TTL', 300))
+
+# Precalentamiento: importa y prepara solo los backends indicados al arrancar el worker
+app.config['SIMULATION_WARMUP'] = os.getenv('SIMULATION_WARMUP', 'background')
+app.config['SIMULATION_WARMUP_BACKENDS'] = os.getenv('SIMULATION_WARMUP_BACKENDS', 'qiskit_batch')
+
+# Admisión de simulaciones: token bucket por usuario (costo key_length × (1 + has_eve)) para
+# /api/run-simulation, /api/simulations y /api/experiments, y tope global de simulaciones síncronas simultáneas
+app.config['RATE_LIMIT_ENABLED'] = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+app.config['RATE_LIMIT_CAPACITY'] = float(os.getenv('RATE_LIMIT_CAPACITY', 4000))
+app.config['RATE_LIMIT_REFILL'] = float(os.getenv('RATE_LIMIT_REFILL', 40))
+app.config['SIMULATION_MAX_CONCURRENT'] = int(os.getenv('SIMULATION_MAX_CONCURRENT', 4))
+
+# Hash de contraseñas: parámetros en formato de Werkzeug ('scrypt:n:r:p' o 'pbkdf2:sha256:iteraciones')
+# Los hashes con parámetros anteriores se regeneran al iniciar sesión
+app.config['PASSWORD_HASH_METHOD'] = os.getenv('PASSWORD_HASH_METHOD', 'scrypt')
+app.config['PASSWORD_VERIFY_WORKERS'] = int(os.getenv('PASSWORD_VERIFY_WORKERS', 2))
+app.config['PASSWORD_VERIFY_QUEUE'] = int(os.getenv('PASSWORD_VERIFY_QUEUE', 16))
+app.config['PASSWORD_VERIFY_TIMEOUT'] = float(os.getenv('PASSWORD_VERIFY_TIMEOUT', 10))
+
+# Muestreo del QBER: tamaño por la cota de Hoeffding (confianza y error δ), limitado a una
+# fracción de la clave filtrada, e intervalo de confianza 'binomial' (Clopper-Pearson) o 'hoeffding'
+app.config['SAMPLE_CONFIDENCE'] = float(os.getenv('SAMPLE_CONFIDENCE', 0.95))
+app.config['SAMPLE_ERROR_BOUND'] = float(os.getenv('SAMPLE_ERROR_BOUND', 0.02))
+app.config['SAMPLE_MAX_FRACTION'] = float(os.getenv('SAMPLE_MAX_FRACTION', 0.25))
+app.config['QBER_INTERVAL_METHOD'] = os.getenv('QBER_INTERVAL_METHOD', 'binomial')
+
 # Inicializar la base de datos
 db.init_app(app)
+configure_engine(app)
+user_cache.init_app(app)
+
+# Inicializar el pool que ejecuta las simulaciones fuera de la petición HTTP
+if SERVING_PROCESS:
+    job_queue.init_app(app)
+
+# Inicializar la admisión de simulaciones síncronas
+simulation_admission.init_app(app)
+
+# Inicializar el pool acotado que verifica contraseñas
+configure_password_hashing(app)
+if SERVING_PROCESS:
+    password_verifier.init_app(app)
+
+# Parámetros de muestreo del QBER
+configure_sampling(app)
 
 # Configurar Flask-Login
 login_manager = LoginManager(app)
@@ -42,19 +131,28 @@ login_manager.login_message_category = 'warning'
 
 @login_manager.user_loader
 def load_user(user_id):
-    """Carga un usuario desde la base de datos"""
+    """Carga la identidad del usuario (desde la caché o la base de datos)"""
     from datos import user_repository
-    return user_repository.get_user_by_id(int(user_id))
+    return user_repository.load_user_identity(int(user_id))
 
 
 # Configurar las rutas (capa de presentación)
 
 configure_routes(app)
+configure_cli(app)
+
+
+if SERVING_PROCESS:
+    # Crear las tablas si no existen y migrar las bases de versiones anteriores
+    with app.app_context():
+        db.create_all()
+        upgrade_schema()
 
+    # Arrancar la escritura diferida (si está activa) una vez que existen las tablas
+    session_writer.init_app(app)
 
-# Crear las tablas si no existen
-with app.app_context():
-    db.create_all()
+    # Preparar los backends de simulación (en un hilo, sin demorar el arranque)
+    start_warm_up(app)
 
 
 if __name__ == '__main__':
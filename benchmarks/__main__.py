@@ -0,0 +1,9 @@
+"""
+Ejecuta la suite de benchmarks: python -m benchmarks [opciones] (ver benchmarks/suite.py)
+"""
+import sys
+
+from benchmarks.suite import main
+
+
+sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+Micro-benchmark del costo de construcción de circuitos BB84
+
+Compara, por qubit, construir el circuito desde cero con encode_qubit /
+eve_intercept / measure_qubit (antes) contra elegirlo por índice en la
+tabla precompilada de get_circuit_table (después)
+
+Uso:
+    python -m benchmarks.bench_circuits [--qubits N] [--repeat R]
+"""
+import argparse
+import random
+import time
+
+from business.bb84_simulation import (
+    encode_qubit,
+    measure_qubit,
+    eve_intercept,
+    circuit_index,
+    get_circuit_table
+)
+
+
+def build_from_scratch(bits, alice_bases, bob_bases, eve_bases):
+    """Construye un circuito nuevo por qubit (comportamiento anterior)"""
+    circuits = []
+    for i in range(len(bits)):
+        qc = encode_qubit(bits[i], alice_bases[i])
+        if eve_bases is not None:
+            qc, _ = eve_intercept(qc, eve_bases[i])
+        circuits.append(measure_qubit(qc, bob_bases[i]))
+    return circuits
+
+
+def pick_from_table(bits, alice_bases, bob_bases, eve_bases):
+    """Elige cada circuito de la tabla precompilada (comportamiento actual)"""
+    table = get_circuit_table(eve_bases is not None)
+    return [
+        table[circuit_index(bits[i], alice_bases[i], bob_bases[i], eve_bases[i] if eve_bases is not None else None)]
+        for i in range(len(bits))
+    ]
+
+
+def best_time(func, args, repeat):
+    """Mejor tiempo (en segundos) de repeat ejecuciones"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def run(qubits=1000, repeat=5):
+    """
+    Ejecuta el benchmark con y sin Eve
+
+    Args:
+        qubits (int): Cantidad de qubits por ejecución
+        repeat (int): Repeticiones por medición
+
+    Returns:
+        list: Un diccionario por caso con los tiempos por qubit en microsegundos
+    """
+    # La tabla se construye (y transpila) una sola vez por proceso
+    start = time.perf_counter()
+    get_circuit_table(False)
+    get_circuit_table(True)
+    table_build = time.perf_counter() - start
+
+    results = []
+    for has_eve in (False, True):
+        bits = [random.randint(0, 1) for _ in range(qubits)]
+        alice_bases = [random.randint(0, 1) for _ in range(qubits)]
+        bob_bases = [random.randint(0, 1) for _ in range(qubits)]
+        eve_bases = [random.randint(0, 1) for _ in range(qubits)] if has_eve else None
+        args = (bits, alice_bases, bob_bases, eve_bases)
+
+        before = best_time(build_from_scratch, args, repeat)
+        after = best_time(pick_from_table, args, repeat)
+        results.append({
+            'has_eve': has_eve,
+            'qubits': qubits,
+            'before_us_per_qubit': before / qubits * 1e6,
+            'after_us_per_qubit': after / qubits * 1e6,
+            'speedup': before / after if after > 0 else float('inf'),
+            'table_build_s': table_build
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Costo de construcción de circuitos BB84')
+    parser.add_argument('--qubits', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    results = run(args.qubits, args.repeat)
+    print(f"Tabla precompilada (8 + 16 circuitos): {results[0]['table_build_s'] * 1000:.1f} ms, una vez por proceso")
+    print(f"{'Eve':<6}{'antes (us/qubit)':>18}{'después (us/qubit)':>20}{'mejora':>10}")
+    for row in results:
+        print(f"{'sí' if row['has_eve'] else 'no':<6}{row['before_us_per_qubit']:>18.2f}"
+              f"{row['after_us_per_qubit']:>20.3f}{row['speedup']:>9.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark del hash de contraseñas
+
+Mide cuántos inicios de sesión por segundo puede verificar un núcleo con cada
+conjunto de parámetros (PASSWORD_HASH_METHOD). Con --workers W además mide el
+total con W hilos verificando a la vez, como el pool de PasswordVerifier
+
+Uso:
+    python -m benchmarks.bench_password_hash [--methods M ...] [--logins N] [--workers W]
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+METHODS = (
+    'scrypt:32768:8:1',
+    'scrypt:16384:8:1',
+    'pbkdf2:sha256:1000000',
+    'pbkdf2:sha256:600000',
+    'pbkdf2:sha256:100000'
+)
+
+
+def measure(method, logins, workers=1):
+    """
+    Verifica logins contraseñas con un método
+
+    Args:
+        method (str): Método en formato de Werkzeug
+        logins (int): Cantidad de verificaciones
+        workers (int): Hilos que verifican en paralelo
+
+    Returns:
+        float: Verificaciones por segundo
+    """
+    password_hash = generate_password_hash('correct horse battery', method)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(lambda _: check_password_hash(password_hash, 'correct horse battery'),
+                                    range(logins)))
+    elapsed = time.perf_counter() - start
+    assert all(results)
+    return logins / elapsed
+
+
+def run(methods=METHODS, logins=20, workers=None):
+    """
+    Ejecuta el benchmark para cada conjunto de parámetros
+
+    Args:
+        methods (iterable): Métodos a medir
+        logins (int): Verificaciones por medición
+        workers (int): Hilos de la medición en paralelo (None para omitirla)
+
+    Returns:
+        list: Un diccionario por método con logins/s por núcleo y, si corresponde, en paralelo
+    """
+    results = []
+    for method in methods:
+        per_core = measure(method, logins)
+        row = {
+            'method': method,
+            'logins_per_sec_per_core': per_core,
+            'ms_per_login': 1000 / per_core
+        }
+        if workers:
+            row['workers'] = workers
+            row['logins_per_sec_parallel'] = measure(method, logins * workers, workers)
+        results.append(row)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inicios de sesión por segundo según los parámetros de hash')
+    parser.add_argument('--methods', nargs='+', default=list(METHODS))
+    parser.add_argument('--logins', type=int, default=20)
+    parser.add_argument('--workers', type=int, default=None,
+                        help=f'Hilos para la medición en paralelo (núcleos disponibles: {os.cpu_count()})')
+    args = parser.parse_args()
+
+    print(f"{'método':<24}{'logins/s/núcleo':>17}{'ms/login':>10}{'logins/s paralelo':>19}")
+    for row in run(args.methods, args.logins, args.workers):
+        parallel = f"{row['logins_per_sec_parallel']:>19.1f}" if 'logins_per_sec_parallel' in row else f"{'-':>19}"
+        print(f"{row['method']:<24}{row['logins_per_sec_per_core']:>17.1f}{row['ms_per_login']:>10.1f}{parallel}")
+
+
+if __name__ == '__main__':
+    main()
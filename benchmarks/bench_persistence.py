@@ -0,0 +1,164 @@
+"""
+Benchmark de la persistencia de sesiones
+
+Sobre una base SQLite temporal que se va llenando hasta cada tamaño
+(10^3 a 10^6 sesiones repartidas entre USERS usuarios) mide:
+- create_session: sesiones por segundo guardadas de a una (un commit cada una)
+- get_user_statistics: latencia de las estadísticas del usuario medido
+- /api/history y /history: latencia de la primera página del historial
+
+Cada ejecución corre en un proceso nuevo, con la aplicación apuntando a la
+base temporal y sin precalentamiento de Qiskit
+
+Uso:
+    python -m benchmarks.bench_persistence [--sizes 1000 10000 ...] [--creates N] [--repeat R]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SIZES = (1000, 10000, 100000, 1000000)
+
+# Usuarios entre los que se reparten las sesiones sembradas
+USERS = 10
+
+# Filas por INSERT al sembrar
+SEED_BATCH = 50000
+
+
+def best_time(func, repeat):
+    """Mejor tiempo (en segundos) de repeat ejecuciones"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def seed_sessions(db, table, user_ids, start, stop):
+    """Inserta las sesiones start..stop-1 repartidas entre los usuarios"""
+    first_timestamp = datetime(2024, 1, 1)
+    for batch_start in range(start, stop, SEED_BATCH):
+        rows = [{
+            'user_id': user_ids[i % len(user_ids)],
+            'key_length': 256,
+            'has_eve': i % 3 == 0,
+            'result': 'compromised' if i % 3 == 0 else 'secure',
+            'error_rate': 0.25 if i % 3 == 0 else 0.02,
+            'key_bits': None if i % 3 == 0 else b'\xa5' * 12,
+            'final_key_length': None if i % 3 == 0 else 96,
+            'seed': i,
+            'backend': 'qiskit_batch',
+            'timestamp': first_timestamp + timedelta(seconds=i)
+        } for i in range(batch_start, min(batch_start + SEED_BATCH, stop))]
+        db.session.execute(table.insert(), rows)
+        db.session.commit()
+
+
+def measure_sizes(sizes, creates, repeat):
+    """
+    Siembra y mide dentro del proceso (requiere DATABASE_URL ya configurada)
+
+    Returns:
+        list: Un diccionario por tamaño
+    """
+    from app import app, db
+    from business import simulation_controller
+    from datos import session_repository, stats_repository, user_repository
+    from datos.models import SimulationSession
+
+    results = []
+    with app.app_context():
+        user_ids = [user_repository.create_user(f'bench{i}', 'password123').id for i in range(USERS)]
+        user_id = user_ids[0]
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['_user_id'] = str(user_id)
+            sess['_fresh'] = True
+
+        seeded = 0
+        for size in sorted(sizes):
+            start = time.perf_counter()
+            seed_sessions(db, SimulationSession.__table__, user_ids, seeded, size)
+            stats_repository.rebuild_user_stats()
+            seeding = time.perf_counter() - start
+            seeded = size
+
+            # Las sesiones nuevas van a otro usuario para no alterar las del medido
+            start = time.perf_counter()
+            for i in range(creates):
+                session_repository.create_session(user_ids[1], 256, False, 'secure', '01' * 48, 0.02,
+                                                  seed=i, backend='qiskit_batch')
+            create_time = time.perf_counter() - start
+            seeded += creates
+
+            statistics = best_time(lambda: simulation_controller.get_user_statistics(user_id), repeat)
+            api_history = best_time(lambda: client.get('/api/history').get_json(), repeat)
+            history = best_time(lambda: client.get('/history').data, repeat)
+
+            results.append({
+                'rows': size,
+                'seed_s': seeding,
+                'create_sessions_per_sec': creates / create_time,
+                'statistics_ms': statistics * 1000,
+                'api_history_ms': api_history * 1000,
+                'history_page_ms': history * 1000
+            })
+    return results
+
+
+def run(sizes=SIZES, creates=200, repeat=5):
+    """
+    Ejecuta el benchmark en un proceso nuevo con una base temporal
+
+    Args:
+        sizes (iterable): Sesiones sembradas en cada medición (crecientes)
+        creates (int): Sesiones creadas de a una para medir create_session
+        repeat (int): Repeticiones de cada lectura (se informa la mejor)
+
+    Returns:
+        list: Un diccionario por tamaño con 'create_sessions_per_sec',
+            'statistics_ms', 'api_history_ms' y 'history_page_ms'
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ,
+                   DATABASE_URL=f"sqlite:///{os.path.join(directory, 'bench.db')}",
+                   SIMULATION_WARMUP='off',
+                   SESSION_WRITE_BEHIND='false',
+                   RATE_LIMIT_ENABLED='false')
+        command = [sys.executable, '-m', 'benchmarks.bench_persistence', '--in-process',
+                   '--sizes', *map(str, sizes), '--creates', str(creates), '--repeat', str(repeat)]
+        output = subprocess.run(command, cwd=ROOT, env=env, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Escritura de sesiones y latencia de estadísticas e historial')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES))
+    parser.add_argument('--creates', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--in-process', action='store_true',
+                        help='Medir en este proceso (usa DATABASE_URL tal como está)')
+    args = parser.parse_args()
+
+    if args.in_process:
+        print(json.dumps(measure_sizes(args.sizes, args.creates, args.repeat)))
+        return
+
+    print(f"{'sesiones':>10}{'create (por s)':>16}{'estadísticas (ms)':>19}{'/api/history (ms)':>19}{'/history (ms)':>15}")
+    for row in run(args.sizes, args.creates, args.repeat):
+        print(f"{row['rows']:>10}{row['create_sessions_per_sec']:>16.0f}{row['statistics_ms']:>19.2f}"
+              f"{row['api_history_ms']:>19.2f}{row['history_page_ms']:>15.2f}")
+
+
+if __name__ == '__main__':
+    main()
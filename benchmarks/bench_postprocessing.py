@@ -0,0 +1,83 @@
+"""
+Benchmark del post-procesamiento de la clave (Cascade y hash de Toeplitz)
+
+Mide cada etapa de reconcile_and_amplify sobre claves filtradas de 10^3 a
+10^6 bits con un QBER dado, junto con los bits filtrados por Cascade y la
+fracción de la clave que sobrevive a la amplificación de privacidad
+
+Uso:
+    python -m benchmarks.bench_postprocessing [--sizes 1000 10000 ...] [--qber Q] [--repeat R]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from business.bb84_postprocessing import binary_entropy, cascade, reconcile_and_amplify, toeplitz_hash
+
+
+SIZES = (1000, 10000, 100000, 1000000)
+
+
+def best_time(func, args, repeat):
+    """Mejor tiempo (en segundos) de repeat ejecuciones y el último resultado"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = func(*args)
+        times.append(time.perf_counter() - start)
+    return min(times), value
+
+
+def run(sizes=SIZES, qber=0.03, repeat=3):
+    """
+    Ejecuta el benchmark para cada longitud de clave
+
+    Args:
+        sizes (iterable): Bits de la clave filtrada
+        qber (float): Tasa de errores entre las claves de Alice y Bob
+        repeat (int): Repeticiones por medición
+
+    Returns:
+        list: Un diccionario por tamaño con los tiempos en milisegundos, la
+            eficiencia de Cascade (filtrados / n·h(QBER)) y la tasa final
+    """
+    rng = np.random.default_rng(0)
+    results = []
+    for size in sizes:
+        alice_key = rng.integers(0, 2, size=size, dtype=np.uint8)
+        bob_key = alice_key ^ (rng.random(size) < qber).astype(np.uint8)
+
+        cascade_time, (_, stats) = best_time(cascade, (alice_key, bob_key, qber, rng), repeat)
+        seed_bits = rng.integers(0, 2, size=2 * size - 1, dtype=np.uint8)
+        toeplitz_time, _ = best_time(toeplitz_hash, (alice_key, size, seed_bits), repeat)
+        total_time, stage = best_time(reconcile_and_amplify, (alice_key, bob_key, qber, rng), repeat)
+
+        results.append({
+            'bits': size,
+            'cascade_ms': cascade_time * 1000,
+            'toeplitz_ms': toeplitz_time * 1000,
+            'total_ms': total_time * 1000,
+            'efficiency': stats['leaked_bits'] / (size * binary_entropy(qber)) if qber else float('nan'),
+            'key_rate': len(stage['key']) / size,
+            'residual_errors': stage['residual_errors']
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Costo de Cascade y de la amplificación de privacidad')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES))
+    parser.add_argument('--qber', type=float, default=0.03)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'bits':>10}{'Cascade (ms)':>14}{'Toeplitz (ms)':>15}{'total (ms)':>12}"
+          f"{'eficiencia':>12}{'tasa':>8}{'residuales':>12}")
+    for row in run(args.sizes, args.qber, args.repeat):
+        print(f"{row['bits']:>10}{row['cascade_ms']:>14.1f}{row['toeplitz_ms']:>15.1f}{row['total_ms']:>12.1f}"
+              f"{row['efficiency']:>12.2f}{row['key_rate']:>8.3f}{row['residual_errors']:>12}")
+
+
+if __name__ == '__main__':
+    main()
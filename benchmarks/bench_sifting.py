@@ -0,0 +1,92 @@
+"""
+Benchmark del filtrado, muestreo y conteo de errores de BB84
+
+Compara sift_and_estimate basado en listas (antes, con la pertenencia
+`i not in sample_indices` por cada bit filtrado) contra la versión con
+máscaras booleanas de NumPy (después), para claves de 10^3 a 10^6 qubits.
+Un costo por qubit constante entre tamaños indica escalado lineal
+
+Uso:
+    python -m benchmarks.bench_sifting [--sizes 1000 10000 ...] [--sample-size S] [--repeat R]
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from business.bb84_numpy import sift_and_estimate
+
+
+SIZES = (1000, 10000, 100000, 1000000)
+
+
+def sift_lists_before(alice_bits, alice_bases, bob_bases, bob_results, sample_size):
+    """Filtrado con listas de Python (implementación anterior)"""
+    matching_bases_indices = [i for i in range(len(alice_bits)) if alice_bases[i] == bob_bases[i]]
+    alice_key = [alice_bits[i] for i in matching_bases_indices]
+    bob_key = [bob_results[i] for i in matching_bases_indices]
+
+    sample_indices = random.sample(range(len(alice_key)), min(sample_size, len(alice_key)))
+    errors = sum(1 for i in sample_indices if alice_key[i] != bob_key[i])
+
+    final_key_bits = [alice_key[i] for i in range(len(alice_key)) if i not in sample_indices]
+    return errors, ''.join(map(str, final_key_bits))
+
+
+def best_time(func, args, repeat):
+    """Mejor tiempo (en segundos) de repeat ejecuciones"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def run(sizes=SIZES, sample_size=20, repeat=3):
+    """
+    Ejecuta el benchmark para cada longitud de clave
+
+    Args:
+        sizes (iterable): Longitudes de clave a medir
+        sample_size (int): Bits de la muestra de la versión anterior (la
+            pertenencia en una lista hace que su costo crezca con la muestra)
+        repeat (int): Repeticiones por medición
+
+    Returns:
+        list: Un diccionario por tamaño con los tiempos por qubit en nanosegundos
+    """
+    rng = np.random.default_rng(0)
+    results = []
+    for size in sizes:
+        data = [rng.integers(0, 2, size=size, dtype=np.uint8) for _ in range(4)]
+        lists = [array.tolist() for array in data]
+
+        before = best_time(sift_lists_before, (*lists, sample_size), repeat)
+        after = best_time(sift_and_estimate, (*data, rng), repeat)
+        results.append({
+            'qubits': size,
+            'before_ns_per_qubit': before / size * 1e9,
+            'after_ns_per_qubit': after / size * 1e9,
+            'after_total_ms': after * 1000,
+            'speedup': before / after if after > 0 else float('inf')
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Costo del filtrado y muestreo de BB84')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES))
+    parser.add_argument('--sample-size', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'qubits':>10}{'antes (ns/qubit)':>18}{'después (ns/qubit)':>20}{'después (ms)':>14}{'mejora':>9}")
+    for row in run(args.sizes, args.sample_size, args.repeat):
+        print(f"{row['qubits']:>10}{row['before_ns_per_qubit']:>18.1f}{row['after_ns_per_qubit']:>20.2f}"
+              f"{row['after_total_ms']:>14.2f}{row['speedup']:>8.0f}x")
+
+
+if __name__ == '__main__':
+    main()
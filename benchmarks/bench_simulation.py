@@ -0,0 +1,82 @@
+"""
+Benchmark de simulate_bb84 por backend
+
+Mide la simulación completa (con semilla fija) para cada backend, con y sin
+Eve, en longitudes de clave acordes a cada uno: los backends de Qiskit hasta
+el máximo de la API y el de NumPy hasta 10^6 qubits. La primera ejecución de
+cada backend (import de Qiskit, tablas de circuitos, pool de procesos) se
+hace antes de medir
+
+Uso:
+    python -m benchmarks.bench_simulation [--backends B ...] [--repeat R] [--quick]
+"""
+import argparse
+import time
+
+from business.bb84_simulation import BACKENDS, simulate_bb84, warm_up
+
+
+# Longitudes de clave medidas en cada backend
+KEY_LENGTHS = {
+    'qiskit': (64, 256, 1000),
+    'qiskit_batch': (64, 256, 1000),
+    'qiskit_parallel': (1000, 10000),
+    'numpy': (1000, 100000, 1000000),
+}
+
+
+def best_time(func, repeat):
+    """Mejor tiempo (en segundos) de repeat ejecuciones"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def run(backends=BACKENDS, repeat=3, quick=False):
+    """
+    Ejecuta el benchmark
+
+    Args:
+        backends (iterable): Backends a medir
+        repeat (int): Repeticiones por medición (se informa la mejor)
+        quick (bool): Medir solo las dos longitudes más chicas de cada backend
+
+    Returns:
+        list: Un diccionario por (backend, key_length, has_eve) con el tiempo
+            total en milisegundos y por qubit en microsegundos
+    """
+    results = []
+    for backend in backends:
+        warm_up(backend)
+        key_lengths = KEY_LENGTHS[backend][:2] if quick else KEY_LENGTHS[backend]
+        for key_length in key_lengths:
+            for has_eve in (False, True):
+                elapsed = best_time(lambda: simulate_bb84(key_length, has_eve, backend, seed=key_length), repeat)
+                results.append({
+                    'backend': backend,
+                    'key_length': key_length,
+                    'has_eve': has_eve,
+                    'total_ms': elapsed * 1000,
+                    'us_per_qubit': elapsed / key_length * 1e6
+                })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tiempo de simulate_bb84 por backend y longitud de clave')
+    parser.add_argument('--backends', nargs='+', default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--quick', action='store_true')
+    args = parser.parse_args()
+
+    print(f"{'backend':<17}{'qubits':>9}{'Eve':>5}{'total (ms)':>13}{'us/qubit':>11}")
+    for row in run(args.backends, args.repeat, args.quick):
+        print(f"{row['backend']:<17}{row['key_length']:>9}{'sí' if row['has_eve'] else 'no':>5}"
+              f"{row['total_ms']:>13.1f}{row['us_per_qubit']:>11.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark del arranque de la aplicación
+
+Cada medición corre en un proceso nuevo (imports en frío):
+- import de la aplicación (app.py) y de los módulos de simulación
+- latencia de la primera petición a /api/run-simulation según SIMULATION_WARMUP:
+  'off' (la petición paga el import de Qiskit y el arranque de Aer) contra
+  'sync' (el worker ya se preparó al iniciar)
+
+Uso:
+    python -m benchmarks.bench_startup [--backend B] [--key-length N] [--repeat R]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SCRIPT = '''
+import json, sys, time
+start = time.perf_counter()
+import {module}
+print(json.dumps({{'seconds': time.perf_counter() - start, 'qiskit_loaded': 'qiskit' in sys.modules}}))
+'''
+
+REQUEST_SCRIPT = '''
+import json, time
+start = time.perf_counter()
+from app import app, db
+from datos import user_repository
+from business.simulation_warmup import wait_until_ready
+wait_until_ready()
+boot = time.perf_counter() - start
+
+with app.app_context():
+    user = user_repository.create_user('bench', 'password123')
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user.id)
+        sess['_fresh'] = True
+    timings = []
+    for _ in range(2):
+        start = time.perf_counter()
+        response = client.post('/api/run-simulation', json={{'key_length': {key_length}, 'backend': '{backend}'}})
+        assert response.status_code == 200, response.get_json()
+        timings.append(time.perf_counter() - start)
+print(json.dumps({{'boot': boot, 'first': timings[0], 'second': timings[1]}}))
+'''
+
+
+def run_script(script, env=None):
+    """Ejecuta un script en un intérprete nuevo y devuelve el JSON de su última línea"""
+    output = subprocess.run([sys.executable, '-c', script], cwd=ROOT, env=env, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def measure_import(module, repeat):
+    """Mejor tiempo de import en frío de un módulo"""
+    results = [run_script(IMPORT_SCRIPT.format(module=module)) for _ in range(repeat)]
+    return min(result['seconds'] for result in results), results[0]['qiskit_loaded']
+
+
+def measure_first_request(mode, backend, key_length, repeat):
+    """Mejor arranque y latencia de la primera y segunda petición con un modo de precalentamiento"""
+    best = None
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as directory:
+            env = dict(os.environ,
+                       DATABASE_URL=f"sqlite:///{os.path.join(directory, 'bench.db')}",
+                       SIMULATION_WARMUP=mode,
+                       SIMULATION_WARMUP_BACKENDS=backend,
+                       RATE_LIMIT_ENABLED='false')
+            result = run_script(REQUEST_SCRIPT.format(backend=backend, key_length=key_length), env)
+        if best is None or result['first'] < best['first']:
+            best = result
+    return best
+
+
+def run(backend='qiskit_batch', key_length=256, repeat=3):
+    """
+    Ejecuta el benchmark
+
+    Args:
+        backend (str): Backend de la petición medida
+        key_length (int): Longitud de clave de la petición
+        repeat (int): Procesos por medición (se informa el mejor)
+
+    Returns:
+        dict: 'imports' (módulo -> segundos y si cargó Qiskit) y
+            'requests' (modo -> arranque, primera y segunda petición en segundos)
+    """
+    imports = {}
+    for module in ('app', 'business.bb84_simulation', 'qiskit_aer'):
+        seconds, qiskit_loaded = measure_import(module, repeat)
+        imports[module] = {'seconds': seconds, 'qiskit_loaded': qiskit_loaded}
+
+    requests = {mode: measure_first_request(mode, backend, key_length, repeat) for mode in ('off', 'sync')}
+    return {'imports': imports, 'requests': requests}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import en frío y latencia de la primera petición')
+    parser.add_argument('--backend', default='qiskit_batch')
+    parser.add_argument('--key-length', type=int, default=256)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    results = run(args.backend, args.key_length, args.repeat)
+    print(f"{'import en frío':<28}{'ms':>10}{'carga Qiskit':>14}")
+    for module, row in results['imports'].items():
+        print(f"{module:<28}{row['seconds'] * 1000:>10.0f}{'sí' if row['qiskit_loaded'] else 'no':>14}")
+    print()
+    print(f"{'SIMULATION_WARMUP':<20}{'arranque (ms)':>15}{'1ª petición (ms)':>18}{'2ª petición (ms)':>18}")
+    for mode, row in results['requests'].items():
+        print(f"{mode:<20}{row['boot'] * 1000:>15.0f}{row['first'] * 1000:>18.0f}{row['second'] * 1000:>18.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,260 @@
+"""
+Suite de benchmarks de las rutas críticas
+
+Ejecuta los benchmarks de simulación, construcción de circuitos, filtrado,
+post-procesamiento y persistencia, y guarda cada medición como una métrica
+con nombre en un JSON. Con --compare compara contra una línea base guardada
+y marca como regresión toda métrica que empeore más que la tolerancia
+(el proceso termina con código 1 si hay alguna)
+
+Uso:
+    python -m benchmarks [--quick] [--only GRUPO ...] [--output resultados.json]
+                         [--save-baseline] [--compare] [--baseline base.json] [--tolerance 0.25]
+                         [--results resultados.json]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+from datetime import datetime
+
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, 'baseline.json')
+
+# Empeoramiento relativo a partir del cual una métrica es una regresión
+DEFAULT_TOLERANCE = 0.25
+
+GROUPS = ('simulation', 'circuits', 'sifting', 'postprocessing', 'persistence')
+
+# Tamaños de cada grupo: perfil completo y rápido
+PROFILES = {
+    'full': {
+        'circuit_qubits': 1000,
+        'sifting_sizes': (1000, 100000, 1000000),
+        'postprocessing_sizes': (10000, 1000000),
+        'persistence_sizes': (1000, 10000, 100000, 1000000),
+        'persistence_creates': 200,
+    },
+    'quick': {
+        'circuit_qubits': 200,
+        'sifting_sizes': (1000, 100000),
+        'postprocessing_sizes': (10000, 100000),
+        'persistence_sizes': (1000, 10000),
+        'persistence_creates': 50,
+    },
+}
+
+
+def metric(value, unit, lower_is_better=True):
+    """Una medición de la suite"""
+    return {'value': value, 'unit': unit, 'lower_is_better': lower_is_better}
+
+
+def collect_simulation(profile, repeat, quick):
+    from benchmarks import bench_simulation
+
+    return {
+        f"simulation/{row['backend']}/{row['key_length']}/{'eve' if row['has_eve'] else 'no_eve'}":
+            metric(row['total_ms'], 'ms')
+        for row in bench_simulation.run(repeat=repeat, quick=quick)
+    }
+
+
+def collect_circuits(profile, repeat, quick):
+    from benchmarks import bench_circuits
+
+    metrics = {}
+    for row in bench_circuits.run(profile['circuit_qubits'], repeat):
+        eve = 'eve' if row['has_eve'] else 'no_eve'
+        metrics[f'circuits/encode_measure/{eve}'] = metric(row['before_us_per_qubit'], 'us/qubit')
+        metrics[f'circuits/table_lookup/{eve}'] = metric(row['after_us_per_qubit'], 'us/qubit')
+    return metrics
+
+
+def collect_sifting(profile, repeat, quick):
+    from benchmarks import bench_sifting
+
+    return {
+        f"sifting/{row['qubits']}": metric(row['after_total_ms'], 'ms')
+        for row in bench_sifting.run(profile['sifting_sizes'], repeat=repeat)
+    }
+
+
+def collect_postprocessing(profile, repeat, quick):
+    from benchmarks import bench_postprocessing
+
+    return {
+        f"postprocessing/{row['bits']}": metric(row['total_ms'], 'ms')
+        for row in bench_postprocessing.run(profile['postprocessing_sizes'], repeat=repeat)
+    }
+
+
+def collect_persistence(profile, repeat, quick):
+    from benchmarks import bench_persistence
+
+    metrics = {}
+    for row in bench_persistence.run(profile['persistence_sizes'], profile['persistence_creates'], repeat):
+        prefix = f"persistence/{row['rows']}"
+        metrics[f'{prefix}/create_session'] = metric(row['create_sessions_per_sec'], 'sessions/s', False)
+        metrics[f'{prefix}/get_user_statistics'] = metric(row['statistics_ms'], 'ms')
+        metrics[f'{prefix}/api_history'] = metric(row['api_history_ms'], 'ms')
+        metrics[f'{prefix}/history_page'] = metric(row['history_page_ms'], 'ms')
+    return metrics
+
+
+COLLECTORS = {
+    'simulation': collect_simulation,
+    'circuits': collect_circuits,
+    'sifting': collect_sifting,
+    'postprocessing': collect_postprocessing,
+    'persistence': collect_persistence,
+}
+
+
+def environment():
+    """Datos del entorno donde se midió, para no comparar máquinas distintas sin saberlo"""
+    import numpy
+
+    try:
+        from importlib.metadata import version
+        qiskit_version = version('qiskit')
+    except Exception:
+        qiskit_version = None
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'numpy': numpy.__version__,
+        'qiskit': qiskit_version,
+    }
+
+
+def run(groups=GROUPS, quick=False, repeat=3):
+    """
+    Ejecuta los grupos de benchmarks indicados
+
+    Args:
+        groups (iterable): Grupos de GROUPS a ejecutar
+        quick (bool): Usar el perfil rápido (tamaños más chicos)
+        repeat (int): Repeticiones por medición (se informa la mejor)
+
+    Returns:
+        dict: 'created_at', 'profile', 'environment' y 'metrics' (nombre ->
+            'value', 'unit' y 'lower_is_better')
+    """
+    profile = PROFILES['quick' if quick else 'full']
+    metrics = {}
+    for group in groups:
+        print(f'Midiendo {group}...', file=sys.stderr)
+        metrics.update(COLLECTORS[group](profile, repeat, quick))
+    return {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'profile': 'quick' if quick else 'full',
+        'environment': environment(),
+        'metrics': metrics
+    }
+
+
+def compare(baseline, current, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compara las métricas de dos ejecuciones
+
+    Args:
+        baseline (dict): Resultados de la línea base (salida de run)
+        current (dict): Resultados actuales
+        tolerance (float): Empeoramiento relativo admitido (0.25 = 25%)
+
+    Returns:
+        list: Una fila por métrica con 'name', 'baseline', 'current', 'unit',
+            'slowdown' (>1 es peor, sin importar si la métrica sube o baja) y
+            'status': 'regression', 'improvement', 'ok', 'new' o 'missing'
+    """
+    rows = []
+    base_metrics, current_metrics = baseline['metrics'], current['metrics']
+    for name in sorted(set(base_metrics) | set(current_metrics)):
+        base, now = base_metrics.get(name), current_metrics.get(name)
+        row = {
+            'name': name,
+            'baseline': base['value'] if base else None,
+            'current': now['value'] if now else None,
+            'unit': (now or base)['unit'],
+            'slowdown': None
+        }
+        if base is None or now is None:
+            row['status'] = 'new' if base is None else 'missing'
+        elif base['value'] <= 0 or now['value'] <= 0:
+            row['status'] = 'ok'
+        else:
+            ratio = now['value'] / base['value']
+            row['slowdown'] = ratio if now['lower_is_better'] else 1 / ratio
+            if row['slowdown'] > 1 + tolerance:
+                row['status'] = 'regression'
+            elif row['slowdown'] < 1 / (1 + tolerance):
+                row['status'] = 'improvement'
+            else:
+                row['status'] = 'ok'
+        rows.append(row)
+    return rows
+
+
+def print_metrics(results):
+    print(f"{'métrica':<48}{'valor':>14}  unidad")
+    for name, row in results['metrics'].items():
+        print(f"{name:<48}{row['value']:>14.3f}  {row['unit']}")
+
+
+def print_comparison(rows):
+    labels = {'regression': 'REGRESIÓN', 'improvement': 'mejora', 'ok': '', 'new': 'nueva', 'missing': 'falta'}
+    print(f"{'métrica':<48}{'base':>12}{'actual':>12}{'cambio':>10}  estado")
+    for row in rows:
+        base = f"{row['baseline']:.3f}" if row['baseline'] is not None else '-'
+        now = f"{row['current']:.3f}" if row['current'] is not None else '-'
+        change = f"{(row['slowdown'] - 1) * 100:+.0f}%" if row['slowdown'] is not None else '-'
+        print(f"{row['name']:<48}{base:>12}{now:>12}{change:>10}  {labels[row['status']]}")
+
+
+def load_results(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def save_results(results, path):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(results, file, indent=2, sort_keys=True)
+        file.write('\n')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Suite de benchmarks de simulación y persistencia')
+    parser.add_argument('--only', nargs='+', choices=GROUPS, default=list(GROUPS), help='Grupos a ejecutar')
+    parser.add_argument('--quick', action='store_true', help='Tamaños más chicos (unos segundos por grupo)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='Guardar los resultados en este JSON')
+    parser.add_argument('--results', help='No medir: usar los resultados de este JSON')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='JSON de la línea base')
+    parser.add_argument('--save-baseline', action='store_true', help='Guardar los resultados como línea base')
+    parser.add_argument('--compare', action='store_true', help='Comparar contra la línea base')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Empeoramiento relativo admitido antes de marcar una regresión')
+    args = parser.parse_args(argv)
+
+    results = load_results(args.results) if args.results else run(args.only, args.quick, args.repeat)
+    if args.output:
+        save_results(results, args.output)
+    if args.save_baseline:
+        save_results(results, args.baseline)
+
+    if not args.compare:
+        print_metrics(results)
+        return 0
+
+    rows = compare(load_results(args.baseline), results, args.tolerance)
+    print_comparison(rows)
+    regressions = [row['name'] for row in rows if row['status'] == 'regression']
+    if regressions:
+        print(f'\n{len(regressions)} regresiones (tolerancia {args.tolerance:.0%})')
+        return 1
+    print(f'\nSin regresiones (tolerancia {args.tolerance:.0%})')
+    return 0
@@ -3,9 +3,18 @@ Capa de Negocio - Controlador de Autenticación
 Contiene la lógica de negocio relacionada con usuarios y autenticación
 NO accede directamente a la base de datos, usa la capa de datos
 """
+import time
+
+from business.password_verifier import password_verifier
 from datos import user_repository
 
 
+# Clave de la sesión firmada de Flask donde se guarda la credencial de identidad
+IDENTITY_CLAIM_KEY = 'identity_claim'
+# Vigencia por defecto de la credencial (segundos)
+IDENTITY_CLAIM_TTL = 300
+
+
 def register_user(username, password):
     """
     Registra un nuevo usuario en el sistema
@@ -65,10 +74,22 @@ def authenticate_user(username, password):
             'message': 'Debe proporcionar usuario y contraseña'
         }
     
-    # Verificar credenciales
-    user = user_repository.verify_user_password(username, password)
+    # Verificar credenciales (el hash se verifica en el pool acotado)
+    user = user_repository.get_user_by_username(username)
+    outcome = password_verifier.verify(user.password_hash, password) if user else (False, None)
     
-    if user:
+    if outcome is None:
+        return {
+            'success': False,
+            'reason': 'busy',
+            'message': 'Hay demasiados inicios de sesión en curso, intenta nuevamente en unos segundos'
+        }
+    
+    verified, new_hash = outcome
+    if verified:
+        # Regla de negocio: si cambiaron los parámetros de hash, se regenera al iniciar sesión
+        if new_hash:
+            user_repository.store_password_hash(user.id, new_hash)
         return {
             'success': True,
             'message': 'Autenticación exitosa',
@@ -81,6 +102,90 @@ def authenticate_user(username, password):
         }
 
 
+def change_password(user_id, current_password, new_password):
+    """
+    Cambia la contraseña de un usuario verificando la actual
+    Regla de negocio: la nueva contraseña tiene al menos 6 caracteres; si el
+    pool de verificación está lleno se rechaza con 'reason' 'busy'
+
+    Args:
+        user_id (int): ID del usuario
+        current_password (str): Contraseña actual
+        new_password (str): Contraseña nueva
+
+    Returns:
+        dict: Resultado de la operación con 'success' y 'message' ('reason' si se rechazó por carga)
+    """
+    if not new_password or len(new_password) < 6:
+        return {
+            'success': False,
+            'message': 'La contraseña debe tener al menos 6 caracteres'
+        }
+
+    # La contraseña actual se verifica en el mismo pool acotado que el inicio de sesión
+    user = user_repository.get_user_by_id(user_id)
+    outcome = password_verifier.verify(user.password_hash, current_password or '') if user else (False, None)
+
+    if outcome is None:
+        return {
+            'success': False,
+            'reason': 'busy',
+            'message': 'Hay demasiadas verificaciones de contraseña en curso, intenta nuevamente en unos segundos'
+        }
+
+    if not outcome[0]:
+        return {
+            'success': False,
+            'message': 'La contraseña actual es incorrecta'
+        }
+
+    user_repository.update_user_password(user_id, new_password)
+    return {
+        'success': True,
+        'message': 'Contraseña actualizada'
+    }
+
+
+def issue_identity_claim(user):
+    """
+    Crea la credencial de identidad que se guarda en la cookie de sesión firmada
+    Permite a las APIs identificar al usuario sin consultar la base
+
+    Args:
+        user: Usuario autenticado (User o UserIdentity)
+
+    Returns:
+        dict: Credencial con 'user_id' e 'issued_at'
+    """
+    return {'user_id': user.id, 'issued_at': time.time()}
+
+
+def resolve_identity_claim(claim, ttl=IDENTITY_CLAIM_TTL):
+    """
+    Valida una credencial de identidad
+    Regla de negocio: vence a los ttl segundos y deja de valer si el usuario
+    se eliminó o cambió su contraseña después de emitirla
+
+    Args:
+        claim (dict): Credencial leída de la sesión (o None)
+        ttl (float): Vigencia en segundos
+
+    Returns:
+        int: ID del usuario, o None si la credencial no es válida
+    """
+    if not isinstance(claim, dict):
+        return None
+    user_id = claim.get('user_id')
+    issued_at = claim.get('issued_at')
+    if not isinstance(user_id, int) or not isinstance(issued_at, (int, float)):
+        return None
+    if time.time() - issued_at > ttl:
+        return None
+    if user_repository.is_identity_revoked(user_id, issued_at):
+        return None
+    return user_id
+
+
 def get_user_info(user_id):
     """
     Obtiene la información de un usuario
@@ -0,0 +1,164 @@
+"""
+Modelos de Canal Cuántico para BB84
+Describe el enlace entre Alice y Bob con tres parámetros, aplicados justo
+antes de la medición de Bob (después de Eve, si intercepta):
+    'depolarizing'  probabilidad λ de que el qubit quede totalmente mezclado
+                    (Bob obtiene un bit al azar: aporta λ/2 al QBER)
+    'bit_flip'      probabilidad p de un error X (invierte los resultados en
+                    la base rectilínea; aporta p/2 al QBER en promedio)
+    'loss'          probabilidad de que el fotón se pierda; Bob anuncia que
+                    no lo detectó y el qubit se descarta de ambos lados
+El backend de Qiskit aplica los dos primeros con un NoiseModel de Aer y el de
+NumPy los sortea de forma vectorizada con la misma distribución
+"""
+from functools import lru_cache
+
+import numpy as np
+
+
+# Parámetros del canal, en el orden en que se guardan y se usan como clave
+CHANNEL_PARAMETERS = ('depolarizing', 'bit_flip', 'loss')
+
+
+def normalize_channel(channel):
+    """
+    Valida y completa los parámetros de un canal
+
+    Args:
+        channel (dict | tuple): Parámetros (los que falten valen 0), una tupla
+            ya normalizada, o None para el canal ideal
+
+    Returns:
+        tuple: (depolarizing, bit_flip, loss), o None si el canal es ideal
+
+    Raises:
+        ValueError: Si hay parámetros desconocidos o fuera de rango
+    """
+    if not channel:
+        return None
+    if isinstance(channel, tuple) and len(channel) == len(CHANNEL_PARAMETERS):
+        channel = dict(zip(CHANNEL_PARAMETERS, channel))
+    if not isinstance(channel, dict):
+        raise ValueError('El canal debe ser un objeto con depolarizing, bit_flip y loss')
+
+    unknown = set(channel) - set(CHANNEL_PARAMETERS)
+    if unknown:
+        raise ValueError(f'Parámetros de canal desconocidos: {", ".join(sorted(unknown))}')
+
+    values = []
+    for name in CHANNEL_PARAMETERS:
+        value = channel.get(name) or 0.0
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f'El parámetro {name} del canal debe ser numérico')
+        # Con pérdida total no llegaría ningún qubit
+        if name == 'loss' and not 0.0 <= value < 1.0:
+            raise ValueError('El parámetro loss del canal debe estar entre 0 y 1 (sin incluir 1)')
+        if not 0.0 <= value <= 1.0:
+            raise ValueError(f'El parámetro {name} del canal debe estar entre 0 y 1')
+        values.append(float(value))
+
+    return tuple(values) if any(values) else None
+
+
+def channel_to_dict(channel):
+    """Parámetros de un canal normalizado como diccionario (todos en 0 si es ideal)"""
+    return dict(zip(CHANNEL_PARAMETERS, channel or (0.0, 0.0, 0.0)))
+
+
+@lru_cache(maxsize=32)
+def build_noise_model(channel):
+    """
+    NoiseModel de Aer equivalente al canal (sin la pérdida, que se sortea aparte)
+    El error se asocia a la compuerta 'id' que los circuitos ruidosos tienen
+    justo antes de la medición de Bob
+
+    Args:
+        channel (tuple): Canal normalizado
+
+    Returns:
+        NoiseModel: Modelo de ruido, o None si no hay despolarización ni bit flip
+    """
+    depolarizing, bit_flip, _ = channel or (0.0, 0.0, 0.0)
+    if not depolarizing and not bit_flip:
+        return None
+
+    from qiskit_aer.noise import NoiseModel, depolarizing_error, pauli_error
+
+    error = depolarizing_error(depolarizing, 1).compose(pauli_error([('X', bit_flip), ('I', 1 - bit_flip)]))
+    noise_model = NoiseModel()
+    noise_model.add_all_qubit_quantum_error(error, ['id'])
+    return noise_model
+
+
+def sample_received(key_length, channel, rng):
+    """
+    Sortea qué fotones llegan a Bob
+
+    Args:
+        key_length (int): Qubits enviados
+        channel (tuple): Canal normalizado (o None)
+        rng (np.random.Generator): Generador a usar
+
+    Returns:
+        np.ndarray: Máscara booleana de qubits detectados por Bob
+    """
+    loss = channel[2] if channel else 0.0
+    if not loss:
+        return np.ones(key_length, dtype=bool)
+    return rng.random(key_length) >= loss
+
+
+def apply_channel_numpy(bob_results, bob_bases, channel, rng):
+    """
+    Aplica la despolarización y el bit flip a los resultados de Bob
+    Equivale al error de build_noise_model: con probabilidad λ el resultado
+    es una moneda justa y, con probabilidad p, un error X invierte los
+    resultados medidos en la base rectilínea (en la diagonal no tiene efecto)
+
+    Args:
+        bob_results (np.ndarray): Resultados sin ruido (uint8)
+        bob_bases (np.ndarray): Bases de medición de Bob (uint8)
+        channel (tuple): Canal normalizado (o None)
+        rng (np.random.Generator): Generador a usar
+
+    Returns:
+        np.ndarray: Resultados con ruido (uint8)
+    """
+    depolarizing, bit_flip, _ = channel or (0.0, 0.0, 0.0)
+    shape = np.shape(bob_results)
+
+    if bit_flip:
+        flipped = (rng.random(shape) < bit_flip) & (bob_bases == 0)
+        bob_results = bob_results ^ flipped.astype(np.uint8)
+    if depolarizing:
+        mixed = rng.random(shape) < depolarizing
+        coin = rng.integers(0, 2, size=shape, dtype=np.uint8)
+        bob_results = np.where(mixed, coin, bob_results)
+    return bob_results
+
+
+def annotate_result(result, key_length, qubits_received, channel):
+    """
+    Agrega al resultado de una simulación los datos del canal ruidoso
+    Con el canal ideal lo devuelve sin cambios
+
+    Args:
+        result (dict): Resultado de sift_and_estimate (calculado sobre los qubits recibidos)
+        key_length (int): Qubits enviados por Alice
+        qubits_received (int): Qubits que Bob detectó
+        channel (tuple): Canal normalizado (o None)
+
+    Returns:
+        dict: El mismo resultado con 'channel', 'qubits_received' y 'qubits_lost'
+    """
+    if channel is None:
+        return result
+
+    result['channel'] = channel_to_dict(channel)
+    result['qubits_received'] = qubits_received
+    result['qubits_lost'] = key_length - qubits_received
+    if 'key_length_initial' in result:
+        result['key_length_initial'] = key_length
+    if 'secret_key_rate' in result:
+        result['secret_key_rate'] = result['key_length_final'] / key_length
+    return result
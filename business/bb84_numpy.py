@@ -0,0 +1,267 @@
+"""
+Simulación analítica del Protocolo BB84 usando NumPy
+Para un canal ideal cada medición tiene una regla cerrada: si la base de
+medición coincide con la de preparación se obtiene el bit codificado, si no,
+una moneda justa. Un canal ruidoso (bb84_channel) se sortea sobre esos
+resultados. No construye circuitos ni depende de Qiskit
+"""
+import numpy as np
+
+from business import bb84_sampling
+from business.bb84_channel import annotate_result, apply_channel_numpy, sample_received
+from business.bb84_postprocessing import reconcile_and_amplify
+
+
+# Umbral típico de QBER para BB84
+THRESHOLD = 0.11
+
+
+def measure_analytic(bits, prep_bases, meas_bases, rng):
+    """
+    Mide de forma vectorizada qubits preparados en (bits, prep_bases)
+    Acepta arreglos de cualquier forma (por ejemplo, ensayos x qubits)
+
+    Args:
+        bits (np.ndarray): Bits codificados (uint8)
+        prep_bases (np.ndarray): Bases de preparación (uint8)
+        meas_bases (np.ndarray): Bases de medición (uint8)
+        rng (np.random.Generator): Generador de números aleatorios
+
+    Returns:
+        np.ndarray: Resultados de la medición (uint8)
+    """
+    coin = rng.integers(0, 2, size=np.shape(bits), dtype=np.uint8)
+    return np.where(prep_bases == meas_bases, bits, coin)
+
+
+def transmit_numpy(key_length, has_eve=False, rng=None, channel=None):
+    """
+    Genera los datos de Alice, Bob y Eve y transmite todos los qubits en una pasada
+    Con pérdida en el canal, los arreglos solo contienen los qubits que Bob detectó
+
+    Args:
+        key_length (int): Longitud de la secuencia inicial
+        has_eve (bool): Si hay espía o no
+        rng (np.random.Generator, optional): Generador a usar
+        channel (tuple, optional): Canal normalizado (bb84_channel); None es el canal ideal
+
+    Returns:
+        dict: Arreglos uint8 'alice_bits', 'alice_bases', 'bob_bases',
+            'bob_results', 'eve_bases' y 'eve_results' (estos dos None sin Eve)
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+
+    alice_bits = rng.integers(0, 2, size=key_length, dtype=np.uint8)
+    alice_bases = rng.integers(0, 2, size=key_length, dtype=np.uint8)
+    bob_bases = rng.integers(0, 2, size=key_length, dtype=np.uint8)
+
+    if channel is not None:
+        received = sample_received(key_length, channel, rng)
+        alice_bits, alice_bases, bob_bases = alice_bits[received], alice_bases[received], bob_bases[received]
+
+    eve_bases = None
+    eve_results = None
+
+    if has_eve:
+        # Eve mide con su base y reenvía el estado que obtuvo (solo los qubits que llegan)
+        eve_bases = rng.integers(0, 2, size=len(alice_bits), dtype=np.uint8)
+        eve_results = measure_analytic(alice_bits, alice_bases, eve_bases, rng)
+        bob_results = measure_analytic(eve_results, eve_bases, bob_bases, rng)
+    else:
+        bob_results = measure_analytic(alice_bits, alice_bases, bob_bases, rng)
+
+    if channel is not None:
+        bob_results = apply_channel_numpy(bob_results, bob_bases, channel, rng)
+
+    return {
+        'alice_bits': alice_bits,
+        'alice_bases': alice_bases,
+        'bob_bases': bob_bases,
+        'bob_results': bob_results,
+        'eve_bases': eve_bases,
+        'eve_results': eve_results
+    }
+
+
+def simulate_bb84_numpy(key_length, has_eve=False, rng=None, channel=None, post_processing=False):
+    """
+    Simula el protocolo BB84 completo con operaciones vectorizadas
+    Devuelve el mismo diccionario que simulate_bb84
+
+    Args:
+        key_length (int): Longitud de la secuencia inicial
+        has_eve (bool): Si hay espía o no
+        rng (np.random.Generator, optional): Generador a usar
+        channel (tuple, optional): Canal normalizado (bb84_channel)
+        post_processing (bool): Si se aplica Cascade y amplificación de privacidad
+
+    Returns:
+        dict: Resultado de la simulación
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+
+    data = transmit_numpy(key_length, has_eve, rng, channel)
+    result = sift_and_estimate(data['alice_bits'], data['alice_bases'],
+                               data['bob_bases'], data['bob_results'], rng, post_processing)
+    return annotate_result(result, key_length, len(data['alice_bits']), channel)
+
+
+def sift_and_estimate(alice_bits, alice_bases, bob_bases, bob_results, rng=None, post_processing=False):
+    """
+    Filtra la clave, estima el QBER con una muestra y decide si es segura
+    Trabaja con máscaras booleanas de NumPy, así que el costo es lineal en la
+    longitud de la clave sin importar el tamaño de la muestra. Acepta listas
+    o arreglos, por lo que todos los backends la comparten.
+    El tamaño de la muestra y el intervalo de confianza del QBER vienen de
+    bb84_sampling ('sample_size', 'qber_interval' y 'confidence').
+    Con post_processing, la clave segura pasa además por Cascade y la
+    amplificación de privacidad (bb84_postprocessing) y el resultado incluye
+    'post_processing' y 'secret_key_rate' (bits secretos por qubit enviado)
+
+    Args:
+        alice_bits (list | np.ndarray): Bits de Alice
+        alice_bases (list | np.ndarray): Bases de Alice
+        bob_bases (list | np.ndarray): Bases de Bob
+        bob_results (list | np.ndarray): Resultados de medición de Bob
+        rng (np.random.Generator, optional): Generador usado para la muestra
+        post_processing (bool): Si se reconcilia y amplifica la clave segura
+
+    Returns:
+        dict: Resultado de la simulación
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+
+    alice_bits = np.asarray(alice_bits, dtype=np.uint8)
+    bob_results = np.asarray(bob_results, dtype=np.uint8)
+    key_length = len(alice_bits)
+
+    # Comparación pública de bases y clave filtrada
+    matching = np.asarray(alice_bases) == np.asarray(bob_bases)
+    alice_key = alice_bits[matching]
+    bob_key = bob_results[matching]
+    matching_bases = len(alice_key)
+
+    if matching_bases == 0:
+        return {
+            'success': False,
+            'message': 'No hubo coincidencia de bases suficiente'
+        }
+
+    # Comparar una muestra para detectar espionaje (al menos un bit, ver bb84_sampling)
+    sample_size = bb84_sampling.sample_size(matching_bases)
+    in_sample = np.zeros(matching_bases, dtype=bool)
+    in_sample[rng.choice(matching_bases, size=sample_size, replace=False)] = True
+
+    errors = int(np.count_nonzero(alice_key[in_sample] != bob_key[in_sample]))
+    error_rate = errors / sample_size
+    qber_low, qber_high = bb84_sampling.qber_interval(errors, sample_size)
+    estimate = {
+        'sample_size': sample_size,
+        'qber_interval': [qber_low, qber_high],
+        'confidence': bb84_sampling.get_sampling()['confidence']
+    }
+
+    if error_rate < THRESHOLD:
+        # Remover los bits usados en la verificación
+        final_key_bits = alice_key[~in_sample]
+        stage = None
+        if post_processing:
+            stage = reconcile_and_amplify(final_key_bits, bob_key[~in_sample], error_rate, rng, qber_high)
+            final_key_bits = stage.pop('key')
+        final_key = (final_key_bits + ord('0')).tobytes().decode('ascii')
+
+        result = {
+            'success': True,
+            'result': 'secure',
+            'final_key': final_key,
+            'error_rate': error_rate,
+            'key_length_initial': key_length,
+            'key_length_after_sifting': matching_bases,
+            'key_length_final': len(final_key_bits),
+            'matching_bases': matching_bases,
+            'message': f'Clave segura generada. QBER: {error_rate:.2%}',
+            **estimate
+        }
+        if stage is not None:
+            result['post_processing'] = stage
+            result['secret_key_rate'] = len(final_key_bits) / key_length
+            if len(final_key_bits) == 0:
+                result['message'] = f'QBER: {error_rate:.2%}, pero la clave es muy corta para extraer bits secretos'
+        return result
+
+    result = {
+        'success': True,
+        'result': 'compromised',
+        'final_key': None,
+        'error_rate': error_rate,
+        'key_length_initial': key_length,
+        'key_length_after_sifting': matching_bases,
+        'key_length_final': 0,
+        'matching_bases': matching_bases,
+        'message': f'¡Espionaje detectado! QBER demasiado alto: {error_rate:.2%}',
+        **estimate
+    }
+    if post_processing:
+        result['secret_key_rate'] = 0.0
+    return result
+
+
+def simulate_trials_numpy(key_length, has_eve, trials, rng=None):
+    """
+    Simula varios ensayos independientes de BB84 a la vez (ensayos x qubits)
+    La muestra de verificación de cada ensayo se toma sin reemplazo de su
+    clave filtrada, así que sus errores siguen una distribución
+    hipergeométrica y se sortean directamente a partir de los conteos
+
+    Args:
+        key_length (int): Longitud de la secuencia inicial de cada ensayo
+        has_eve (bool): Si hay espía o no
+        trials (int): Cantidad de ensayos
+        rng (np.random.Generator, optional): Generador a usar
+
+    Returns:
+        dict: Arreglos por ensayo 'sifted_length', 'sample_size',
+            'sample_errors', 'error_rate' (NaN si no hubo muestra),
+            'detected' y 'final_length'. Un ensayo sin muestra no se
+            considera detectado ni genera clave
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+
+    shape = (trials, key_length)
+    alice_bits = rng.integers(0, 2, size=shape, dtype=np.uint8)
+    alice_bases = rng.integers(0, 2, size=shape, dtype=np.uint8)
+    bob_bases = rng.integers(0, 2, size=shape, dtype=np.uint8)
+
+    if has_eve:
+        eve_bases = rng.integers(0, 2, size=shape, dtype=np.uint8)
+        eve_results = measure_analytic(alice_bits, alice_bases, eve_bases, rng)
+        bob_results = measure_analytic(eve_results, eve_bases, bob_bases, rng)
+    else:
+        bob_results = measure_analytic(alice_bits, alice_bases, bob_bases, rng)
+
+    matching = alice_bases == bob_bases
+    sifted_length = np.count_nonzero(matching, axis=1)
+    sifted_errors = np.count_nonzero(matching & (alice_bits != bob_results), axis=1)
+
+    # Misma regla que simulate_bb84 (bb84_sampling), para todos los ensayos a la vez
+    sample_size = bb84_sampling.sample_size(sifted_length)
+    sample_errors = rng.hypergeometric(sifted_errors, sifted_length - sifted_errors, sample_size)
+
+    has_sample = sample_size > 0
+    with np.errstate(invalid='ignore', divide='ignore'):
+        error_rate = np.where(has_sample, sample_errors / sample_size, np.nan)
+    detected = has_sample & (error_rate >= THRESHOLD)
+    final_length = np.where(has_sample & ~detected, sifted_length - sample_size, 0)
+
+    return {
+        'sifted_length': sifted_length,
+        'sample_size': sample_size,
+        'sample_errors': sample_errors,
+        'error_rate': error_rate,
+        'detected': detected,
+        'final_length': final_length
+    }
@@ -0,0 +1,144 @@
+"""
+Ejecución paralela del Protocolo BB84 con un pool de procesos
+Divide los qubits en bloques que se simulan en procesos separados (fuera del
+GIL) y une los resultados en orden. Cada bloque usa su propio flujo de números
+aleatorios derivado de una misma semilla, así que una semilla reproduce la
+simulación completa sin importar qué proceso ejecutó cada bloque
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+# Qubits que simula cada proceso por tarea
+CHUNK_SIZE = 4096
+
+# Procesos del pool (uno por núcleo, configurable por entorno)
+PARALLEL_WORKERS = int(os.getenv('BB84_PARALLEL_WORKERS', os.cpu_count() or 1))
+
+_pool = None
+
+
+def _init_worker():
+    """
+    Precalienta un proceso del pool: importa Qiskit y construye la tabla de
+    circuitos una sola vez por proceso, no una vez por petición
+    """
+    from business.bb84_simulation import get_circuit_table
+    get_circuit_table(False)
+    get_circuit_table(True)
+
+
+def _ping():
+    """Tarea vacía usada para forzar el arranque de los procesos"""
+    return None
+
+
+def get_process_pool():
+    """
+    Devuelve el pool de procesos compartido, creándolo si no existe
+    Se usa el contexto 'spawn': un proceso creado con fork después de que Aer
+    inicializó sus hilos de OpenMP puede bloquearse
+
+    Returns:
+        ProcessPoolExecutor: Pool de procesos precalentados
+    """
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=PARALLEL_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker
+        )
+    return _pool
+
+
+def warm_up_pool():
+    """
+    Arranca los procesos del pool y espera a que terminen su inicialización,
+    para que la primera simulación no pague el import de Qiskit
+    """
+    pool = get_process_pool()
+    futures = [pool.submit(_ping) for _ in range(PARALLEL_WORKERS)]
+    for future in futures:
+        future.result()
+
+
+def shutdown_pool():
+    """Detiene el pool de procesos, si existe"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True)
+        _pool = None
+
+
+def simulate_chunk(chunk_length, has_eve, seed_sequence):
+    """
+    Simula un bloque de qubits con el modo batch de Qiskit
+
+    Args:
+        chunk_length (int): Cantidad de qubits del bloque
+        has_eve (bool): Si hay espía o no
+        seed_sequence (np.random.SeedSequence): Semilla propia del bloque
+
+    Returns:
+        dict: Arreglos uint8 con los datos de Alice, Bob y Eve del bloque
+    """
+    from business.bb84_simulation import run_batch
+
+    rng = np.random.default_rng(seed_sequence)
+    alice_bits = rng.integers(0, 2, size=chunk_length, dtype=np.uint8)
+    alice_bases = rng.integers(0, 2, size=chunk_length, dtype=np.uint8)
+    bob_bases = rng.integers(0, 2, size=chunk_length, dtype=np.uint8)
+    eve_bases = rng.integers(0, 2, size=chunk_length, dtype=np.uint8) if has_eve else None
+
+    # La semilla de Aer también sale del flujo del bloque
+    seed_simulator = int(rng.integers(0, 2**31 - 1))
+    bob_results, eve_results = run_batch(
+        alice_bits.tolist(),
+        alice_bases.tolist(),
+        bob_bases.tolist(),
+        eve_bases.tolist() if has_eve else None,
+        seed_simulator=seed_simulator
+    )
+
+    return {
+        'alice_bits': alice_bits,
+        'alice_bases': alice_bases,
+        'bob_bases': bob_bases,
+        'bob_results': np.array(bob_results, dtype=np.uint8),
+        'eve_bases': eve_bases,
+        'eve_results': np.array(eve_results, dtype=np.uint8) if has_eve else None
+    }
+
+
+def transmit_parallel(key_length, has_eve=False, seed=None, chunk_size=CHUNK_SIZE):
+    """
+    Simula todos los qubits repartidos en bloques sobre el pool de procesos
+
+    Args:
+        key_length (int): Longitud de la secuencia inicial
+        has_eve (bool): Si hay espía o no
+        seed (int, optional): Semilla de la simulación completa
+        chunk_size (int): Qubits por bloque
+
+    Returns:
+        dict: Arreglos uint8 'alice_bits', 'alice_bases', 'bob_bases',
+            'bob_results', 'eve_bases' y 'eve_results' (estos dos None sin Eve)
+    """
+    lengths = [min(chunk_size, key_length - start) for start in range(0, key_length, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(lengths))
+
+    pool = get_process_pool()
+    futures = [pool.submit(simulate_chunk, length, has_eve, chunk_seed) for length, chunk_seed in zip(lengths, seeds)]
+    chunks = [future.result() for future in futures]
+
+    merged = {}
+    for name in ('alice_bits', 'alice_bases', 'bob_bases', 'bob_results', 'eve_bases', 'eve_results'):
+        if name.startswith('eve') and not has_eve:
+            merged[name] = None
+        else:
+            merged[name] = np.concatenate([chunk[name] for chunk in chunks]) if chunks else np.zeros(0, dtype=np.uint8)
+    return merged
@@ -0,0 +1,211 @@
+"""
+Post-procesamiento de la Clave BB84
+Después del filtrado y la estimación del QBER, Alice y Bob todavía tienen
+claves con errores y parcialmente conocidas por Eve. Esta etapa las lleva a
+una clave secreta común en dos pasos, ambos vectorizados con NumPy:
+    1. Reconciliación con Cascade: paridades de bloques calculadas en bloque
+       (prefijos XOR) y búsqueda binaria simultánea en todos los bloques con
+       paridad distinta. Cada paridad que Alice revela es un bit filtrado
+    2. Amplificación de privacidad con un hash de Toeplitz (producto por FFT)
+       que descarta la información filtrada y la que pudo obtener Eve
+"""
+import math
+
+import numpy as np
+
+
+# Pasadas de Cascade; el tamaño de bloque se duplica en cada una
+CASCADE_PASSES = 4
+
+# QBER mínimo con el que se elige el primer tamaño de bloque: con una muestra
+# sin errores los bloques no crecen hasta cubrir toda la clave
+MIN_CASCADE_QBER = 0.01
+
+# Probabilidad de falla de la amplificación de privacidad (ε); cuesta 2·log2(1/ε) bits
+PRIVACY_AMPLIFICATION_EPSILON = 1e-10
+
+
+def binary_entropy(p):
+    """Entropía binaria h(p) en bits (0 en los extremos)"""
+    if p <= 0 or p >= 1:
+        return 0.0
+    return -p * math.log2(p) - (1 - p) * math.log2(1 - p)
+
+
+def prefix_parity(bits):
+    """
+    Paridades acumuladas: la paridad de bits[a:b] es P[b] ^ P[a]
+
+    Args:
+        bits (np.ndarray): Bits (uint8)
+
+    Returns:
+        np.ndarray: Arreglo uint8 de len(bits) + 1 elementos, empezando en 0
+    """
+    parity = np.zeros(len(bits) + 1, dtype=np.uint8)
+    np.bitwise_xor.accumulate(bits, out=parity[1:])
+    return parity
+
+
+def locate_errors(alice_parity, bob_parity, block_size):
+    """
+    Encuentra un error en cada bloque cuya paridad difiere entre Alice y Bob
+    La búsqueda binaria avanza a la vez en todos esos bloques: en cada paso
+    Alice revela la paridad de la mitad izquierda de los bloques activos
+
+    Args:
+        alice_parity (np.ndarray): Paridades acumuladas de Alice (prefix_parity)
+        bob_parity (np.ndarray): Paridades acumuladas de Bob
+        block_size (int): Tamaño de bloque
+
+    Returns:
+        tuple: (posiciones con error, paridades reveladas en la búsqueda)
+    """
+    length = len(alice_parity) - 1
+    starts = np.arange(0, length, block_size)
+    ends = np.minimum(starts + block_size, length)
+    odd = (alice_parity[ends] ^ alice_parity[starts]) != (bob_parity[ends] ^ bob_parity[starts])
+    low, high = starts[odd], ends[odd]
+
+    revealed = 0
+    active = high - low > 1
+    while active.any():
+        revealed += int(np.count_nonzero(active))
+        middle = (low + high) // 2
+        left_odd = (alice_parity[middle] ^ alice_parity[low]) != (bob_parity[middle] ^ bob_parity[low])
+        high = np.where(active & left_odd, middle, high)
+        low = np.where(active & ~left_odd, middle, low)
+        active = high - low > 1
+    return low, revealed
+
+
+def cascade(alice_key, bob_key, qber, rng, passes=CASCADE_PASSES):
+    """
+    Corrige la clave de Bob con el protocolo Cascade
+    Cada pasada permuta la clave al azar (la primera no) y compara las
+    paridades de bloques del doble de tamaño que la anterior. Corregir un bit
+    cambia la paridad de sus bloques en las pasadas previas, así que se
+    vuelven a revisar todas hasta que no quede ningún bloque impar. Las
+    paridades de los bloques ya se conocen, por lo que revisarlas no filtra
+    información nueva
+
+    Args:
+        alice_key (np.ndarray): Clave de Alice (uint8)
+        bob_key (np.ndarray): Clave de Bob (uint8), no se modifica
+        qber (float): QBER estimado, define el primer tamaño de bloque (0.73 / QBER)
+        rng (np.random.Generator): Generador de las permutaciones (públicas)
+        passes (int): Cantidad de pasadas
+
+    Returns:
+        tuple: (clave corregida de Bob, dict con 'leaked_bits' y 'corrected_errors')
+    """
+    alice_key = np.asarray(alice_key, dtype=np.uint8)
+    bob_key = np.array(bob_key, dtype=np.uint8)
+    length = len(alice_key)
+    leaked = 0
+    corrected = 0
+    if length == 0:
+        return bob_key, {'leaked_bits': 0, 'corrected_errors': 0}
+
+    first_block = max(1, min(length, int(0.73 / max(qber, MIN_CASCADE_QBER))))
+    layouts = []
+
+    for number in range(passes):
+        order = np.arange(length) if number == 0 else rng.permutation(length)
+        block_size = min(length, first_block << number)
+        layouts.append((order, prefix_parity(alice_key[order]), block_size))
+        leaked += -(-length // block_size)
+
+        changed = True
+        while changed:
+            changed = False
+            for order, alice_parity, size in layouts:
+                positions, revealed = locate_errors(alice_parity, prefix_parity(bob_key[order]), size)
+                leaked += revealed
+                if len(positions):
+                    bob_key[order[positions]] ^= 1
+                    corrected += len(positions)
+                    changed = True
+
+    return bob_key, {'leaked_bits': leaked, 'corrected_errors': corrected}
+
+
+def toeplitz_hash(bits, output_length, seed_bits):
+    """
+    Multiplica los bits por una matriz de Toeplitz binaria (módulo 2)
+    La matriz de output_length × len(bits) queda definida por sus
+    len(bits) + output_length - 1 diagonales (seed_bits); el producto es un
+    tramo de la convolución de seed_bits con bits, que se calcula con FFT
+
+    Args:
+        bits (np.ndarray): Bits de entrada (uint8)
+        output_length (int): Bits de salida
+        seed_bits (np.ndarray): Diagonales de la matriz (uint8)
+
+    Returns:
+        np.ndarray: Bits de salida (uint8)
+    """
+    length = len(bits)
+    if output_length <= 0 or length == 0:
+        return np.zeros(0, dtype=np.uint8)
+
+    size = 1 << (len(seed_bits) + length - 2).bit_length()
+    product = np.fft.irfft(np.fft.rfft(seed_bits, size) * np.fft.rfft(bits, size), size)
+    window = product[length - 1:length - 1 + output_length]
+    return (np.rint(window).astype(np.int64) & 1).astype(np.uint8)
+
+
+def secret_key_length(length, qber, leaked_bits, epsilon=PRIVACY_AMPLIFICATION_EPSILON):
+    """
+    Bits secretos que se pueden extraer: n·(1 - h(QBER)) - filtrados - 2·log2(1/ε)
+
+    Args:
+        length (int): Bits de la clave reconciliada
+        qber (float): Tasa de error de la clave
+        leaked_bits (int): Bits revelados durante la reconciliación
+        epsilon (float): Probabilidad de falla admitida
+
+    Returns:
+        int: Longitud de la clave final (0 si no alcanza)
+    """
+    available = length * (1 - binary_entropy(qber)) - leaked_bits - 2 * math.log2(1 / epsilon)
+    return max(0, int(math.floor(available)))
+
+
+def reconcile_and_amplify(alice_key, bob_key, qber, rng, qber_bound=None):
+    """
+    Post-procesa la clave filtrada: Cascade y amplificación de privacidad
+    El QBER de la amplificación es el de los errores que corrigió Cascade
+    (Alice y Bob los conocen), o la cota superior del estimado con la
+    muestra si es mayor (clave finita)
+
+    Args:
+        alice_key (np.ndarray): Clave filtrada de Alice, sin los bits de la muestra
+        bob_key (np.ndarray): Clave filtrada de Bob, sin los bits de la muestra
+        qber (float): QBER estimado con la muestra (define los bloques de Cascade)
+        rng (np.random.Generator): Generador de las permutaciones y del hash (públicos)
+        qber_bound (float, optional): Cota superior del QBER; por defecto qber
+
+    Returns:
+        dict: 'key' (clave final de Alice, uint8), 'keys_match' (si la de Bob
+            coincide), 'leaked_bits', 'corrected_errors' y 'residual_errors'
+    """
+    alice_key = np.asarray(alice_key, dtype=np.uint8)
+    corrected_key, stats = cascade(alice_key, bob_key, qber, rng)
+    length = len(alice_key)
+    residual = int(np.count_nonzero(corrected_key != alice_key))
+
+    bound = qber if qber_bound is None else qber_bound
+    observed_qber = max(bound, stats['corrected_errors'] / length) if length else bound
+    output_length = secret_key_length(length, observed_qber, stats['leaked_bits'])
+    seed_bits = rng.integers(0, 2, size=length + output_length - 1, dtype=np.uint8) if output_length else None
+    key = toeplitz_hash(alice_key, output_length, seed_bits)
+    keys_match = residual == 0 or np.array_equal(key, toeplitz_hash(corrected_key, output_length, seed_bits))
+
+    return {
+        'key': key,
+        'keys_match': bool(keys_match),
+        'leaked_bits': stats['leaked_bits'],
+        'corrected_errors': stats['corrected_errors'],
+        'residual_errors': residual
+    }
@@ -0,0 +1,154 @@
+"""
+Muestreo del QBER con Cotas de Clave Finita
+Elige cuántos bits de la clave filtrada se sacrifican para estimar el QBER y
+con qué confianza se conoce la estimación:
+    - Tamaño de muestra por la desigualdad de Hoeffding: con k bits, el QBER
+      muestral se aleja menos de δ del real con probabilidad 1 - α si
+      k >= ln(2/α) / (2·δ²). Nunca se usa más que SAMPLE_MAX_FRACTION de la
+      clave filtrada (las claves chicas sacrifican una fracción, no todo)
+    - Intervalo de confianza del QBER: binomial exacto (Clopper-Pearson) o
+      de Hoeffding (más conservador)
+Todas las funciones aceptan escalares o arreglos de NumPy, así que los
+ensayos Monte-Carlo calculan las cotas de todos los ensayos a la vez
+"""
+import math
+
+import numpy as np
+
+
+# Confianza (1 - α) y cota de error δ del QBER muestral
+DEFAULT_CONFIDENCE = 0.95
+DEFAULT_ERROR_BOUND = 0.02
+
+# Fracción máxima de la clave filtrada que se usa como muestra
+DEFAULT_MAX_SAMPLE_FRACTION = 0.25
+
+INTERVAL_METHODS = ('binomial', 'hoeffding')
+
+_settings = {
+    'confidence': DEFAULT_CONFIDENCE,
+    'error_bound': DEFAULT_ERROR_BOUND,
+    'max_fraction': DEFAULT_MAX_SAMPLE_FRACTION,
+    'interval': 'binomial',
+}
+
+
+def configure_sampling(app):
+    """
+    Toma los parámetros de muestreo de la configuración de la aplicación
+
+    Args:
+        app (Flask): Aplicación con SAMPLE_CONFIDENCE, SAMPLE_ERROR_BOUND,
+            SAMPLE_MAX_FRACTION y QBER_INTERVAL_METHOD
+    """
+    set_sampling(
+        confidence=app.config.get('SAMPLE_CONFIDENCE', DEFAULT_CONFIDENCE),
+        error_bound=app.config.get('SAMPLE_ERROR_BOUND', DEFAULT_ERROR_BOUND),
+        max_fraction=app.config.get('SAMPLE_MAX_FRACTION', DEFAULT_MAX_SAMPLE_FRACTION),
+        interval=app.config.get('QBER_INTERVAL_METHOD', 'binomial')
+    )
+
+
+def set_sampling(confidence=None, error_bound=None, max_fraction=None, interval=None):
+    """
+    Cambia los parámetros de muestreo (los que no se indican se mantienen)
+
+    Raises:
+        ValueError: Si algún parámetro está fuera de rango
+    """
+    settings = dict(_settings)
+    for name, value in (('confidence', confidence), ('error_bound', error_bound),
+                        ('max_fraction', max_fraction), ('interval', interval)):
+        if value is not None:
+            settings[name] = value
+
+    if not 0 < settings['confidence'] < 1:
+        raise ValueError('SAMPLE_CONFIDENCE debe estar entre 0 y 1')
+    if not 0 < settings['error_bound'] < 1:
+        raise ValueError('SAMPLE_ERROR_BOUND debe estar entre 0 y 1')
+    if not 0 < settings['max_fraction'] <= 1:
+        raise ValueError('SAMPLE_MAX_FRACTION debe estar entre 0 y 1')
+    if settings['interval'] not in INTERVAL_METHODS:
+        raise ValueError(f"QBER_INTERVAL_METHOD inválido: {settings['interval']}")
+    _settings.update(settings)
+
+
+def get_sampling():
+    """Parámetros de muestreo vigentes"""
+    return dict(_settings)
+
+
+def hoeffding_sample_size(confidence=None, error_bound=None):
+    """
+    Bits de muestra para que el QBER muestral quede a menos de error_bound
+    del real con la confianza indicada (desigualdad de Hoeffding)
+
+    Returns:
+        int: ceil(ln(2/α) / (2·δ²))
+    """
+    confidence = _settings['confidence'] if confidence is None else confidence
+    error_bound = _settings['error_bound'] if error_bound is None else error_bound
+    return math.ceil(math.log(2 / (1 - confidence)) / (2 * error_bound ** 2))
+
+
+def sample_size(sifted_length, confidence=None, error_bound=None, max_fraction=None):
+    """
+    Tamaño de la muestra para una clave filtrada (o un arreglo de ellas)
+    Es el de Hoeffding, limitado a max_fraction de la clave y con al menos
+    un bit si la clave no está vacía, así que nunca es cero cuando hay bits
+
+    Args:
+        sifted_length (int | np.ndarray): Bits de la clave filtrada
+        confidence (float, optional): Confianza; por defecto la configurada
+        error_bound (float, optional): Cota de error δ; por defecto la configurada
+        max_fraction (float, optional): Fracción máxima; por defecto la configurada
+
+    Returns:
+        int | np.ndarray: Bits de la muestra
+    """
+    max_fraction = _settings['max_fraction'] if max_fraction is None else max_fraction
+    sifted_length = np.asarray(sifted_length, dtype=np.int64)
+
+    size = np.minimum(hoeffding_sample_size(confidence, error_bound),
+                      np.floor(sifted_length * max_fraction).astype(np.int64))
+    size = np.where(sifted_length > 0, np.maximum(size, 1), 0)
+    return int(size) if size.ndim == 0 else size
+
+
+def qber_interval(errors, size, confidence=None, method=None):
+    """
+    Intervalo de confianza del QBER a partir de los errores de la muestra
+
+    Args:
+        errors (int | np.ndarray): Errores en la muestra
+        size (int | np.ndarray): Bits de la muestra (NaN en el intervalo si es 0)
+        confidence (float, optional): Confianza; por defecto la configurada
+        method (str, optional): 'binomial' (Clopper-Pearson) o 'hoeffding'
+
+    Returns:
+        tuple: (cota inferior, cota superior), escalares o arreglos según la entrada
+    """
+    confidence = _settings['confidence'] if confidence is None else confidence
+    method = _settings['interval'] if method is None else method
+    if method not in INTERVAL_METHODS:
+        raise ValueError(f'Método de intervalo desconocido: {method}')
+
+    errors = np.asarray(errors, dtype=np.float64)
+    size = np.asarray(size, dtype=np.float64)
+    alpha = 1 - confidence
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if method == 'hoeffding':
+            rate = errors / size
+            half_width = np.sqrt(math.log(2 / alpha) / (2 * size))
+            low, high = np.clip(rate - half_width, 0, 1), np.clip(rate + half_width, 0, 1)
+        else:
+            from scipy.special import betaincinv
+
+            low = np.where(errors > 0, betaincinv(errors, size - errors + 1, alpha / 2), 0.0)
+            high = np.where(errors < size, betaincinv(errors + 1, size - errors, 1 - alpha / 2), 1.0)
+
+    low, high = np.where(size > 0, low, np.nan), np.where(size > 0, high, np.nan)
+    if low.ndim == 0:
+        return float(low), float(high)
+    return low, high
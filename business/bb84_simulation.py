@@ -1,22 +1,33 @@
 """
 Simulación del Protocolo BB84 usando Qiskit
 Este archivo contiene la implementación completa del protocolo cuántico
+Qiskit y Aer se importan recién al construir el primer circuito, así que el
+backend 'numpy' no los carga nunca; warm_up los prepara de antemano.
+El canal ruidoso (bb84_channel) se aplica con un NoiseModel de Aer sobre una
+compuerta identidad antes de la medición de Bob
 """
+import copy
 import random
+import time
+from functools import lru_cache
 import numpy as np
-from qiskit import QuantumCircuit, QuantumRegister, ClassicalRegister
-from qiskit_aer import Aer
-from qiskit.visualization import plot_histogram
+from business.bb84_channel import annotate_result, build_noise_model, normalize_channel, sample_received
+from business.bb84_numpy import simulate_bb84_numpy, sift_and_estimate
+from business.bb84_parallel import transmit_parallel, warm_up_pool
 
 
-def generate_random_bits(n):
-    """Genera n bits aleatorios"""
-    return [random.randint(0, 1) for _ in range(n)]
+# Resultados memorizados de simulaciones con semilla (LRU)
+RESULT_CACHE_SIZE = 256
 
 
-def generate_random_bases(n):
+def generate_random_bits(n, rng=random):
+    """Genera n bits aleatorios (con rng, un random.Random, si se indica)"""
+    return [rng.randint(0, 1) for _ in range(n)]
+
+
+def generate_random_bases(n, rng=random):
     """Genera n bases aleatorias (0=rectilínea +, 1=diagonal x)"""
-    return [random.randint(0, 1) for _ in range(n)]
+    return [rng.randint(0, 1) for _ in range(n)]
 
 
 def encode_qubit(bit, basis):
@@ -30,6 +41,8 @@ def encode_qubit(bit, basis):
     Returns:
         QuantumCircuit: Circuito con el qubit codificado
     """
+    from qiskit import QuantumCircuit
+    
     qc = QuantumCircuit(1, 1)
     
     # Codificar el bit
@@ -62,133 +75,408 @@ def measure_qubit(qc, basis):
     return qc
 
 
-def eve_intercept(qc):
+def append_interception(qc, qubit, eve_clbit, eve_basis):
+    """
+    Agrega la interceptación de Eve sobre un qubit como medición intermedia
+    Eve mide en su base sobre su propio bit clásico y re-prepara el qubit
+    condicionado a lo que midió, todo dentro del mismo circuito
+    
+    Args:
+        qc (QuantumCircuit): Circuito a modificar
+        qubit (int): Qubit interceptado
+        eve_clbit (Clbit): Bit clásico donde Eve guarda su resultado
+        eve_basis (int): Base de medición de Eve (0=+, 1=x)
+    """
+    # Eve mide con su base
+    if eve_basis == 1:
+        qc.h(qubit)
+    qc.measure(qubit, eve_clbit)
+    
+    # Eve prepara un nuevo qubit con lo que midió
+    qc.reset(qubit)
+    with qc.if_test((eve_clbit, 1)):
+        qc.x(qubit)
+    if eve_basis == 1:
+        qc.h(qubit)
+
+
+def eve_intercept(qc, eve_basis=None, rng=random):
     """
     Simula la interceptación y medición de Eve
-    Eve mide con una base aleatoria e intenta reenviar
+    Eve mide con una base aleatoria e intenta reenviar. La medición queda en
+    un registro clásico 'eve' del mismo circuito, por lo que su resultado se
+    lee de la memoria del trabajo que ejecuta la medición de Bob
     
     Args:
         qc (QuantumCircuit): Circuito a interceptar
+        eve_basis (int, optional): Base de Eve; si no se indica se elige al azar
+        rng (random.Random, optional): Generador para elegir la base
     
     Returns:
-        tuple: (circuito modificado, base usada por Eve, resultado de Eve)
+        tuple: (circuito modificado, base usada por Eve)
     """
-    eve_basis = random.randint(0, 1)
+    if eve_basis is None:
+        eve_basis = rng.randint(0, 1)
     
-    # Eve mide con su base aleatoria
-    if eve_basis == 1:
-        qc.h(0)
-    qc.measure(0, 0)
+    from qiskit import ClassicalRegister
     
-    # Simular ejecución para obtener el resultado de Eve
-    simulator = Aer.get_backend('qasm_simulator')
-    job = simulator.run(qc, shots=1)
-    result = job.result()
-    counts = result.get_counts()
-    eve_bit = int(list(counts.keys())[0])
+    eve_register = ClassicalRegister(1, 'eve')
+    qc.add_register(eve_register)
+    append_interception(qc, 0, eve_register[0], eve_basis)
     
-    # Eve prepara un nuevo qubit con lo que midió
-    qc_new = QuantumCircuit(1, 1)
-    if eve_bit == 1:
-        qc_new.x(0)
-    if eve_basis == 1:
-        qc_new.h(0)
+    return qc, eve_basis
+
+
+def parse_memory(memory, has_eve):
+    """
+    Separa una cadena de memoria de Aer en los resultados de Bob y de Eve
+    Qiskit ubica el bit clásico 0 a la derecha y separa los registros con
+    espacios, con el registro 'eve' (agregado al final) a la izquierda
+    
+    Args:
+        memory (str): Cadena de memoria de un shot
+        has_eve (bool): Si el circuito tiene registro de Eve
+    
+    Returns:
+        tuple: (bits de Bob, bits de Eve o None), en orden de qubit
+    """
+    if has_eve:
+        eve_memory, bob_memory = memory.split(' ')
+        return [int(bit) for bit in reversed(bob_memory)], [int(bit) for bit in reversed(eve_memory)]
+    
+    return [int(bit) for bit in reversed(memory)], None
+
+
+@lru_cache(maxsize=None)
+def get_simulator():
+    """
+    Devuelve el simulador de Aer compartido por todo el módulo
+    La búsqueda del backend se hace una sola vez por proceso
+    
+    Returns:
+        AerSimulator: Simulador de Aer (admite control de flujo, necesario
+            para la re-preparación condicionada de Eve)
+    """
+    from qiskit_aer import Aer
+    
+    return Aer.get_backend('aer_simulator')
+
+
+def circuit_index(bit, alice_basis, bob_basis, eve_basis=None):
+    """
+    Calcula la posición de un circuito en la tabla de get_circuit_table
+    
+    Args:
+        bit (int): Bit de Alice
+        alice_basis (int): Base de Alice
+        bob_basis (int): Base de Bob
+        eve_basis (int, optional): Base de Eve, si intercepta
+    
+    Returns:
+        int: Índice en la tabla (0-7 sin Eve, 0-15 con Eve)
+    """
+    if eve_basis is None:
+        return (bit << 2) | (alice_basis << 1) | bob_basis
+    return (bit << 3) | (alice_basis << 2) | (eve_basis << 1) | bob_basis
+
+
+@lru_cache(maxsize=None)
+def get_circuit_table(has_eve=False, noisy=False):
+    """
+    Construye y transpila una única vez todos los circuitos Alice→Bob posibles
+    Solo existen 4 estados de preparación y 2 bases de medición, así que
+    hay 8 circuitos distintos (16 si Eve intercepta con una de sus 2 bases)
+    
+    Args:
+        has_eve (bool): Si los circuitos incluyen la interceptación de Eve
+        noisy (bool): Si incluyen la compuerta identidad del canal ruidoso
+            justo antes de la medición de Bob (se transpila sin optimizar
+            para que no se elimine)
+    
+    Returns:
+        tuple: Circuitos transpilados, ordenados según circuit_index
+    """
+    from qiskit import transpile
+    
+    circuits = []
+    eve_choices = (0, 1) if has_eve else (None,)
+    
+    for bit in (0, 1):
+        for alice_basis in (0, 1):
+            for eve_basis in eve_choices:
+                for bob_basis in (0, 1):
+                    qc = encode_qubit(bit, alice_basis)
+                    if has_eve:
+                        qc, _ = eve_intercept(qc, eve_basis)
+                    if noisy:
+                        qc.id(0)
+                    circuits.append(measure_qubit(qc, bob_basis))
+    
+    if noisy:
+        return tuple(transpile(circuits, get_simulator(), optimization_level=0))
+    return tuple(transpile(circuits, get_simulator()))
+
+
+def transmit_sequential(alice_bits, alice_bases, bob_bases, has_eve=False, rng=random, seed_simulator=None,
+                        noise_model=None):
+    """
+    Transmite los qubits de a uno, ejecutando un trabajo de Aer por qubit
+    Con Eve, su medición y la de Bob se resuelven en el mismo trabajo
+    
+    Args:
+        alice_bits (list): Bits de Alice
+        alice_bases (list): Bases de Alice
+        bob_bases (list): Bases de medición de Bob
+        has_eve (bool): Si hay espía o no
+        rng (random.Random, optional): Generador para las bases de Eve
+        seed_simulator (int, optional): Semilla de Aer; el trabajo del qubit i usa seed_simulator + i
+        noise_model (NoiseModel, optional): Ruido del canal (build_noise_model)
+    
+    Returns:
+        tuple: (resultados de Bob, bases de Eve, resultados de Eve);
+            los dos últimos son None sin Eve
+    """
+    bob_results = []
+    eve_bases = [] if has_eve else None
+    eve_results = [] if has_eve else None
+    simulator = get_simulator()
+    table = get_circuit_table(has_eve, noise_model is not None)
+    
+    for i in range(len(alice_bits)):
+        # Si hay Eve, elige su base al azar
+        eve_basis = rng.randint(0, 1) if has_eve else None
+        
+        # Circuito precompilado para (bit, base de Alice, base de Eve, base de Bob)
+        qc = table[circuit_index(alice_bits[i], alice_bases[i], bob_bases[i], eve_basis)]
+        
+        # Ejecutar el circuito
+        job = simulator.run(qc, shots=1, memory=True, noise_model=noise_model,
+                            seed_simulator=seed_simulator + i if seed_simulator is not None else None)
+        bob_bits, eve_bits = parse_memory(job.result().get_memory()[0], has_eve)
+        bob_results.append(bob_bits[0])
+        if has_eve:
+            eve_bases.append(eve_basis)
+            eve_results.append(eve_bits[0])
+    
+    return bob_results, eve_bases, eve_results
+
+
+def run_batch(bits, prep_bases, meas_bases, eve_bases=None, seed_simulator=None, noise_model=None):
+    """
+    Prepara y mide todos los qubits con un único trabajo de Aer
+    Cada qubit corresponde a uno de los circuitos de la tabla precompilada;
+    como los qubits son independientes, cada circuito distinto se ejecuta una
+    vez con tantos shots como qubits lo usan y la memoria de cada shot se
+    asigna, en orden, a esos qubits
+    
+    Args:
+        bits (list): Bits a codificar
+        prep_bases (list): Bases de preparación
+        meas_bases (list): Bases de medición
+        eve_bases (list, optional): Bases de Eve, si intercepta
+        seed_simulator (int, optional): Semilla de Aer para resultados reproducibles
+        noise_model (NoiseModel, optional): Ruido del canal (build_noise_model)
+    
+    Returns:
+        tuple: (resultado de la medición final de cada qubit, resultados de
+            Eve o None), en orden
+    """
+    has_eve = eve_bases is not None
+    if len(bits) == 0:
+        return [], [] if has_eve else None
+    
+    table = get_circuit_table(has_eve, noise_model is not None)
+    indices = [
+        circuit_index(bits[i], prep_bases[i], meas_bases[i], eve_bases[i] if has_eve else None)
+        for i in range(len(bits))
+    ]
+    
+    # Cantidad de qubits que usa cada circuito de la tabla
+    usage = [0] * len(table)
+    for index in indices:
+        usage[index] += 1
+    used = [index for index in range(len(table)) if usage[index] > 0]
+    
+    # Un único run([...]) con todos los circuitos usados; los shots sobrantes
+    # de los circuitos menos frecuentes se descartan
+    result = get_simulator().run([table[index] for index in used], shots=max(usage), memory=True,
+                                 seed_simulator=seed_simulator, noise_model=noise_model).result()
+    memories = {index: iter(result.get_memory(position)) for position, index in enumerate(used)}
+    
+    outcomes = []
+    eve_outcomes = [] if has_eve else None
+    for index in indices:
+        bob_bits, eve_bits = parse_memory(next(memories[index]), has_eve)
+        outcomes.append(bob_bits[0])
+        if has_eve:
+            eve_outcomes.append(eve_bits[0])
     
-    return qc_new, eve_basis, eve_bit
+    return outcomes, eve_outcomes
 
 
-def simulate_bb84(key_length, has_eve=False):
+def transmit_batch(alice_bits, alice_bases, bob_bases, has_eve=False, rng=random, seed_simulator=None,
+                   noise_model=None):
+    """
+    Transmite todos los qubits con un único trabajo de Aer
+    Con Eve, su interceptación es una medición intermedia dentro de los
+    circuitos de la tabla, así que tampoco requiere trabajos adicionales
+    
+    Args:
+        alice_bits (list): Bits de Alice
+        alice_bases (list): Bases de Alice
+        bob_bases (list): Bases de medición de Bob
+        has_eve (bool): Si hay espía o no
+        rng (random.Random, optional): Generador para las bases de Eve
+        seed_simulator (int, optional): Semilla de Aer
+        noise_model (NoiseModel, optional): Ruido del canal (build_noise_model)
+    
+    Returns:
+        tuple: (resultados de Bob, bases de Eve, resultados de Eve);
+            los dos últimos son None sin Eve
+    """
+    eve_bases = generate_random_bases(len(alice_bits), rng) if has_eve else None
+    bob_results, eve_results = run_batch(alice_bits, alice_bases, bob_bases, eve_bases, seed_simulator,
+                                         noise_model)
+    return bob_results, eve_bases, eve_results
+
+
+# Funciones de transmisión de cada backend
+TRANSMITTERS = {
+    'qiskit': transmit_sequential,
+    'qiskit_batch': transmit_batch,
+}
+
+# Backends de ejecución disponibles para simulate_bb84
+# 'numpy' resuelve el canal ideal de forma analítica, sin construir circuitos
+# 'qiskit_parallel' reparte bloques de qubits en un pool de procesos
+BACKENDS = tuple(TRANSMITTERS) + ('numpy', 'qiskit_parallel')
+
+
+def warm_up(backend):
+    """
+    Prepara un backend para que la primera simulación no pague su arranque:
+    importa Qiskit y Aer, construye las tablas de circuitos y ejecuta una
+    simulación chica (el primer trabajo de Aer inicializa el simulador).
+    Para 'qiskit_parallel' además arranca los procesos del pool
+    
+    Args:
+        backend (str): Backend a preparar
+    
+    Returns:
+        float: Segundos que tomó la preparación
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f'Backend de simulación desconocido: {backend}')
+    
+    start = time.perf_counter()
+    if backend == 'qiskit_parallel':
+        warm_up_pool()
+    elif backend != 'numpy':
+        get_circuit_table(False)
+        get_circuit_table(True)
+    if backend != 'qiskit_parallel':
+        simulate_bb84(16, has_eve=True, backend=backend)
+    return time.perf_counter() - start
+
+
+def simulate_bb84(key_length, has_eve=False, backend='qiskit', seed=None, channel=None, post_processing=False):
     """
     Simula el protocolo BB84 completo
     
     Args:
         key_length (int): Longitud de la secuencia inicial
         has_eve (bool): Si hay espía o no
+        backend (str): Modo de ejecución ('qiskit' un trabajo por qubit,
+            'qiskit_batch' todos los qubits en un único trabajo,
+            'numpy' cálculo analítico vectorizado,
+            'qiskit_parallel' bloques en paralelo en un pool de procesos)
+        seed (int, optional): Semilla; con la misma semilla y parámetros el
+            resultado es idéntico (bits, bases, mediciones de Aer y muestra)
+        channel (dict | tuple, optional): Canal ruidoso ('depolarizing',
+            'bit_flip', 'loss'); None es el canal ideal. 'qiskit_parallel'
+            solo admite el canal ideal
+        post_processing (bool): Si la clave segura pasa por Cascade y la
+            amplificación de privacidad (bb84_postprocessing)
     
     Returns:
-        dict: Resultado de la simulación
+        dict: Resultado de la simulación (con canal ruidoso, además 'channel',
+            'qubits_received' y 'qubits_lost'; con post_processing, además
+            'post_processing' y 'secret_key_rate')
     """
+    if backend not in BACKENDS:
+        raise ValueError(f'Backend de simulación desconocido: {backend}')
+    channel = normalize_channel(channel)
+    if channel is not None and backend == 'qiskit_parallel':
+        raise ValueError('El backend qiskit_parallel no admite canales ruidosos')
+    
+    # Generador de la muestra de verificación (NumPy) derivado de la misma semilla
+    sample_rng = np.random.default_rng(seed)
+    
+    if backend == 'numpy':
+        return simulate_bb84_numpy(key_length, has_eve, rng=sample_rng, channel=channel,
+                                   post_processing=post_processing)
+    
+    if backend == 'qiskit_parallel':
+        data = transmit_parallel(key_length, has_eve, seed=seed)
+        return sift_and_estimate(data['alice_bits'], data['alice_bases'],
+                                 data['bob_bases'], data['bob_results'], sample_rng, post_processing)
+    
+    # Sin semilla se usa el módulo random global, como siempre
+    rng = random.Random(seed) if seed is not None else random
+    seed_simulator = rng.randrange(2**31 - key_length) if seed is not None else None
+    
     # Paso 1: Alice genera bits y bases aleatorias
-    alice_bits = generate_random_bits(key_length)
-    alice_bases = generate_random_bases(key_length)
+    alice_bits = generate_random_bits(key_length, rng)
+    alice_bases = generate_random_bases(key_length, rng)
     
     # Paso 2: Bob genera bases aleatorias
-    bob_bases = generate_random_bases(key_length)
+    bob_bases = generate_random_bases(key_length, rng)
+    
+    # Los fotones perdidos en el canal no llegan a Bob y se descartan de ambos lados
+    if channel is not None:
+        received = np.flatnonzero(sample_received(key_length, channel, sample_rng))
+        alice_bits = [alice_bits[i] for i in received]
+        alice_bases = [alice_bases[i] for i in received]
+        bob_bases = [bob_bases[i] for i in received]
     
     # Paso 3: Transmisión y medición de qubits
-    bob_results = []
-    simulator = Aer.get_backend('qasm_simulator')
+    bob_results, eve_bases, eve_results = TRANSMITTERS[backend](alice_bits, alice_bases, bob_bases, has_eve,
+                                                                rng, seed_simulator, build_noise_model(channel))
     
-    for i in range(key_length):
-        # Alice codifica su bit
-        qc = encode_qubit(alice_bits[i], alice_bases[i])
-        
-        # Si hay Eve, intercepta
-        if has_eve:
-            qc, eve_basis, eve_bit = eve_intercept(qc)
-        
-        # Bob mide con su base
-        qc = measure_qubit(qc, bob_bases[i])
-        
-        # Ejecutar el circuito
-        job = simulator.run(qc, shots=1)
-        result = job.result()
-        counts = result.get_counts()
-        bob_bit = int(list(counts.keys())[0])
-        bob_results.append(bob_bit)
-    
-    # Paso 4: Comparación pública de bases
-    matching_bases_indices = [i for i in range(key_length) if alice_bases[i] == bob_bases[i]]
-    
-    # Paso 5: Clave filtrada (donde las bases coinciden)
-    alice_key = [alice_bits[i] for i in matching_bases_indices]
-    bob_key = [bob_results[i] for i in matching_bases_indices]
-    
-    # Paso 6: Calcular tasa de error (QBER)
-    if len(alice_key) == 0:
-        return {
-            'success': False,
-            'message': 'No hubo coincidencia de bases suficiente'
-        }
-    
-    # Comparar una muestra para detectar espionaje
-    sample_size = min(len(alice_key) // 4, 20)  # 25% de la clave o máximo 20 bits
-    sample_indices = random.sample(range(len(alice_key)), sample_size)
-    
-    errors = sum(1 for i in sample_indices if alice_key[i] != bob_key[i])
-    error_rate = errors / sample_size
-    
-    # Paso 7: Decidir si la clave es segura
-    THRESHOLD = 0.11  # Umbral típico para BB84
-    
-    if error_rate < THRESHOLD:
-        # Remover los bits usados en la verificación
-        final_key_bits = [alice_key[i] for i in range(len(alice_key)) if i not in sample_indices]
-        final_key = ''.join(map(str, final_key_bits))
-        
-        return {
-            'success': True,
-            'result': 'secure',
-            'final_key': final_key,
-            'error_rate': error_rate,
-            'key_length_initial': key_length,
-            'key_length_after_sifting': len(alice_key),
-            'key_length_final': len(final_key_bits),
-            'matching_bases': len(matching_bases_indices),
-            'message': f'Clave segura generada. QBER: {error_rate:.2%}'
-        }
-    else:
-        return {
-            'success': True,
-            'result': 'compromised',
-            'final_key': None,
-            'error_rate': error_rate,
-            'key_length_initial': key_length,
-            'key_length_after_sifting': len(alice_key),
-            'key_length_final': 0,
-            'matching_bases': len(matching_bases_indices),
-            'message': f'¡Espionaje detectado! QBER demasiado alto: {error_rate:.2%}'
-        }
+    # Pasos 4 a 7: filtrado, estimación del QBER y decisión
+    result = sift_and_estimate(alice_bits, alice_bases, bob_bases, bob_results, sample_rng, post_processing)
+    return annotate_result(result, key_length, len(alice_bits), channel)
+
+
+@lru_cache(maxsize=RESULT_CACHE_SIZE)
+def _simulate_bb84_seeded(seed, key_length, has_eve, backend, channel, post_processing):
+    return simulate_bb84(key_length, has_eve, backend, seed, channel, post_processing)
+
+
+def simulate_bb84_cached(key_length, has_eve, backend, seed, channel=None, post_processing=False):
+    """
+    Simula BB84 con semilla, memorizando el resultado por (seed, key_length,
+    has_eve, backend, canal, post-procesamiento) con desalojo LRU. Como la simulación con semilla
+    es determinista, repetir una sesión guardada no vuelve a ejecutar Aer
+    
+    Args:
+        key_length (int): Longitud de la secuencia inicial
+        has_eve (bool): Si hay espía o no
+        backend (str): Modo de ejecución
+        seed (int): Semilla de la simulación
+        channel (dict | tuple, optional): Canal ruidoso
+        post_processing (bool): Si se reconcilia y amplifica la clave
+    
+    Returns:
+        dict: Copia profunda del resultado de la simulación (incluye listas como qber_interval)
+    """
+    return copy.deepcopy(_simulate_bb84_seeded(seed, key_length, bool(has_eve), backend,
+                                               normalize_channel(channel), bool(post_processing)))
+
+
+def result_cache_info():
+    """Aciertos, fallos y tamaño de la caché de resultados (functools.CacheInfo)"""
+    return _simulate_bb84_seeded.cache_info()
 
 
 # TODO: Integrar esta función en simulation_controller.py
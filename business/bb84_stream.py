@@ -0,0 +1,248 @@
+"""
+Simulación del Protocolo BB84 en streaming para claves muy largas
+Los qubits se procesan en bloques de tamaño fijo a través de etapas
+generadoras (generar → transmitir → filtrar → muestrear → acumular) y los
+bits de la clave se empaquetan de a 8 por byte a medida que se producen, así
+que la memoria usada no depende de la longitud de la clave
+"""
+import io
+import os
+
+import numpy as np
+
+from business import bb84_sampling
+from business.bb84_numpy import THRESHOLD, measure_analytic
+
+
+# Qubits por bloque
+BLOCK_SIZE = 65536
+
+# Backends de transmisión admitidos por el pipeline
+STREAM_BACKENDS = ('numpy', 'qiskit_batch')
+
+
+class PackedBitWriter:
+    """
+    Escribe bits en un archivo o buffer empaquetados de a 8 por byte
+    El primer bit de la clave es el más significativo del primer byte;
+    el último byte se completa con ceros
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.pending = np.zeros(0, dtype=np.uint8)
+        self.bits_written = 0
+
+    def write(self, bits):
+        """
+        Agrega bits a la clave; solo quedan en memoria los menos de 8 que
+        no completan un byte
+
+        Args:
+            bits (np.ndarray): Bits (uint8 con valores 0 o 1)
+        """
+        bits = np.concatenate([self.pending, bits])
+        full = len(bits) - len(bits) % 8
+        if full:
+            self.stream.write(np.packbits(bits[:full]).tobytes())
+        self.pending = bits[full:]
+        self.bits_written += full
+
+    def close(self):
+        """Escribe el último byte incompleto, si lo hay"""
+        if len(self.pending):
+            self.stream.write(np.packbits(self.pending).tobytes())
+            self.bits_written += len(self.pending)
+            self.pending = np.zeros(0, dtype=np.uint8)
+
+
+def generate_blocks(key_length, block_size, rng):
+    """
+    Etapa 1: Alice genera bits y bases, y Bob sus bases, de a un bloque
+
+    Yields:
+        dict: Arreglos uint8 'alice_bits', 'alice_bases' y 'bob_bases' del bloque
+    """
+    for start in range(0, key_length, block_size):
+        size = min(block_size, key_length - start)
+        yield {
+            'alice_bits': rng.integers(0, 2, size=size, dtype=np.uint8),
+            'alice_bases': rng.integers(0, 2, size=size, dtype=np.uint8),
+            'bob_bases': rng.integers(0, 2, size=size, dtype=np.uint8)
+        }
+
+
+def transmit_blocks(blocks, has_eve, rng, backend='numpy'):
+    """
+    Etapa 2: transmite cada bloque y agrega los resultados de Bob
+
+    Args:
+        blocks (iterable): Bloques de generate_blocks
+        has_eve (bool): Si hay espía o no
+        rng (np.random.Generator): Generador de números aleatorios
+        backend (str): 'numpy' (canal ideal analítico) o 'qiskit_batch'
+
+    Yields:
+        dict: El bloque con 'bob_results'
+    """
+    for block in blocks:
+        size = len(block['alice_bits'])
+        eve_bases = rng.integers(0, 2, size=size, dtype=np.uint8) if has_eve else None
+
+        if backend == 'numpy':
+            if has_eve:
+                eve_results = measure_analytic(block['alice_bits'], block['alice_bases'], eve_bases, rng)
+                block['bob_results'] = measure_analytic(eve_results, eve_bases, block['bob_bases'], rng)
+            else:
+                block['bob_results'] = measure_analytic(block['alice_bits'], block['alice_bases'], block['bob_bases'], rng)
+        else:
+            from business.bb84_simulation import run_batch
+            bob_results, _ = run_batch(
+                block['alice_bits'].tolist(),
+                block['alice_bases'].tolist(),
+                block['bob_bases'].tolist(),
+                eve_bases.tolist() if has_eve else None,
+                seed_simulator=int(rng.integers(0, 2**31 - 1))
+            )
+            block['bob_results'] = np.array(bob_results, dtype=np.uint8)
+
+        yield block
+
+
+def sift_blocks(blocks):
+    """
+    Etapa 3: descarta las posiciones donde las bases no coinciden
+
+    Yields:
+        tuple: (clave filtrada de Alice, clave filtrada de Bob) del bloque
+    """
+    for block in blocks:
+        matching = block['alice_bases'] == block['bob_bases']
+        yield block['alice_bits'][matching], block['bob_results'][matching]
+
+
+def sample_blocks(sifted_blocks, sample_fraction, rng):
+    """
+    Etapa 4: separa una muestra de cada bloque para estimar el QBER
+    Cada bit filtrado entra en la muestra con probabilidad sample_fraction,
+    así que no hace falta conocer de antemano la longitud total
+
+    Yields:
+        tuple: (bits de clave que quedan, bits filtrados, tamaño de la muestra,
+            errores en la muestra) del bloque
+    """
+    for alice_key, bob_key in sifted_blocks:
+        in_sample = rng.random(len(alice_key)) < sample_fraction
+        errors = int(np.count_nonzero(alice_key[in_sample] != bob_key[in_sample]))
+        yield alice_key[~in_sample], len(alice_key), int(np.count_nonzero(in_sample)), errors
+
+
+def default_sample_fraction(key_length):
+    """
+    Fracción de muestreo equivalente a la regla de simulate_bb84
+    (bb84_sampling.sample_size), sabiendo que en promedio se filtra la
+    mitad de los qubits
+    """
+    expected_sifted = max(key_length // 2, 1)
+    return bb84_sampling.sample_size(expected_sifted) / expected_sifted
+
+
+def simulate_bb84_stream(key_length, has_eve=False, output=None, backend='numpy',
+                         block_size=BLOCK_SIZE, sample_fraction=None, rng=None):
+    """
+    Simula el protocolo BB84 completo en streaming
+
+    Args:
+        key_length (int): Longitud de la secuencia inicial
+        has_eve (bool): Si hay espía o no
+        output (str, optional): Ruta donde escribir la clave empaquetada; si no
+            se indica, la clave se devuelve como bytes
+        backend (str): 'numpy' o 'qiskit_batch'
+        block_size (int): Qubits por bloque
+        sample_fraction (float, optional): Fracción de la clave filtrada usada
+            para estimar el QBER
+        rng (np.random.Generator, optional): Generador a usar
+
+    Returns:
+        dict: Resultado de la simulación; la clave final está en 'final_key_bytes'
+            o en el archivo 'final_key_path' (empaquetada, primer bit en el MSB)
+    """
+    if backend not in STREAM_BACKENDS:
+        raise ValueError(f'Backend de streaming desconocido: {backend}')
+
+    if rng is None:
+        rng = np.random.default_rng()
+    if sample_fraction is None:
+        sample_fraction = default_sample_fraction(key_length)
+
+    # La clave se escribe en un archivo temporal que solo se conserva si es segura
+    partial_path = output + '.part' if output else None
+    stream = open(partial_path, 'wb') if output else io.BytesIO()
+    writer = PackedBitWriter(stream)
+    sifted_length = 0
+    sample_size = 0
+    errors = 0
+
+    try:
+        blocks = generate_blocks(key_length, block_size, rng)
+        blocks = transmit_blocks(blocks, has_eve, rng, backend)
+        sifted = sift_blocks(blocks)
+        for key_bits, block_sifted, block_sample, block_errors in sample_blocks(sifted, sample_fraction, rng):
+            writer.write(key_bits)
+            sifted_length += block_sifted
+            sample_size += block_sample
+            errors += block_errors
+        writer.close()
+        key_bytes = stream.getvalue() if not output else None
+    except Exception:
+        # Un fallo a mitad del pipeline no deja el archivo parcial
+        if output:
+            stream.close()
+            os.remove(partial_path)
+        raise
+    finally:
+        stream.close()
+
+    if sample_size == 0:
+        if output:
+            os.remove(partial_path)
+        return {
+            'success': False,
+            'message': 'No hubo bits suficientes para estimar el QBER'
+        }
+
+    error_rate = errors / sample_size
+    qber_low, qber_high = bb84_sampling.qber_interval(errors, sample_size)
+    result = {
+        'success': True,
+        'error_rate': error_rate,
+        'key_length_initial': key_length,
+        'key_length_after_sifting': sifted_length,
+        'matching_bases': sifted_length,
+        'sample_size': sample_size,
+        'qber_interval': [qber_low, qber_high],
+        'confidence': bb84_sampling.get_sampling()['confidence']
+    }
+
+    if error_rate < THRESHOLD:
+        if output:
+            os.replace(partial_path, output)
+        result.update({
+            'result': 'secure',
+            'key_length_final': writer.bits_written,
+            'final_key_bytes': key_bytes,
+            'final_key_path': output,
+            'message': f'Clave segura generada. QBER: {error_rate:.2%}'
+        })
+    else:
+        if output:
+            os.remove(partial_path)
+        result.update({
+            'result': 'compromised',
+            'key_length_final': 0,
+            'final_key_bytes': None,
+            'final_key_path': None,
+            'message': f'¡Espionaje detectado! QBER demasiado alto: {error_rate:.2%}'
+        })
+
+    return result
@@ -0,0 +1,215 @@
+"""
+Capa de Negocio - Controlador de Experimentos
+Ejecuta experimentos Monte-Carlo del protocolo BB84 (muchos ensayos con los
+mismos parámetros) para estimar la probabilidad de detectar a Eve.
+Los ensayos se simulan vectorizados con NumPy por lotes y solo se guarda un
+resumen agregado, no una sesión por ensayo
+NO accede directamente a la base de datos, usa la capa de datos
+"""
+import numpy as np
+
+from business.bb84_numpy import simulate_trials_numpy
+from business.simulation_controller import MAX_SEED
+from datos import experiment_repository
+
+
+# Límites de un experimento
+MIN_KEY_LENGTH = 10
+MAX_KEY_LENGTH = 100000
+MAX_TRIALS = 1000000
+
+# Qubits simulados por experimento como máximo (ensayos x longitud); se
+# simulan en el hilo de la petición, así que el total queda en unos segundos
+MAX_EXPERIMENT_QUBITS = 100000000
+
+# Cantidad de qubits (ensayos x longitud) que se simulan por lote
+BATCH_QUBITS = 2000000
+
+# Histograma de QBER: 20 intervalos de 5%
+HISTOGRAM_BINS = 20
+HISTOGRAM_EDGES = np.linspace(0.0, 1.0, HISTOGRAM_BINS + 1)
+
+
+def validate_experiment(key_length, trials, seed=None):
+    """
+    Valida los parámetros de un experimento
+    Regla de negocio: longitud entre 10 y 100000 bits, hasta 10^6 ensayos,
+    hasta 10^8 qubits en total y semilla entera entre 0 y 2^63-1
+    
+    Args:
+        key_length (int): Longitud de la clave inicial de cada ensayo
+        trials (int): Cantidad de ensayos
+        seed (int, optional): Semilla para reproducir el experimento
+    
+    Returns:
+        dict: Resultado con 'success' y 'message' si hay error, None si es válido
+    """
+    if not isinstance(key_length, int) or key_length < MIN_KEY_LENGTH:
+        return {
+            'success': False,
+            'message': f'La longitud de la clave debe ser al menos {MIN_KEY_LENGTH} bits'
+        }
+    
+    if key_length > MAX_KEY_LENGTH:
+        return {
+            'success': False,
+            'message': f'La longitud de la clave no puede exceder {MAX_KEY_LENGTH} bits'
+        }
+    
+    if not isinstance(trials, int) or trials < 1 or trials > MAX_TRIALS:
+        return {
+            'success': False,
+            'message': f'La cantidad de ensayos debe estar entre 1 y {MAX_TRIALS}'
+        }
+    
+    if key_length * trials > MAX_EXPERIMENT_QUBITS:
+        return {
+            'success': False,
+            'message': f'Un experimento no puede simular más de {MAX_EXPERIMENT_QUBITS} qubits (ensayos x longitud)'
+        }
+    
+    if seed is not None and (isinstance(seed, bool) or not isinstance(seed, int) or not 0 <= seed <= MAX_SEED):
+        return {
+            'success': False,
+            'message': 'La semilla debe ser un entero entre 0 y 2^63-1'
+        }
+    
+    return None
+
+
+class ExperimentAccumulator:
+    """
+    Acumula las estadísticas de los lotes de ensayos de un experimento
+    """
+
+    def __init__(self, key_length, has_eve, trials):
+        self.key_length = key_length
+        self.has_eve = has_eve
+        self.trials = trials
+        self.done = 0
+        self.detected = 0
+        self.no_sample = 0
+        self.error_rate_sum = 0.0
+        self.sifted_sum = 0
+        self.final_sum = 0
+        self.histogram = np.zeros(HISTOGRAM_BINS, dtype=np.int64)
+
+    def add(self, batch):
+        """Agrega los resultados de un lote de simulate_trials_numpy"""
+        has_sample = batch['sample_size'] > 0
+        error_rates = batch['error_rate'][has_sample]
+        
+        self.done += len(batch['sifted_length'])
+        self.detected += int(np.count_nonzero(batch['detected']))
+        self.no_sample += int(np.count_nonzero(~has_sample))
+        self.error_rate_sum += float(error_rates.sum())
+        self.sifted_sum += int(batch['sifted_length'].sum())
+        self.final_sum += int(batch['final_length'].sum())
+        # El QBER muestral es múltiplo de 1/sample_size y suele caer justo en un
+        # borde; el margen evita que el redondeo lo mande al intervalo anterior
+        bins = np.minimum((error_rates * HISTOGRAM_BINS + 1e-9).astype(np.int64), HISTOGRAM_BINS - 1)
+        self.histogram += np.bincount(bins, minlength=HISTOGRAM_BINS)
+
+    def summary(self):
+        """
+        Estadísticas acumuladas hasta el momento
+        
+        Returns:
+            dict: Tasa de detección, promedios e histograma de QBER
+        """
+        with_sample = self.done - self.no_sample
+        return {
+            'key_length': self.key_length,
+            'has_eve': self.has_eve,
+            'trials': self.trials,
+            'trials_done': self.done,
+            'detection_rate': self.detected / self.done if self.done else 0.0,
+            'mean_error_rate': self.error_rate_sum / with_sample if with_sample else None,
+            'mean_sifted_length': self.sifted_sum / self.done if self.done else 0.0,
+            'mean_final_length': self.final_sum / self.done if self.done else 0.0,
+            'trials_without_sample': self.no_sample,
+            'qber_histogram': {
+                'edges': [round(edge, 4) for edge in HISTOGRAM_EDGES.tolist()],
+                'counts': self.histogram.tolist()
+            }
+        }
+
+
+def stream_experiment(user_id, key_length, has_eve, trials, seed=None):
+    """
+    Ejecuta un experimento Monte-Carlo y va informando el progreso
+    Cada lote produce un evento 'progress' con las estadísticas acumuladas;
+    al final se guarda un único resumen y se produce un evento 'summary'
+    
+    Args:
+        user_id (int): ID del usuario (None si se ejecuta por línea de comandos)
+        key_length (int): Longitud de la clave inicial de cada ensayo
+        has_eve (bool): Si hay espía o no
+        trials (int): Cantidad de ensayos
+        seed (int, optional): Semilla para reproducir el experimento
+    
+    Yields:
+        dict: Eventos con 'event' ('progress', 'summary' o 'error') y sus datos
+    """
+    error = validate_experiment(key_length, trials, seed)
+    if error:
+        yield dict(error, event='error')
+        return
+    
+    rng = np.random.default_rng(seed)
+    accumulator = ExperimentAccumulator(key_length, bool(has_eve), trials)
+    batch_trials = max(1, BATCH_QUBITS // key_length)
+    
+    while accumulator.done < trials:
+        size = min(batch_trials, trials - accumulator.done)
+        accumulator.add(simulate_trials_numpy(key_length, bool(has_eve), size, rng))
+        yield dict(accumulator.summary(), event='progress')
+    
+    summary = accumulator.summary()
+    experiment = experiment_repository.create_experiment(
+        user_id=user_id,
+        key_length=key_length,
+        has_eve=bool(has_eve),
+        trials=trials,
+        detection_rate=summary['detection_rate'],
+        mean_error_rate=summary['mean_error_rate'],
+        mean_sifted_length=summary['mean_sifted_length'],
+        mean_final_length=summary['mean_final_length'],
+        qber_histogram=summary['qber_histogram']
+    )
+    
+    yield dict(summary, event='summary', success=True, experiment_id=experiment.id)
+
+
+def run_experiment(user_id, key_length, has_eve, trials, seed=None):
+    """
+    Ejecuta un experimento completo y devuelve solo el resultado final
+    
+    Args:
+        user_id (int): ID del usuario (None si se ejecuta por línea de comandos)
+        key_length (int): Longitud de la clave inicial de cada ensayo
+        has_eve (bool): Si hay espía o no
+        trials (int): Cantidad de ensayos
+        seed (int, optional): Semilla para reproducir el experimento
+    
+    Returns:
+        dict: Último evento del experimento ('summary' o 'error')
+    """
+    last = None
+    for last in stream_experiment(user_id, key_length, has_eve, trials, seed):
+        pass
+    return last
+
+
+def get_user_experiments(user_id, limit=10):
+    """
+    Obtiene los experimentos guardados de un usuario
+    
+    Args:
+        user_id (int): ID del usuario
+        limit (int): Número máximo de resultados
+    
+    Returns:
+        list: Lista de resúmenes en formato diccionario
+    """
+    return [experiment.to_dict() for experiment in experiment_repository.get_user_experiments(user_id, limit)]
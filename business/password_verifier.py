@@ -0,0 +1,109 @@
+"""
+Capa de Negocio - Verificación de Contraseñas Acotada
+Ejecuta la verificación de contraseñas (scrypt/pbkdf2, costosa en CPU) en un
+pool de hilos chico y con cupo limitado de verificaciones pendientes, para que
+una ráfaga de inicios de sesión no deje sin CPU al resto de las peticiones
+(por ejemplo, las simulaciones). Si el cupo está lleno, la verificación se
+rechaza de inmediato en lugar de esperar
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from datos import user_repository
+
+
+class PasswordVerifier:
+    """
+    Pool acotado de verificación de contraseñas
+    Sin init_app verifica en el hilo que llama
+    """
+
+    def __init__(self, app=None):
+        self.executor = None
+        self.max_workers = 2
+        self.max_pending = 16
+        self.timeout = 10.0
+        self.slots = None
+        self.lock = threading.Lock()
+        self.stats = {'verified': 0, 'rejected': 0, 'rehashed': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Configura el pool a partir de la configuración de la aplicación
+
+        Args:
+            app (Flask): Aplicación con PASSWORD_VERIFY_WORKERS, PASSWORD_VERIFY_QUEUE
+                y PASSWORD_VERIFY_TIMEOUT
+        """
+        self.max_workers = app.config.get('PASSWORD_VERIFY_WORKERS', self.max_workers)
+        self.max_pending = app.config.get('PASSWORD_VERIFY_QUEUE', self.max_pending)
+        self.timeout = app.config.get('PASSWORD_VERIFY_TIMEOUT', self.timeout)
+        self.slots = threading.BoundedSemaphore(self.max_pending)
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='password-verify')
+        app.extensions['password_verifier'] = self
+
+    def verify(self, password_hash, password):
+        """
+        Verifica una contraseña en el pool
+        Regla de negocio: si ya hay max_pending verificaciones en curso o la
+        espera supera timeout segundos, se rechaza
+
+        Args:
+            password_hash (str): Hash guardado del usuario
+            password (str): Contraseña en texto plano
+
+        Returns:
+            tuple: (bool si coincide, hash nuevo o None), o None si se rechazó por carga
+        """
+        if self.executor is None:
+            return self._record(user_repository.check_password_hash(password_hash, password))
+
+        if not self.slots.acquire(blocking=False):
+            return self._reject()
+
+        try:
+            future = self.executor.submit(user_repository.check_password_hash, password_hash, password)
+        except RuntimeError:
+            self.slots.release()
+            return self._reject()
+        # El cupo se libera cuando termina el cálculo, aunque la petición ya no espere
+        future.add_done_callback(lambda _: self.slots.release())
+
+        try:
+            return self._record(future.result(timeout=self.timeout))
+        except TimeoutError:
+            return self._reject()
+
+    def metrics(self):
+        """
+        Métricas del pool
+
+        Returns:
+            dict: 'verified', 'rejected' y 'rehashed'
+        """
+        with self.lock:
+            return dict(self.stats)
+
+    def shutdown(self):
+        """Detiene el pool esperando las verificaciones en curso"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+    def _record(self, outcome):
+        with self.lock:
+            self.stats['verified'] += 1
+            if outcome[1] is not None:
+                self.stats['rehashed'] += 1
+        return outcome
+
+    def _reject(self):
+        with self.lock:
+            self.stats['rejected'] += 1
+        return None
+
+
+# Instancia compartida, se configura con password_verifier.init_app(app)
+password_verifier = PasswordVerifier()
@@ -0,0 +1,212 @@
+"""
+Capa de Negocio - Control de Admisión de Simulaciones
+Limita las simulaciones con un token bucket por usuario, donde cada
+simulación cuesta key_length × (1 + has_eve) unidades ponderadas por backend.
+Las síncronas (/api/run-simulation) además tienen un tope global de
+simulaciones simultáneas para que no ocupen todos los workers; las encoladas
+(/api/simulations) y los experimentos solo pagan las fichas, porque su
+concurrencia ya la acota la cola o el presupuesto de qubits.
+Los buckets se guardan en un almacén intercambiable (RATE_LIMIT_STORE): por
+defecto en memoria del proceso; cualquier objeto con el mismo método take
+(por ejemplo, uno respaldado por un servicio compartido) lo reemplaza
+"""
+import math
+import threading
+import time
+
+
+# Peso del costo por backend: el analítico de NumPy no ejecuta trabajos de Aer
+BACKEND_COST_WEIGHT = {
+    'qiskit': 1.0,
+    'qiskit_batch': 1.0,
+    'qiskit_parallel': 1.0,
+    'numpy': 0.01,
+}
+
+
+class MemoryBucketStore:
+    """
+    Almacén de token buckets en memoria del proceso
+    Con varios procesos cada uno tiene sus propios buckets
+    """
+
+    def __init__(self, max_keys=10000):
+        self.buckets = {}
+        self.max_keys = max_keys
+        self.lock = threading.Lock()
+
+    def take(self, key, cost, capacity, refill_rate, now):
+        """
+        Descuenta cost fichas del bucket de key si alcanzan
+
+        Args:
+            key (str): Identificador del bucket
+            cost (float): Fichas a descontar (como máximo capacity)
+            capacity (float): Fichas de un bucket lleno
+            refill_rate (float): Fichas que se recuperan por segundo
+            now (float): Momento actual en segundos
+
+        Returns:
+            tuple: (True, 0) si se admitió, o (False, segundos hasta tener cost fichas)
+        """
+        with self.lock:
+            tokens, updated_at = self.buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + max(0.0, now - updated_at) * refill_rate)
+
+            if tokens >= cost:
+                self.buckets[key] = (tokens - cost, now)
+                allowed, retry_after = True, 0.0
+            else:
+                self.buckets[key] = (tokens, now)
+                allowed, retry_after = False, (cost - tokens) / refill_rate
+
+            if len(self.buckets) > self.max_keys:
+                self._purge_full(capacity, refill_rate, now)
+            return allowed, retry_after
+
+    def _purge_full(self, capacity, refill_rate, now):
+        """Descarta los buckets que ya se llenaron (equivalen a uno nuevo)"""
+        full = [key for key, (tokens, updated_at) in self.buckets.items()
+                if tokens + (now - updated_at) * refill_rate >= capacity]
+        for key in full:
+            del self.buckets[key]
+
+
+class SimulationAdmission:
+    """
+    Admisión de simulaciones: token bucket por usuario y tope global de las síncronas
+    Desactivada salvo que RATE_LIMIT_ENABLED sea True
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.capacity = 4000.0
+        self.refill_rate = 40.0
+        self.max_concurrent = 4
+        self.store = MemoryBucketStore()
+        self.clock = time.time
+        self.slots = threading.BoundedSemaphore(self.max_concurrent)
+        self.lock = threading.Lock()
+        self.stats = {'admitted': 0, 'rate_limited': 0, 'busy': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Configura la admisión a partir de la configuración de la aplicación
+
+        Args:
+            app (Flask): Aplicación con RATE_LIMIT_ENABLED, RATE_LIMIT_CAPACITY,
+                RATE_LIMIT_REFILL, SIMULATION_MAX_CONCURRENT y RATE_LIMIT_STORE
+        """
+        self.enabled = app.config.get('RATE_LIMIT_ENABLED', self.enabled)
+        self.capacity = float(app.config.get('RATE_LIMIT_CAPACITY', self.capacity))
+        self.refill_rate = float(app.config.get('RATE_LIMIT_REFILL', self.refill_rate))
+        self.max_concurrent = app.config.get('SIMULATION_MAX_CONCURRENT', self.max_concurrent)
+        self.store = app.config.get('RATE_LIMIT_STORE') or MemoryBucketStore()
+        self.slots = threading.BoundedSemaphore(self.max_concurrent)
+        app.extensions['simulation_admission'] = self
+
+    def cost(self, key_length, has_eve, backend):
+        """
+        Costo de una simulación: key_length × (1 + has_eve), ponderado por backend
+        Nunca supera la capacidad del bucket, para que siempre pueda admitirse
+        esperando lo suficiente
+
+        Returns:
+            float: Fichas que consume la simulación
+        """
+        try:
+            qubits = max(int(key_length), 1)
+        except (TypeError, ValueError):
+            qubits = 1
+        weight = BACKEND_COST_WEIGHT.get(backend, 1.0)
+        return min(qubits * (1 + bool(has_eve)) * weight, self.capacity)
+
+    def acquire(self, user_id, key_length, has_eve, backend):
+        """
+        Intenta admitir una simulación síncrona
+        Regla de negocio: se rechaza si ya hay max_concurrent simulaciones en
+        curso ('busy') o si el usuario no tiene fichas suficientes ('rate_limited').
+        Si se admite, el llamador debe llamar a release() al terminar
+
+        Args:
+            user_id (int): ID del usuario
+            key_length (int): Longitud de la clave inicial
+            has_eve (bool): Si incluye un espía
+            backend (str): Backend de simulación
+
+        Returns:
+            dict: 'success', o 'success', 'reason', 'message' y 'retry_after' (segundos)
+        """
+        if not self.enabled:
+            return {'success': True}
+
+        if not self.slots.acquire(blocking=False):
+            self._count('busy')
+            return {
+                'success': False,
+                'reason': 'busy',
+                'message': 'El simulador está ocupado, intenta nuevamente en unos segundos',
+                'retry_after': 1
+            }
+
+        result = self.charge(user_id, key_length, has_eve, backend)
+        if not result['success']:
+            self.slots.release()
+        return result
+
+    def charge(self, user_id, key_length, has_eve, backend):
+        """
+        Descuenta las fichas de una simulación sin ocupar el tope global
+        Se usa para las simulaciones encoladas y los experimentos; el llamador
+        debe validar los parámetros antes, para no cobrar pedidos inválidos
+
+        Args:
+            user_id (int): ID del usuario
+            key_length (int): Qubits a simular (longitud de clave, o ensayos × longitud)
+            has_eve (bool): Si incluye un espía
+            backend (str): Backend de simulación
+
+        Returns:
+            dict: 'success', o 'success', 'reason', 'message' y 'retry_after' (segundos)
+        """
+        if not self.enabled:
+            return {'success': True}
+
+        allowed, retry_after = self.store.take(f'user:{user_id}', self.cost(key_length, has_eve, backend),
+                                               self.capacity, self.refill_rate, self.clock())
+        if not allowed:
+            self._count('rate_limited')
+            return {
+                'success': False,
+                'reason': 'rate_limited',
+                'message': 'Superaste el límite de simulaciones, intenta nuevamente más tarde',
+                'retry_after': max(1, math.ceil(retry_after))
+            }
+
+        self._count('admitted')
+        return {'success': True}
+
+    def release(self):
+        """Libera el lugar de una simulación admitida con acquire()"""
+        if self.enabled:
+            self.slots.release()
+
+    def metrics(self):
+        """
+        Métricas de admisión
+
+        Returns:
+            dict: 'admitted', 'rate_limited' y 'busy'
+        """
+        with self.lock:
+            return dict(self.stats)
+
+    def _count(self, outcome):
+        with self.lock:
+            self.stats[outcome] += 1
+
+
+# Instancia compartida, se configura con simulation_admission.init_app(app)
+simulation_admission = SimulationAdmission()
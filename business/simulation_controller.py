@@ -3,7 +3,101 @@ Capa de Negocio - Controlador de Simulación
 Contiene la lógica de negocio del protocolo BB84
 NO accede directamente a la base de datos, usa la capa de datos
 """
-from datos import session_repository
+import base64
+import binascii
+import numbers
+import secrets
+from datetime import datetime
+
+from business.bb84_channel import channel_to_dict, normalize_channel
+from business.rate_limiter import simulation_admission
+from datos import session_repository, stats_repository
+
+
+# Backend usado cuando el cliente no elige uno: todos los qubits en un único trabajo de Aer
+DEFAULT_BACKEND = 'qiskit_batch'
+
+# Longitud máxima de clave admitida por cada backend
+# El backend analítico de NumPy no construye circuitos y escala a millones de qubits;
+# el paralelo reparte bloques de qubits entre varios procesos
+MAX_KEY_LENGTH = {
+    'qiskit': 1000,
+    'qiskit_batch': 1000,
+    'numpy': 1000000,
+    'qiskit_parallel': 100000,
+}
+
+
+# Backends que admiten un canal ruidoso (el paralelo solo simula el canal ideal)
+NOISY_BACKENDS = ('qiskit', 'qiskit_batch', 'numpy')
+
+
+# Semillas admitidas (enteros de 63 bits, caben en la columna seed)
+MAX_SEED = 2**63 - 1
+
+# Longitud máxima de clave cuyos resultados se memorizan (las claves largas ocupan mucha memoria)
+MAX_CACHED_KEY_LENGTH = 10000
+
+
+# Tamaño de página del historial
+HISTORY_PAGE_SIZE = 20
+MAX_HISTORY_PAGE_SIZE = 100
+
+
+def encode_history_cursor(session):
+    """Cursor opaco que apunta después de la sesión dada"""
+    raw = f"{session['timestamp'].isoformat()}|{session['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode('ascii')
+
+
+def decode_history_cursor(cursor):
+    """
+    Decodifica un cursor de encode_history_cursor
+    
+    Returns:
+        tuple: (timestamp, id), o None si el cursor no es válido
+    """
+    try:
+        timestamp, session_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode().split('|')
+        return datetime.fromisoformat(timestamp), int(session_id)
+    except (ValueError, UnicodeError, binascii.Error):
+        return None
+
+
+def get_user_history_page(user_id, limit=HISTORY_PAGE_SIZE, cursor=None):
+    """
+    Obtiene una página del historial de simulaciones de un usuario
+    Regla de negocio: la página tiene entre 1 y MAX_HISTORY_PAGE_SIZE sesiones
+    
+    Args:
+        user_id (int): ID del usuario
+        limit (int): Sesiones por página
+        cursor (str, optional): Cursor 'next_cursor' de la página anterior
+    
+    Returns:
+        dict: 'success', 'sessions' y 'next_cursor' (None en la última página)
+    """
+    before = None
+    if cursor:
+        before = decode_history_cursor(cursor)
+        if before is None:
+            return {
+                'success': False,
+                'message': 'Cursor de historial inválido'
+            }
+    
+    limit = max(1, min(limit, MAX_HISTORY_PAGE_SIZE))
+    sessions, has_more = session_repository.get_user_session_page(user_id, limit, before)
+    next_cursor = encode_history_cursor(sessions[-1]) if has_more else None
+    
+    for session in sessions:
+        session['timestamp'] = session['timestamp'].isoformat(sep=' ', timespec='seconds')
+    
+    return {
+        'success': True,
+        'sessions': sessions,
+        'next_cursor': next_cursor
+    }
 
 
 def get_user_simulation_history(user_id, limit=10):
@@ -17,14 +111,14 @@ def get_user_simulation_history(user_id, limit=10):
     Returns:
         list: Lista de sesiones en formato diccionario
     """
-    sessions = session_repository.get_user_sessions(user_id, limit)
-    return [session.to_dict() for session in sessions]
+    return get_user_history_page(user_id, limit)['sessions']
 
 
 def get_user_statistics(user_id):
     """
     Obtiene estadísticas de las simulaciones de un usuario
-    Regla de negocio: Calcula métricas agregadas
+    Regla de negocio: Calcula métricas agregadas a partir del resumen que se
+    mantiene al guardar cada sesión (una lectura por clave primaria)
     
     Args:
         user_id (int): ID del usuario
@@ -32,59 +126,161 @@ def get_user_statistics(user_id):
     Returns:
         dict: Estadísticas del usuario
     """
-    sessions = session_repository.get_user_sessions(user_id)
+    stats = stats_repository.get_user_stats(user_id)
     
-    if not sessions:
+    if stats is None or stats.total_simulations == 0:
         return {
             'total_simulations': 0,
             'secure_simulations': 0,
             'compromised_simulations': 0,
-            'success_rate': 0.0
+            'success_rate': 0.0,
+            'average_error_rate': None,
+            'error_rate_std': None,
+            'last_run_at': None
         }
     
-    total = len(sessions)
-    secure = sum(1 for s in sessions if s.result == 'secure')
-    compromised = total - secure
+    data = stats.to_dict()
+    total = data['total_simulations']
+    secure = data['secure_simulations']
     
     return {
         'total_simulations': total,
         'secure_simulations': secure,
-        'compromised_simulations': compromised,
-        'success_rate': round((secure / total) * 100, 2) if total > 0 else 0.0
+        'compromised_simulations': data['compromised_simulations'],
+        'success_rate': round((secure / total) * 100, 2),
+        'average_error_rate': data['average_error_rate'],
+        'error_rate_std': data['error_rate_std'],
+        'last_run_at': data['last_run_at']
     }
 
 
-def run_bb84_simulation(user_id, key_length, has_eve):
+def rebuild_statistics():
     """
-    Ejecuta la simulación completa del protocolo BB84 con Qiskit
+    Reconstruye las estadísticas de todos los usuarios desde sus sesiones
+    
+    Returns:
+        int: Cantidad de usuarios con estadísticas
+    """
+    return stats_repository.rebuild_user_stats()
+
+
+def check_statistics():
+    """
+    Verifica que las estadísticas guardadas coincidan con las sesiones
+    
+    Returns:
+        list: Diferencias encontradas (vacía si todo es consistente)
+    """
+    return stats_repository.check_user_stats()
+
+
+def validate_simulation(key_length, backend=DEFAULT_BACKEND, seed=None, channel=None, post_processing=False,
+                        has_eve=False):
+    """
+    Valida los parámetros de una simulación
+    Regla de negocio: backend soportado, longitud entre 10 bits y el máximo
+    del backend, semilla entre 0 y 2^63-1, canal válido y admitido por el
+    backend, y post_processing y has_eve booleanos
     
     Args:
-        user_id (int): ID del usuario que ejecuta la simulación
         key_length (int): Longitud de la clave inicial
+        backend (str): Modo de ejecución de la simulación
+        seed (int, optional): Semilla de la simulación
+        channel (dict, optional): Canal ruidoso de la simulación
+        post_processing (bool): Si se reconcilia y amplifica la clave
         has_eve (bool): Si incluir un espía o no
     
     Returns:
-        dict: Resultado de la simulación
+        dict: Resultado con 'success' y 'message' si hay error, None si es válido
     """
-    # Validaciones de negocio
-    if key_length < 10:
+    if backend not in MAX_KEY_LENGTH:
+        return {
+            'success': False,
+            'message': f'Backend de simulación no soportado: {backend}'
+        }
+    
+    if not isinstance(key_length, numbers.Integral) or key_length < 10:
         return {
             'success': False,
             'message': 'La longitud de la clave debe ser al menos 10 bits'
         }
     
-    if key_length > 1000:
+    max_length = MAX_KEY_LENGTH[backend]
+    if key_length > max_length:
         return {
             'success': False,
-            'message': 'La longitud de la clave no puede exceder 1000 bits'
+            'message': f'La longitud de la clave no puede exceder {max_length} bits con el backend {backend}'
+        }
+    
+    if seed is not None and (isinstance(seed, bool) or not isinstance(seed, int) or not 0 <= seed <= MAX_SEED):
+        return {
+            'success': False,
+            'message': 'La semilla debe ser un entero entre 0 y 2^63-1'
         }
     
     try:
-        # Importar la simulación BB84
-        from business.bb84_simulation import simulate_bb84
-        
+        channel = normalize_channel(channel)
+    except ValueError as e:
+        return {
+            'success': False,
+            'message': str(e)
+        }
+    
+    if not isinstance(post_processing, bool):
+        return {
+            'success': False,
+            'message': 'post_processing debe ser true o false'
+        }
+    
+    if not isinstance(has_eve, bool):
+        return {
+            'success': False,
+            'message': 'has_eve debe ser true o false'
+        }
+    
+    if channel is not None and backend not in NOISY_BACKENDS:
+        return {
+            'success': False,
+            'message': f'El backend {backend} no admite canales ruidosos'
+        }
+    
+    return None
+
+
+def run_bb84_simulation(user_id, key_length, has_eve, backend=DEFAULT_BACKEND, seed=None, channel=None,
+                        post_processing=False):
+    """
+    Ejecuta la simulación completa del protocolo BB84 con Qiskit
+    Regla de negocio: toda sesión guarda su semilla, su backend, su canal y
+    si se post-procesó, así se puede reproducir después con replay_simulation
+    
+    Args:
+        user_id (int): ID del usuario que ejecuta la simulación
+        key_length (int): Longitud de la clave inicial
+        has_eve (bool): Si incluir un espía o no
+        backend (str): Modo de ejecución de la simulación ('qiskit', 'qiskit_batch',
+            'qiskit_parallel' o 'numpy')
+        seed (int, optional): Semilla (0 a 2^63-1); si no se indica se sortea una
+        channel (dict, optional): Canal ruidoso con 'depolarizing', 'bit_flip'
+            y 'loss' (probabilidades entre 0 y 1); None es el canal ideal
+        post_processing (bool): Si la clave segura pasa por Cascade y la
+            amplificación de privacidad
+    
+    Returns:
+        dict: Resultado de la simulación
+    """
+    # Validaciones de negocio
+    error = validate_simulation(key_length, backend, seed, channel, post_processing, has_eve)
+    if error:
+        return error
+    
+    if seed is None:
+        seed = secrets.randbelow(MAX_SEED + 1)
+    channel = normalize_channel(channel)
+    
+    try:
         # Ejecutar la simulación cuántica
-        sim_result = simulate_bb84(key_length, has_eve)
+        sim_result = _simulate(key_length, has_eve, backend, seed, channel, post_processing)
         
         if not sim_result['success']:
             return sim_result
@@ -96,27 +292,104 @@ def run_bb84_simulation(user_id, key_length, has_eve):
             has_eve=has_eve,
             result=sim_result['result'],
             final_key=sim_result.get('final_key'),
-            error_rate=sim_result.get('error_rate')
+            error_rate=sim_result.get('error_rate'),
+            seed=seed,
+            backend=backend,
+            channel=channel_to_dict(channel) if channel is not None else None,
+            post_processed=post_processing
         )
         
+        return _simulation_response(sim_result, session.to_dict(include_key=True))
+    
+    except Exception as e:
         return {
-            'success': True,
-            'message': sim_result['message'],
-            'session': session.to_dict(),
-            'alice_bits': sim_result.get('alice_bits', []),
-            'bob_bits': sim_result.get('bob_bits', []),
-            'eve_bits': sim_result.get('eve_bits', []),
-            'simulation_details': {
-                'key_length_initial': sim_result.get('key_length_initial'),
-                'key_length_after_sifting': sim_result.get('key_length_after_sifting'),
-                'key_length_final': sim_result.get('key_length_final'),
-                'matching_bases': sim_result.get('matching_bases'),
-                'error_rate': sim_result.get('error_rate')
-            }
+            'success': False,
+            'message': f'Error en la simulación: {str(e)}'
+        }
+
+
+def replay_simulation(session_id, user_id):
+    """
+    Reproduce una sesión guardada con su semilla, sin guardar una nueva
+    Las sesiones de hasta MAX_CACHED_KEY_LENGTH qubits se sirven desde la
+    caché de resultados, así que repetirlas (por ejemplo, en la animación)
+    no vuelve a simular. Como las más largas sí se simulan de nuevo, la
+    reproducción pasa por la misma admisión que /api/run-simulation
+    
+    Args:
+        session_id (int): ID de la sesión
+        user_id (int): ID del usuario que la consulta
+    
+    Returns:
+        dict: Resultado de la simulación, igual al de run_bb84_simulation, o
+            'success', 'reason' y 'message' si no se puede reproducir ('retry_after'
+            si la admisión la rechazó)
+    """
+    session = session_repository.get_session_by_id(session_id)
+    if session is None or session.user_id != user_id:
+        return {
+            'success': False,
+            'reason': 'not_found',
+            'message': 'Sesión no encontrada'
         }
     
+    if session.seed is None or session.backend is None:
+        return {
+            'success': False,
+            'reason': 'not_replayable',
+            'message': 'La sesión es anterior a las simulaciones reproducibles y no tiene semilla'
+        }
+    
+    admission = simulation_admission.acquire(user_id, session.key_length, session.has_eve, session.backend)
+    if not admission['success']:
+        return admission
+    
+    try:
+        sim_result = _simulate(session.key_length, session.has_eve, session.backend, session.seed,
+                               normalize_channel(session.channel), bool(session.post_processed))
     except Exception as e:
         return {
             'success': False,
             'message': f'Error en la simulación: {str(e)}'
         }
+    finally:
+        simulation_admission.release()
+    
+    response = _simulation_response(sim_result, session.to_dict(include_key=True))
+    response['replayed'] = True
+    return response
+
+
+def _simulate(key_length, has_eve, backend, seed, channel=None, post_processing=False):
+    """Ejecuta la simulación con semilla, pasando por la caché si la clave es chica"""
+    from business.bb84_simulation import simulate_bb84, simulate_bb84_cached
+    
+    if key_length <= MAX_CACHED_KEY_LENGTH:
+        return simulate_bb84_cached(key_length, has_eve, backend, seed, channel, post_processing)
+    return simulate_bb84(key_length, has_eve, backend=backend, seed=seed, channel=channel,
+                         post_processing=post_processing)
+
+
+def _simulation_response(sim_result, session):
+    """Respuesta de la API a partir del resultado de la simulación y la sesión"""
+    return {
+        'success': True,
+        'message': sim_result['message'],
+        'session': session,
+        'alice_bits': sim_result.get('alice_bits', []),
+        'bob_bits': sim_result.get('bob_bits', []),
+        'eve_bits': sim_result.get('eve_bits', []),
+        'simulation_details': {
+            'key_length_initial': sim_result.get('key_length_initial'),
+            'key_length_after_sifting': sim_result.get('key_length_after_sifting'),
+            'key_length_final': sim_result.get('key_length_final'),
+            'matching_bases': sim_result.get('matching_bases'),
+            'error_rate': sim_result.get('error_rate'),
+            'sample_size': sim_result.get('sample_size'),
+            'qber_interval': sim_result.get('qber_interval'),
+            'qubits_received': sim_result.get('qubits_received', sim_result.get('key_length_initial')),
+            'qubits_lost': sim_result.get('qubits_lost', 0),
+            'post_processing': sim_result.get('post_processing'),
+            'secret_key_rate': sim_result.get('secret_key_rate')
+        }
+    }
@@ -0,0 +1,174 @@
+"""
+Capa de Negocio - Cola de Simulaciones Asíncronas
+Ejecuta run_bb84_simulation en un pool de hilos local para no bloquear la
+petición HTTP. Cada trabajo recibe un ID que se consulta luego para conocer
+su estado y obtener el resultado
+"""
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from business import simulation_controller
+
+
+# Estados posibles de un trabajo
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class SimulationJobQueue:
+    """
+    Cola acotada de simulaciones BB84
+    Limita la cantidad total de trabajos pendientes y la cantidad de trabajos
+    activos por usuario, para que un solo usuario no acapare el pool
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.executor = None
+        self.jobs = {}
+        self.lock = threading.Lock()
+        self.max_workers = 2
+        self.max_queue = 32
+        self.max_per_user = 2
+        self.job_ttl = 600
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Configura la cola a partir de la configuración de la aplicación
+
+        Args:
+            app (Flask): Aplicación cuyo contexto se usa al ejecutar los trabajos
+        """
+        self.app = app
+        self.max_workers = app.config.get('SIMULATION_WORKERS', self.max_workers)
+        self.max_queue = app.config.get('SIMULATION_QUEUE_SIZE', self.max_queue)
+        self.max_per_user = app.config.get('SIMULATION_JOBS_PER_USER', self.max_per_user)
+        self.job_ttl = app.config.get('SIMULATION_JOB_TTL', self.job_ttl)
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='bb84-job')
+        app.extensions['simulation_jobs'] = self
+
+    def submit(self, user_id, key_length, has_eve, backend=simulation_controller.DEFAULT_BACKEND, seed=None,
+               channel=None, post_processing=False, charge=None):
+        """
+        Encola una simulación y devuelve su ID sin esperar a que termine
+        Regla de negocio: se rechaza si la cola está llena o si el usuario ya
+        tiene el máximo de trabajos activos. El cobro (charge) se hace recién
+        cuando la cola acepta el trabajo, así un rechazo no gasta fichas
+
+        Args:
+            user_id (int): ID del usuario que ejecuta la simulación
+            key_length (int): Longitud de la clave inicial
+            has_eve (bool): Si incluir un espía o no
+            backend (str): Backend de simulación
+            seed (int, optional): Semilla de la simulación
+            channel (dict, optional): Canal ruidoso de la simulación
+            post_processing (bool): Si se reconcilia y amplifica la clave
+            charge (callable, optional): Cobro de la admisión; devuelve un dict
+                con 'success' y, si falla, se devuelve tal cual sin encolar
+
+        Returns:
+            dict: 'success' y 'job_id', o 'success', 'reason' y 'message' si se rechazó
+        """
+        with self.lock:
+            self._purge_expired()
+            active = [job for job in self.jobs.values() if job['status'] in (QUEUED, RUNNING)]
+
+            if len(active) >= self.max_queue:
+                return {
+                    'success': False,
+                    'reason': 'queue_full',
+                    'message': 'El simulador está ocupado, intenta nuevamente en unos segundos'
+                }
+
+            if sum(1 for job in active if job['user_id'] == user_id) >= self.max_per_user:
+                return {
+                    'success': False,
+                    'reason': 'user_limit',
+                    'message': f'Ya tienes {self.max_per_user} simulaciones en curso'
+                }
+
+            if charge is not None:
+                admission = charge()
+                if not admission['success']:
+                    return admission
+
+            job_id = uuid.uuid4().hex
+            self.jobs[job_id] = {
+                'id': job_id,
+                'user_id': user_id,
+                'status': QUEUED,
+                'result': None,
+                'created_at': time.time(),
+                'finished_at': None
+            }
+
+        self.executor.submit(self._run, job_id, user_id, key_length, has_eve, backend, seed, channel,
+                             post_processing)
+        return {'success': True, 'job_id': job_id, 'status': QUEUED}
+
+    def get_job(self, job_id, user_id):
+        """
+        Obtiene un trabajo del usuario
+
+        Args:
+            job_id (str): ID del trabajo
+            user_id (int): ID del usuario que lo consulta
+
+        Returns:
+            dict: Copia del trabajo, o None si no existe o es de otro usuario
+        """
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or job['user_id'] != user_id:
+                return None
+            return dict(job)
+
+    def pending_count(self):
+        """Cantidad de trabajos encolados o en ejecución"""
+        with self.lock:
+            return sum(1 for job in self.jobs.values() if job['status'] in (QUEUED, RUNNING))
+
+    def _run(self, job_id, user_id, key_length, has_eve, backend, seed=None, channel=None, post_processing=False):
+        """Ejecuta un trabajo dentro del contexto de la aplicación"""
+        self._update(job_id, status=RUNNING)
+        try:
+            with self.app.app_context():
+                result = simulation_controller.run_bb84_simulation(
+                    user_id=user_id,
+                    key_length=key_length,
+                    has_eve=has_eve,
+                    backend=backend,
+                    seed=seed,
+                    channel=channel,
+                    post_processing=post_processing
+                )
+            status = DONE if result.get('success') else FAILED
+        except Exception as e:
+            result = {'success': False, 'message': f'Error en la simulación: {str(e)}'}
+            status = FAILED
+        self._update(job_id, status=status, result=result, finished_at=time.time())
+
+    def _update(self, job_id, **fields):
+        with self.lock:
+            if job_id in self.jobs:
+                self.jobs[job_id].update(fields)
+
+    def _purge_expired(self):
+        """Descarta los trabajos terminados hace más de job_ttl segundos"""
+        limit = time.time() - self.job_ttl
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job['finished_at'] is not None and job['finished_at'] < limit
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
+
+
+# Instancia compartida, se configura con job_queue.init_app(app)
+job_queue = SimulationJobQueue()
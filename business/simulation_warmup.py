@@ -0,0 +1,145 @@
+"""
+Capa de Negocio - Precalentamiento de Backends de Simulación
+Carga y prepara solo los backends configurados (SIMULATION_WARMUP_BACKENDS)
+al arrancar el worker, para que la primera petición no pague el import de
+Qiskit ni la inicialización de Aer.
+SIMULATION_WARMUP elige cuándo:
+    'background'  en un hilo al iniciar la aplicación (por defecto)
+    'sync'        antes de terminar de iniciar la aplicación
+    'off'         nunca (la primera simulación de cada backend lo prepara)
+Con un servidor que hace fork (por ejemplo gunicorn con preload_app), el
+proceso maestro puede llamar a preload_backends en su hook previo al fork
+(solo importa módulos, que se comparten con los workers) y cada worker
+llamar a start_warm_up después del fork: los hilos de Aer no sobreviven al fork
+"""
+import importlib
+import threading
+
+from business import simulation_controller
+
+
+# Módulo que implementa cada backend
+BACKEND_MODULES = {
+    'qiskit': 'business.bb84_simulation',
+    'qiskit_batch': 'business.bb84_simulation',
+    'qiskit_parallel': 'business.bb84_simulation',
+    'numpy': 'business.bb84_numpy',
+}
+
+WARMUP_MODES = ('background', 'sync', 'off')
+
+_state = {'thread': None, 'timings': {}, 'error': None}
+_ready = threading.Event()
+
+
+def configured_backends(config):
+    """
+    Backends a preparar según la configuración
+
+    Args:
+        config (dict): Configuración con SIMULATION_WARMUP_BACKENDS (lista o
+            texto separado por comas); por defecto, el backend por defecto
+
+    Returns:
+        list: Backends válidos, sin repetir
+    """
+    backends = config.get('SIMULATION_WARMUP_BACKENDS') or [simulation_controller.DEFAULT_BACKEND]
+    if isinstance(backends, str):
+        backends = [backend.strip() for backend in backends.split(',') if backend.strip()]
+    return [backend for backend in dict.fromkeys(backends) if backend in BACKEND_MODULES]
+
+
+def preload_backends(backends):
+    """
+    Importa los módulos de los backends sin inicializar Aer
+    Es seguro antes de un fork
+
+    Args:
+        backends (list): Backends a importar
+    """
+    for backend in backends:
+        importlib.import_module(BACKEND_MODULES[backend])
+        if backend != 'numpy':
+            import qiskit
+            import qiskit_aer
+
+
+def warm_up_backends(backends):
+    """
+    Prepara los backends indicados (import, tablas de circuitos y una simulación chica)
+
+    Args:
+        backends (list): Backends a preparar
+
+    Returns:
+        dict: backend -> segundos que tomó prepararlo
+    """
+    from business.bb84_simulation import warm_up
+
+    timings = {}
+    for backend in backends:
+        timings[backend] = warm_up(backend)
+    return timings
+
+
+def start_warm_up(app):
+    """
+    Prepara los backends configurados según SIMULATION_WARMUP
+
+    Args:
+        app (Flask): Aplicación con SIMULATION_WARMUP y SIMULATION_WARMUP_BACKENDS
+
+    Returns:
+        threading.Thread: El hilo de preparación ('background'), o None
+    """
+    mode = app.config.get('SIMULATION_WARMUP', 'background')
+    if mode not in WARMUP_MODES:
+        raise ValueError(f'SIMULATION_WARMUP inválido: {mode}')
+
+    backends = configured_backends(app.config)
+    _ready.clear()
+    if mode == 'off' or not backends:
+        _ready.set()
+        return None
+    if mode == 'sync':
+        _run(backends)
+        return None
+
+    thread = threading.Thread(target=_run, args=(backends,), name='simulation-warmup', daemon=True)
+    _state['thread'] = thread
+    thread.start()
+    return thread
+
+
+def wait_until_ready(timeout=None):
+    """
+    Espera a que termine el precalentamiento
+
+    Args:
+        timeout (float, optional): Segundos máximos de espera
+
+    Returns:
+        bool: True si terminó
+    """
+    return _ready.wait(timeout)
+
+
+def warm_up_status():
+    """
+    Estado del precalentamiento
+
+    Returns:
+        dict: 'ready', 'timings' (backend -> segundos) y 'error' (o None)
+    """
+    return {'ready': _ready.is_set(), 'timings': dict(_state['timings']), 'error': _state['error']}
+
+
+def _run(backends):
+    """Prepara los backends y registra el resultado; un error no detiene la aplicación"""
+    try:
+        _state['timings'] = warm_up_backends(backends)
+        _state['error'] = None
+    except Exception as e:
+        _state['error'] = str(e)
+    finally:
+        _ready.set()
@@ -0,0 +1,110 @@
+"""
+Capa de Datos - Perfil del Motor de Base de Datos
+Con SQLite aplica PRAGMAs pensados para varios procesos escribiendo a la vez
+(WAL, synchronous=NORMAL, busy_timeout) al abrir cada conexión. Con una base
+de servidor (PostgreSQL, MySQL) configura un pool de conexiones
+"""
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+from datos import db
+
+
+# PRAGMAs por defecto de SQLite; se pueden cambiar con las claves SQLITE_* de la configuración
+SQLITE_PRAGMAS = {
+    # Lectores y escritor no se bloquean entre sí; solo los escritores se turnan
+    'journal_mode': 'WAL',
+    # Con WAL, NORMAL es seguro ante caídas del proceso y evita un fsync por commit
+    'synchronous': 'NORMAL',
+    # Espera (ms) antes de responder "database is locked" si otro escritor tiene el lock
+    'busy_timeout': 5000,
+    # Lectura por mmap de los primeros 256 MB de la base
+    'mmap_size': 268435456,
+    # Caché de páginas en KiB (valor negativo) por conexión
+    'cache_size': -65536,
+}
+
+# Pool para bases de servidor
+SERVER_POOL = {
+    'pool_size': 10,
+    'max_overflow': 20,
+    'pool_timeout': 30,
+    'pool_recycle': 1800,
+    'pool_pre_ping': True,
+}
+
+
+def is_sqlite(database_uri):
+    """Indica si la URI apunta a una base SQLite"""
+    return make_url(database_uri).get_backend_name() == 'sqlite'
+
+
+def get_sqlite_pragmas(config):
+    """
+    PRAGMAs de SQLite a aplicar con los valores de la configuración
+
+    Args:
+        config (dict): Configuración de la aplicación (claves SQLITE_JOURNAL_MODE,
+            SQLITE_SYNCHRONOUS, SQLITE_BUSY_TIMEOUT, SQLITE_MMAP_SIZE, SQLITE_CACHE_SIZE)
+
+    Returns:
+        dict: Nombre del PRAGMA -> valor
+    """
+    return {name: config.get(f'SQLITE_{name.upper()}', value) for name, value in SQLITE_PRAGMAS.items()}
+
+
+def build_engine_options(database_uri, config):
+    """
+    Opciones del motor (SQLALCHEMY_ENGINE_OPTIONS) para la base indicada
+
+    Args:
+        database_uri (str): URI de la base de datos
+        config (dict): Configuración de la aplicación (DB_PROFILE, DB_POOL_SIZE, DB_MAX_OVERFLOW)
+
+    Returns:
+        dict: Opciones para create_engine
+    """
+    if config.get('DB_PROFILE', 'tuned') != 'tuned':
+        return {}
+
+    if is_sqlite(database_uri):
+        if make_url(database_uri).database in (None, '', ':memory:'):
+            return {}
+        busy_timeout = int(get_sqlite_pragmas(config)['busy_timeout'])
+        return {
+            # Las conexiones se comparten entre los hilos del servidor y de la cola de simulaciones
+            'connect_args': {'timeout': busy_timeout / 1000, 'check_same_thread': False},
+            'pool_size': int(config.get('DB_POOL_SIZE', 5)),
+            'max_overflow': int(config.get('DB_MAX_OVERFLOW', 10)),
+        }
+
+    options = dict(SERVER_POOL)
+    options['pool_size'] = int(config.get('DB_POOL_SIZE', options['pool_size']))
+    options['max_overflow'] = int(config.get('DB_MAX_OVERFLOW', options['max_overflow']))
+    return options
+
+
+def configure_engine(app):
+    """
+    Aplica los PRAGMAs de SQLite a cada conexión nueva del motor de la aplicación
+    Se llama después de db.init_app(app)
+
+    Args:
+        app (Flask): Aplicación ya inicializada con db
+    """
+    if app.config.get('DB_PROFILE', 'tuned') != 'tuned':
+        return
+
+    pragmas = get_sqlite_pragmas(app.config)
+
+    with app.app_context():
+        engine = db.engine
+        if engine.dialect.name != 'sqlite':
+            return
+
+        @event.listens_for(engine, 'connect')
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name} = {value}')
+            cursor.close()
@@ -0,0 +1,77 @@
+"""
+Capa de Datos - Repositorio de Experimentos
+Contiene todas las operaciones de acceso a datos relacionadas con los
+resúmenes de experimentos Monte-Carlo
+"""
+import json
+
+from datos.models import ExperimentSummary, db
+
+
+def create_experiment(user_id, key_length, has_eve, trials, detection_rate, mean_error_rate,
+                      mean_sifted_length, mean_final_length, qber_histogram):
+    """
+    Guarda el resumen de un experimento en la base de datos
+    
+    Args:
+        user_id (int): ID del usuario (None si se ejecutó por línea de comandos)
+        key_length (int): Longitud de la clave inicial de cada ensayo
+        has_eve (bool): Si hay espía o no
+        trials (int): Cantidad de ensayos
+        detection_rate (float): Fracción de ensayos con espionaje detectado
+        mean_error_rate (float): QBER promedio de los ensayos con muestra
+        mean_sifted_length (float): Longitud promedio de la clave filtrada
+        mean_final_length (float): Longitud promedio de la clave final
+        qber_histogram (dict): Bordes y conteos del histograma de QBER
+    
+    Returns:
+        ExperimentSummary: El resumen creado
+    """
+    experiment = ExperimentSummary(
+        user_id=user_id,
+        key_length=key_length,
+        has_eve=has_eve,
+        trials=trials,
+        detection_rate=detection_rate,
+        mean_error_rate=mean_error_rate,
+        mean_sifted_length=mean_sifted_length,
+        mean_final_length=mean_final_length,
+        qber_histogram=json.dumps(qber_histogram)
+    )
+    db.session.add(experiment)
+    db.session.commit()
+    return experiment
+
+
+def get_experiment_by_id(experiment_id):
+    """
+    Obtiene un resumen de experimento por su ID
+    
+    Args:
+        experiment_id (int): ID del experimento
+    
+    Returns:
+        ExperimentSummary: El resumen encontrado o None
+    """
+    return db.session.get(ExperimentSummary, experiment_id)
+
+
+def get_user_experiments(user_id, limit=None):
+    """
+    Obtiene los experimentos de un usuario
+    
+    Args:
+        user_id (int): ID del usuario
+        limit (int, optional): Límite de resultados
+    
+    Returns:
+        list: Lista de resúmenes ordenados por fecha descendente
+    """
+    query = ExperimentSummary.query.filter_by(user_id=user_id).order_by(
+        ExperimentSummary.timestamp.desc()
+    )
+    
+    if limit:
+        query = query.limit(limit)
+    
+    return query.all()
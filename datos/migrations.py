@@ -0,0 +1,183 @@
+"""
+Capa de Datos - Migraciones del Esquema
+db.create_all() crea las tablas nuevas pero no modifica las existentes; estas
+funciones agregan las columnas que faltan y convierten los datos de las bases
+creadas con versiones anteriores. Son idempotentes y se ejecutan al iniciar
+"""
+from sqlalchemy import inspect, text
+
+from datos import stats_repository
+from datos.models import SimulationSession, User, UserStats, db
+
+
+def add_missing_columns(table, columns):
+    """
+    Agrega a una tabla existente las columnas que no tiene
+
+    Args:
+        table (str): Nombre de la tabla
+        columns (dict): Nombre de columna -> tipo de SQLAlchemy
+
+    Returns:
+        list: Columnas agregadas
+    """
+    inspector = inspect(db.engine)
+    if table not in inspector.get_table_names():
+        return []
+
+    existing = {column['name'] for column in inspector.get_columns(table)}
+    added = [name for name in columns if name not in existing]
+    with db.engine.begin() as connection:
+        for name in added:
+            column_type = columns[name].compile(dialect=db.engine.dialect)
+            connection.execute(text(f'ALTER TABLE {table} ADD COLUMN {name} {column_type}'))
+    return added
+
+
+def widen_column_statement(dialect, table, column, length, nullable=True):
+    """
+    Sentencia que amplía una columna de texto a length caracteres
+
+    Args:
+        dialect (Dialect): Dialecto de la base de datos
+        table (str): Nombre de la tabla
+        column (str): Nombre de la columna
+        length (int): Largo nuevo
+        nullable (bool): Si la columna admite NULL (MySQL lo pide al modificarla)
+
+    Returns:
+        str: Sentencia ALTER TABLE
+    """
+    quote = dialect.identifier_preparer.quote
+    column_type = db.String(length).compile(dialect=dialect)
+    if dialect.name in ('mysql', 'mariadb'):
+        return f"ALTER TABLE {quote(table)} MODIFY {quote(column)} {column_type}{'' if nullable else ' NOT NULL'}"
+    return f'ALTER TABLE {quote(table)} ALTER COLUMN {quote(column)} TYPE {column_type}'
+
+
+def widen_string_columns(table, lengths):
+    """
+    Amplía las columnas de texto que en la base son más cortas que en el modelo
+    SQLite no controla el largo de VARCHAR, así que ahí no hay nada que hacer
+
+    Args:
+        table (str): Nombre de la tabla
+        lengths (dict): Nombre de columna -> largo declarado en el modelo
+
+    Returns:
+        list: Columnas ampliadas
+    """
+    if db.engine.dialect.name == 'sqlite':
+        return []
+    inspector = inspect(db.engine)
+    if table not in inspector.get_table_names():
+        return []
+
+    widened = []
+    with db.engine.begin() as connection:
+        for column in inspector.get_columns(table):
+            length = lengths.get(column['name'])
+            current = getattr(column['type'], 'length', None)
+            if length is None or current is None or current >= length:
+                continue
+            connection.execute(text(widen_column_statement(db.engine.dialect, table, column['name'], length,
+                                                           column['nullable'])))
+            widened.append(column['name'])
+    return widened
+
+
+def drop_stale_indexes(model):
+    """
+    Elimina los índices de la tabla que tienen el nombre de uno declarado en
+    el modelo pero otras columnas (por ejemplo, uno que luego se amplió);
+    add_missing_indexes los vuelve a crear con la definición actual
+
+    Args:
+        model (db.Model): Modelo cuyos índices se verifican
+
+    Returns:
+        list: Nombres de los índices eliminados
+    """
+    declared = {index.name: index for index in model.__table__.indexes}
+    dropped = []
+    with db.engine.begin() as connection:
+        inspector = inspect(connection)
+        if model.__tablename__ not in inspector.get_table_names():
+            return []
+        for existing in inspector.get_indexes(model.__tablename__):
+            index = declared.get(existing['name'])
+            if index is None or existing['column_names'] == [column.name for column in index.columns]:
+                continue
+            # Index.drop arma el DROP INDEX de cada dialecto (MySQL pide ON tabla)
+            index.drop(connection)
+            dropped.append(index.name)
+    return dropped
+
+
+def add_missing_indexes(model):
+    """
+    Crea los índices declarados en un modelo que la tabla existente no tiene
+
+    Args:
+        model (db.Model): Modelo cuyos índices se verifican
+    """
+    for index in model.__table__.indexes:
+        index.create(db.engine, checkfirst=True)
+
+
+def migrate_legacy_keys(batch_size=500):
+    """
+    Convierte las claves guardadas como texto '0'/'1' al formato empaquetado
+    Procesa las filas por lotes para no cargar todas las claves a la vez
+
+    Args:
+        batch_size (int): Filas convertidas por transacción
+
+    Returns:
+        int: Cantidad de sesiones migradas
+    """
+    migrated = 0
+    while True:
+        sessions = SimulationSession.query.options(
+            db.undefer(SimulationSession.legacy_final_key)
+        ).filter(
+            SimulationSession.legacy_final_key.isnot(None)
+        ).limit(batch_size).all()
+
+        if not sessions:
+            return migrated
+
+        for session in sessions:
+            # El setter empaqueta la clave y vacía la columna anterior
+            session.final_key = session.legacy_final_key
+        db.session.commit()
+        migrated += len(sessions)
+
+
+def upgrade_schema():
+    """
+    Lleva la base de datos al esquema actual
+
+    Returns:
+        int: Cantidad de sesiones cuya clave se migró
+    """
+    add_missing_columns('simulation_session', {
+        'key_bits': db.LargeBinary(),
+        'final_key_length': db.Integer(),
+        'seed': db.BigInteger(),
+        'backend': db.String(20),
+        'channel_depolarizing': db.Float(),
+        'channel_bit_flip': db.Float(),
+        'channel_loss': db.Float(),
+        'post_processed': db.Boolean()
+    })
+    # Los hashes de contraseña con parámetros configurables no entran en VARCHAR(128)
+    widen_string_columns('user', {'password_hash': User.__table__.c.password_hash.type.length})
+    drop_stale_indexes(SimulationSession)
+    add_missing_indexes(SimulationSession)
+    migrated = migrate_legacy_keys()
+
+    # Bases anteriores a user_stats: se completa una vez a partir de las sesiones
+    if UserStats.query.first() is None and SimulationSession.query.first() is not None:
+        stats_repository.rebuild_user_stats()
+    return migrated
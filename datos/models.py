@@ -2,9 +2,12 @@
 Modelos de la Base de Datos
 Representan las entidades del dominio
 """
+import base64
+import json
+import math
 from datos import db
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from datos.password_hasher import hash_password, verify_password
 from flask_login import UserMixin
 
 
@@ -17,21 +20,63 @@ class User(db.Model, UserMixin):
     
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False, index=True)
-    password_hash = db.Column(db.String(128), nullable=False)
+    # 'scrypt:32768:8:1$<sal>$<128 hex>' ocupa ~162 caracteres; se deja margen para otros parámetros
+    password_hash = db.Column(db.String(255), nullable=False)
     
     # Relación con sesiones de simulación
     sessions = db.relationship('SimulationSession', backref='user', lazy=True, cascade='all, delete-orphan')
+    experiments = db.relationship('ExperimentSummary', backref='user', lazy=True, cascade='all, delete-orphan')
+    stats = db.relationship('UserStats', backref='user', uselist=False, cascade='all, delete-orphan')
 
     def __repr__(self):
         return f"<User {self.username}>"
 
     def set_password(self, password):
-        """Hashea y guarda la contraseña"""
-        self.password_hash = generate_password_hash(password)
+        """Hashea y guarda la contraseña (con PASSWORD_HASH_METHOD)"""
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
         """Verifica si la contraseña es correcta"""
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
+
+
+# Bytes de la clave que se leen junto con el historial para mostrar un adelanto
+KEY_PREVIEW_BYTES = 3
+KEY_PREVIEW_BITS = 20
+
+
+def pack_bits(bits):
+    """
+    Empaqueta una cadena de '0'/'1' en bytes, 8 bits por byte
+    El primer bit es el más significativo del primer byte y el último byte
+    se completa con ceros
+
+    Args:
+        bits (str): Cadena de bits
+
+    Returns:
+        bytes: Bits empaquetados
+    """
+    if not bits:
+        return b''
+    padding = -len(bits) % 8
+    return int(bits + '0' * padding, 2).to_bytes((len(bits) + padding) // 8, 'big')
+
+
+def unpack_bits(data, length):
+    """
+    Desempaqueta los primeros length bits de data en una cadena de '0'/'1'
+
+    Args:
+        data (bytes): Bits empaquetados con pack_bits
+        length (int): Cantidad de bits a recuperar
+
+    Returns:
+        str: Cadena de bits
+    """
+    if length <= 0 or not data:
+        return ''
+    return bin(int.from_bytes(data, 'big'))[2:].zfill(len(data) * 8)[:length]
 
 
 class SimulationSession(db.Model):
@@ -40,13 +85,40 @@ class SimulationSession(db.Model):
     Almacena el resultado de cada simulación del protocolo BB84
     """
     __tablename__ = 'simulation_session'
+    __table_args__ = (
+        # Estadísticas por usuario: agrupa por resultado y suma el QBER solo con el índice
+        db.Index('ix_simulation_session_user_result', 'user_id', 'result', 'error_rate'),
+        # Historial paginado por cursor: orden (timestamp, id) dentro de cada usuario
+        db.Index('ix_simulation_session_user_timestamp', 'user_id', 'timestamp', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     key_length = db.Column(db.Integer, nullable=False)
     has_eve = db.Column(db.Boolean, nullable=False, default=False)
     result = db.Column(db.String(50), nullable=False)  # 'secure' o 'compromised'
-    final_key = db.Column(db.Text, nullable=True)
     error_rate = db.Column(db.Float, nullable=True)
+    
+    # Semilla y backend de la simulación, para reproducirla (NULL en sesiones anteriores)
+    seed = db.Column(db.BigInteger, nullable=True)
+    backend = db.Column(db.String(20), nullable=True)
+    
+    # Parámetros del canal ruidoso (NULL con el canal ideal)
+    channel_depolarizing = db.Column(db.Float, nullable=True)
+    channel_bit_flip = db.Column(db.Float, nullable=True)
+    channel_loss = db.Column(db.Float, nullable=True)
+    
+    # Si la clave pasó por reconciliación y amplificación de privacidad
+    post_processed = db.Column(db.Boolean, nullable=True)
+    
+    # Clave final empaquetada (8 bits por byte) y su longitud en bits
+    # Se cargan solo al acceder a final_key; el historial lee apenas un adelanto
+    key_bits = db.deferred(db.Column(db.LargeBinary, nullable=True))
+    final_key_length = db.Column(db.Integer, nullable=True)
+    key_preview = db.column_property(db.func.substr(key_bits.columns[0], 1, KEY_PREVIEW_BYTES))
+    
+    # Formato anterior: un carácter '0'/'1' por bit. Solo lo usan las filas que
+    # todavía no migró datos.migrations.upgrade_schema
+    legacy_final_key = db.deferred(db.Column('final_key', db.Text, nullable=True))
     timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
     
     # Foreign Key
@@ -55,15 +127,155 @@ class SimulationSession(db.Model):
     def __repr__(self):
         return f"<SimulationSession {self.id} - {self.result}>"
     
-    def to_dict(self):
-        """Convierte la sesión a diccionario para facilitar el uso"""
+    @property
+    def final_key(self):
+        """Clave final como cadena de '0'/'1', o None si no se generó"""
+        if self.key_bits is not None:
+            return unpack_bits(self.key_bits, self.final_key_length)
+        return self.legacy_final_key
+    
+    @final_key.setter
+    def final_key(self, bits):
+        self.key_bits = pack_bits(bits) if bits is not None else None
+        self.final_key_length = len(bits) if bits is not None else None
+        self.legacy_final_key = None
+    
+    @property
+    def channel(self):
+        """Parámetros del canal ('depolarizing', 'bit_flip', 'loss'), o None si fue ideal"""
+        if self.channel_depolarizing is None and self.channel_bit_flip is None and self.channel_loss is None:
+            return None
         return {
+            'depolarizing': self.channel_depolarizing or 0.0,
+            'bit_flip': self.channel_bit_flip or 0.0,
+            'loss': self.channel_loss or 0.0
+        }
+    
+    @channel.setter
+    def channel(self, channel):
+        channel = channel or {}
+        self.channel_depolarizing = channel.get('depolarizing')
+        self.channel_bit_flip = channel.get('bit_flip')
+        self.channel_loss = channel.get('loss')
+    
+    @property
+    def final_key_preview(self):
+        """Primeros KEY_PREVIEW_BITS bits de la clave sin cargarla completa"""
+        if self.key_preview is not None:
+            return unpack_bits(self.key_preview, min(self.final_key_length, KEY_PREVIEW_BITS))
+        legacy = self.legacy_final_key
+        return legacy[:KEY_PREVIEW_BITS] if legacy is not None else None
+    
+    def to_dict(self, include_key=False):
+        """
+        Convierte la sesión a diccionario para facilitar el uso
+        
+        Args:
+            include_key (bool): Incluir la clave completa ('final_key' y su
+                forma empaquetada en base64); si no, solo su longitud y un adelanto
+        """
+        data = {
             'id': self.id,
             'key_length': self.key_length,
             'has_eve': self.has_eve,
             'result': self.result,
-            'final_key': self.final_key,
+            'final_key_length': self.final_key_length,
+            'final_key_preview': self.final_key_preview,
             'error_rate': self.error_rate,
+            'seed': self.seed,
+            'backend': self.backend,
+            'channel': self.channel,
+            'post_processed': bool(self.post_processed),
+            'timestamp': self.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+            'user_id': self.user_id
+        }
+        if include_key:
+            final_key = self.final_key
+            packed = self.key_bits if self.key_bits is not None else (
+                pack_bits(final_key) if final_key is not None else None)
+            data['final_key'] = final_key
+            data['final_key_base64'] = base64.b64encode(packed).decode('ascii') if packed is not None else None
+        return data
+
+
+class UserStats(db.Model):
+    """
+    Modelo de Estadísticas de Usuario
+    Resumen de las sesiones de cada usuario que session_repository mantiene
+    al crear y eliminar sesiones, para no recorrerlas en cada consulta
+    """
+    __tablename__ = 'user_stats'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    total_simulations = db.Column(db.Integer, nullable=False, default=0)
+    secure_simulations = db.Column(db.Integer, nullable=False, default=0)
+    compromised_simulations = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Sesiones con QBER, suma y suma de cuadrados (para promedio y desvío)
+    error_rate_count = db.Column(db.Integer, nullable=False, default=0)
+    error_rate_sum = db.Column(db.Float, nullable=False, default=0.0)
+    error_rate_sq_sum = db.Column(db.Float, nullable=False, default=0.0)
+    
+    last_run_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<UserStats {self.user_id} - {self.total_simulations} sesiones>"
+    
+    def to_dict(self):
+        """Convierte las estadísticas a diccionario, con el promedio y desvío del QBER"""
+        mean = None
+        std = None
+        if self.error_rate_count:
+            mean = self.error_rate_sum / self.error_rate_count
+            std = math.sqrt(max(self.error_rate_sq_sum / self.error_rate_count - mean ** 2, 0.0))
+        return {
+            'user_id': self.user_id,
+            'total_simulations': self.total_simulations,
+            'secure_simulations': self.secure_simulations,
+            'compromised_simulations': self.compromised_simulations,
+            'average_error_rate': mean,
+            'error_rate_std': std,
+            'last_run_at': self.last_run_at.strftime('%Y-%m-%d %H:%M:%S') if self.last_run_at else None
+        }
+
+
+class ExperimentSummary(db.Model):
+    """
+    Modelo de Resumen de Experimento
+    Almacena las estadísticas agregadas de un experimento Monte-Carlo
+    (muchas simulaciones BB84) en un único registro
+    """
+    __tablename__ = 'experiment_summary'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    key_length = db.Column(db.Integer, nullable=False)
+    has_eve = db.Column(db.Boolean, nullable=False, default=False)
+    trials = db.Column(db.Integer, nullable=False)
+    detection_rate = db.Column(db.Float, nullable=False)
+    mean_error_rate = db.Column(db.Float, nullable=True)
+    mean_sifted_length = db.Column(db.Float, nullable=False)
+    mean_final_length = db.Column(db.Float, nullable=False)
+    qber_histogram = db.Column(db.Text, nullable=False)  # JSON con bordes y conteos
+    timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    
+    # Foreign Key (nulo si el experimento se ejecutó desde la línea de comandos)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True, index=True)
+
+    def __repr__(self):
+        return f"<ExperimentSummary {self.id} - {self.trials} ensayos>"
+    
+    def to_dict(self):
+        """Convierte el resumen a diccionario para facilitar el uso"""
+        return {
+            'id': self.id,
+            'key_length': self.key_length,
+            'has_eve': self.has_eve,
+            'trials': self.trials,
+            'detection_rate': self.detection_rate,
+            'mean_error_rate': self.mean_error_rate,
+            'mean_sifted_length': self.mean_sifted_length,
+            'mean_final_length': self.mean_final_length,
+            'qber_histogram': json.loads(self.qber_histogram),
             'timestamp': self.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
             'user_id': self.user_id
         }
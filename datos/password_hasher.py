@@ -0,0 +1,103 @@
+"""
+Capa de Datos - Hash de Contraseñas
+Centraliza el método y los parámetros de hash (PASSWORD_HASH_METHOD, con el
+formato de Werkzeug: 'scrypt:n:r:p' o 'pbkdf2:hash:iteraciones').
+Los hashes guardan sus parámetros, así que al cambiar la configuración las
+contraseñas existentes se siguen verificando y needs_rehash indica cuáles
+conviene regenerar
+"""
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+# Método por defecto de Werkzeug (scrypt con n=2^15, r=8, p=1)
+DEFAULT_METHOD = 'scrypt'
+
+_method = DEFAULT_METHOD
+_method_prefix = None
+
+
+def method_prefix(method):
+    """
+    Parámetros completos de un método, tal como quedan al inicio del hash
+    ('scrypt' -> 'scrypt:32768:8:1')
+
+    Args:
+        method (str): Método en formato de Werkzeug
+
+    Returns:
+        str: Prefijo del hash antes del primer '$'
+    """
+    return generate_password_hash('', method).split('$', 1)[0]
+
+
+def configure_password_hashing(app):
+    """
+    Toma el método de hash de la configuración de la aplicación
+
+    Args:
+        app (Flask): Aplicación con PASSWORD_HASH_METHOD
+    """
+    set_hash_method(app.config.get('PASSWORD_HASH_METHOD', DEFAULT_METHOD))
+
+
+def set_hash_method(method):
+    """
+    Cambia el método de hash de las contraseñas nuevas
+
+    Args:
+        method (str): Método en formato de Werkzeug
+
+    Raises:
+        ValueError: Si Werkzeug no reconoce el método
+    """
+    global _method, _method_prefix
+    _method_prefix = method_prefix(method)
+    _method = method
+
+
+def get_hash_method():
+    """Método de hash configurado"""
+    return _method
+
+
+def hash_password(password):
+    """
+    Hashea una contraseña con el método configurado
+
+    Args:
+        password (str): Contraseña en texto plano
+
+    Returns:
+        str: Hash con el formato 'método$sal$hash'
+    """
+    return generate_password_hash(password, _method)
+
+
+def verify_password(password_hash, password):
+    """
+    Verifica una contraseña contra su hash (con los parámetros guardados en el hash)
+
+    Args:
+        password_hash (str): Hash guardado
+        password (str): Contraseña en texto plano
+
+    Returns:
+        bool: True si coincide
+    """
+    return check_password_hash(password_hash, password)
+
+
+def needs_rehash(password_hash):
+    """
+    Indica si un hash se generó con parámetros distintos de los configurados
+
+    Args:
+        password_hash (str): Hash guardado
+
+    Returns:
+        bool: True si conviene regenerarlo
+    """
+    global _method_prefix
+    if _method_prefix is None:
+        _method_prefix = method_prefix(_method)
+    return password_hash.split('$', 1)[0] != _method_prefix
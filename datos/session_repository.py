@@ -2,10 +2,14 @@
 Capa de Datos - Repositorio de Sesiones de Simulación
 Contiene todas las operaciones de acceso a datos relacionadas con sesiones
 """
-from datos.models import SimulationSession, db
+from datos import stats_repository
+from datos.session_writer import session_writer
+from datos.models import KEY_PREVIEW_BITS, SimulationSession, db, unpack_bits
+from sqlalchemy import func, tuple_
 
 
-def create_session(user_id, key_length, has_eve, result, final_key=None, error_rate=None):
+def create_session(user_id, key_length, has_eve, result, final_key=None, error_rate=None, seed=None, backend=None,
+                   channel=None, post_processed=False):
     """
     Crea una nueva sesión de simulación en la base de datos
     
@@ -16,19 +20,38 @@ def create_session(user_id, key_length, has_eve, result, final_key=None, error_r
         result (str): Resultado de la simulación ('secure' o 'compromised')
         final_key (str, optional): La clave final generada
         error_rate (float, optional): Tasa de error cuántico
+        seed (int, optional): Semilla con la que se puede reproducir la simulación
+        backend (str, optional): Backend con el que se ejecutó
+        channel (dict, optional): Parámetros del canal ruidoso ('depolarizing',
+            'bit_flip', 'loss'); None con el canal ideal
+        post_processed (bool): Si la clave pasó por reconciliación y amplificación de privacidad
     
     Returns:
-        SimulationSession: La sesión creada
+        SimulationSession: La sesión creada. Con la escritura diferida activa
+            (SESSION_WRITE_BEHIND) se devuelve sin guardar y sin id: se inserta
+            con el próximo lote
     """
+    if session_writer.enabled:
+        return session_writer.enqueue(user_id, key_length, has_eve, result, final_key, error_rate, seed, backend,
+                                      channel, post_processed)
+    
     session = SimulationSession(
         user_id=user_id,
         key_length=key_length,
         has_eve=has_eve,
         result=result,
         final_key=final_key,
-        error_rate=error_rate
+        error_rate=error_rate,
+        seed=seed,
+        backend=backend,
+        channel=channel,
+        post_processed=post_processed
     )
     db.session.add(session)
+    db.session.flush()
+    
+    # Las estadísticas del usuario se actualizan en la misma transacción
+    stats_repository.record_session(session)
     db.session.commit()
     return session
 
@@ -58,7 +81,8 @@ def get_user_sessions(user_id, limit=None):
         list: Lista de sesiones ordenadas por fecha descendente
     """
     query = SimulationSession.query.filter_by(user_id=user_id).order_by(
-        SimulationSession.timestamp.desc()
+        SimulationSession.timestamp.desc(),
+        SimulationSession.id.desc()
     )
     
     if limit:
@@ -67,6 +91,61 @@ def get_user_sessions(user_id, limit=None):
     return query.all()
 
 
+def get_user_session_page(user_id, limit, before=None):
+    """
+    Obtiene una página del historial de un usuario con paginación por cursor
+    Solo lee las columnas que se listan (sin la clave completa) y recorre el
+    índice (user_id, timestamp, id), así que el costo no depende de cuántas
+    páginas anteriores haya
+    
+    Args:
+        user_id (int): ID del usuario
+        limit (int): Cantidad de sesiones de la página
+        before (tuple, optional): (timestamp, id) de la última sesión de la
+            página anterior; si no se indica, se devuelve la primera página
+    
+    Returns:
+        tuple: (lista de diccionarios por sesión, True si hay más sesiones)
+    """
+    query = db.session.query(
+        SimulationSession.id,
+        SimulationSession.timestamp,
+        SimulationSession.key_length,
+        SimulationSession.has_eve,
+        SimulationSession.result,
+        SimulationSession.error_rate,
+        SimulationSession.final_key_length,
+        SimulationSession.key_preview,
+        SimulationSession.seed.isnot(None).label('replayable')
+    ).filter(SimulationSession.user_id == user_id)
+    
+    if before is not None:
+        # Comparación de filas: el índice salta directo al cursor
+        query = query.filter(tuple_(SimulationSession.timestamp, SimulationSession.id) < tuple_(*before))
+    
+    rows = query.order_by(
+        SimulationSession.timestamp.desc(),
+        SimulationSession.id.desc()
+    ).limit(limit + 1).all()
+    
+    sessions = [
+        {
+            'id': row.id,
+            'timestamp': row.timestamp,
+            'key_length': row.key_length,
+            'has_eve': row.has_eve,
+            'result': row.result,
+            'error_rate': row.error_rate,
+            'final_key_length': row.final_key_length,
+            'final_key_preview': unpack_bits(row.key_preview, min(row.final_key_length, KEY_PREVIEW_BITS))
+            if row.key_preview is not None else None,
+            'replayable': bool(row.replayable)
+        }
+        for row in rows[:limit]
+    ]
+    return sessions, len(rows) > limit
+
+
 def get_all_sessions(limit=None):
     """
     Obtiene todas las sesiones del sistema
@@ -77,7 +156,10 @@ def get_all_sessions(limit=None):
     Returns:
         list: Lista de sesiones ordenadas por fecha descendente
     """
-    query = SimulationSession.query.order_by(SimulationSession.timestamp.desc())
+    query = SimulationSession.query.order_by(
+        SimulationSession.timestamp.desc(),
+        SimulationSession.id.desc()
+    )
     
     if limit:
         query = query.limit(limit)
@@ -97,6 +179,7 @@ def delete_session(session_id):
     """
     session = get_session_by_id(session_id)
     if session:
+        stats_repository.forget_session(session)
         db.session.delete(session)
         db.session.commit()
         return True
@@ -113,4 +196,6 @@ def count_user_sessions(user_id):
     Returns:
         int: Número de sesiones
     """
-    return SimulationSession.query.filter_by(user_id=user_id).count()
+    return db.session.query(func.count(SimulationSession.id)).filter(
+        SimulationSession.user_id == user_id
+    ).scalar()
@@ -0,0 +1,342 @@
+"""
+Capa de Datos - Escritura Diferida de Sesiones (write-behind)
+Acumula las sesiones nuevas en memoria y las inserta por lotes, con un único
+INSERT tipo executemany y un solo commit por lote, cuando se junta
+SESSION_BATCH_SIZE sesiones o pasa SESSION_FLUSH_INTERVAL segundos.
+Con SESSION_WRITE_JOURNAL cada sesión se agrega también a un diario en disco
+antes de encolarla; si el proceso termina sin vaciar el buffer, el diario se
+vuelve a insertar al iniciar (al menos una vez: una caída entre el commit y
+el vaciado del diario puede duplicar ese lote).
+El diario es de un solo proceso: cada uno lo reescribe al vaciar su buffer,
+así que varios workers (p. ej. de gunicorn) con la misma ruta pierden filas;
+SESSION_WRITE_JOURNAL debe ser distinta en cada proceso.
+Una fila que no se puede insertar ni sola (p. ej. un resultado nulo) se
+descarta y queda registrada en el log y en <diario>.rejected, para que no
+frene a las que vienen detrás
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from sqlalchemy import insert
+from sqlalchemy.exc import InterfaceError, OperationalError
+
+from datos import stats_repository
+from datos.models import SimulationSession, db, pack_bits
+
+
+# Errores de la base (no de la fila): el lote se reintenta más tarde
+UNAVAILABLE_ERRORS = (OperationalError, InterfaceError)
+
+# Espera máxima entre reintentos cuando la base no responde (segundos)
+MAX_RETRY_DELAY = 30.0
+
+# Filas rechazadas que se conservan en memoria para inspección
+MAX_REJECTED = 1000
+
+
+class SessionWriteBuffer:
+    """
+    Buffer de inserción diferida de SimulationSession
+    Desactivado salvo que la configuración tenga SESSION_WRITE_BEHIND=True
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = False
+        self.batch_size = 100
+        self.flush_interval = 1.0
+        self.journal_path = None
+        self.pending = []
+        self.rejected = deque(maxlen=MAX_REJECTED)
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.wakeup = threading.Condition(self.lock)
+        self.thread = None
+        self.stopping = False
+        self.stats = {
+            'flushed_sessions': 0,
+            'batches': 0,
+            'failed_flushes': 0,
+            'rejected_sessions': 0,
+            'last_flush_ms': None,
+            'max_flush_ms': 0.0,
+            'total_flush_ms': 0.0
+        }
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Configura el buffer y, si está activo, arranca el hilo que lo vacía
+
+        Args:
+            app (Flask): Aplicación cuyo contexto se usa al escribir
+        """
+        self.app = app
+        self.enabled = app.config.get('SESSION_WRITE_BEHIND', False)
+        self.batch_size = app.config.get('SESSION_BATCH_SIZE', self.batch_size)
+        self.flush_interval = app.config.get('SESSION_FLUSH_INTERVAL', self.flush_interval)
+        self.journal_path = app.config.get('SESSION_WRITE_JOURNAL')
+        app.extensions['session_writer'] = self
+
+        if not self.enabled:
+            return
+
+        self._replay_journal()
+        self.stopping = False
+        self.thread = threading.Thread(target=self._run, name='session-writer', daemon=True)
+        self.thread.start()
+        atexit.register(self.shutdown)
+
+    def enqueue(self, user_id, key_length, has_eve, result, final_key=None, error_rate=None, seed=None, backend=None,
+                channel=None, post_processed=False):
+        """
+        Encola una sesión para insertarla en el próximo lote
+
+        Returns:
+            SimulationSession: Sesión sin guardar (su id se asigna al insertar el lote)
+        """
+        channel = channel or {}
+        row = {
+            'user_id': user_id,
+            'key_length': key_length,
+            'has_eve': has_eve,
+            'result': result,
+            'error_rate': error_rate,
+            'key_bits': pack_bits(final_key) if final_key is not None else None,
+            'final_key_length': len(final_key) if final_key is not None else None,
+            'seed': seed,
+            'backend': backend,
+            'channel_depolarizing': channel.get('depolarizing'),
+            'channel_bit_flip': channel.get('bit_flip'),
+            'channel_loss': channel.get('loss'),
+            'post_processed': post_processed,
+            'timestamp': datetime.utcnow()
+        }
+
+        with self.lock:
+            if self.journal_path:
+                self._append_journal([row])
+            self.pending.append(row)
+            if len(self.pending) >= self.batch_size:
+                self.wakeup.notify()
+
+        session = SimulationSession(user_id=user_id, key_length=key_length, has_eve=has_eve, result=result,
+                                    error_rate=error_rate, seed=seed, backend=backend, channel=channel,
+                                    post_processed=post_processed, timestamp=row['timestamp'])
+        session.final_key = final_key
+        return session
+
+    def flush(self):
+        """
+        Inserta todas las sesiones pendientes, en lotes de hasta batch_size
+        con un commit por lote. Si un lote falla se reintenta fila por fila:
+        las filas que fallan solas se descartan a la lista de rechazadas y,
+        si la base no responde (error operacional), el resto vuelve al
+        principio de la cola y se propaga el error
+
+        Returns:
+            int: Cantidad de sesiones insertadas
+        """
+        flushed = 0
+        with self.flush_lock:
+            while True:
+                with self.lock:
+                    batch = self.pending[:self.batch_size]
+                    self.pending = self.pending[self.batch_size:]
+                if not batch:
+                    return flushed
+                flushed += self._write_batch(batch)
+
+    def _write_batch(self, batch):
+        """
+        Inserta un lote con un único INSERT tipo executemany y un commit
+
+        Returns:
+            int: Filas insertadas (las rechazadas no cuentan)
+        """
+        start = time.perf_counter()
+        try:
+            self._insert(batch)
+            written = batch
+        except UNAVAILABLE_ERRORS:
+            self._requeue(batch, failed=True)
+            raise
+        except Exception:
+            with self.lock:
+                self.stats['failed_flushes'] += 1
+            written = self._write_rows(batch, start)
+
+        self._record_flush(written, start)
+        return len(written)
+
+    def _write_rows(self, batch, start):
+        """
+        Inserta las filas de un lote fallido de a una, para aislar las que fallan
+
+        Returns:
+            list: Filas insertadas
+        """
+        written = []
+        for index, row in enumerate(batch):
+            try:
+                self._insert([row])
+            except UNAVAILABLE_ERRORS:
+                # La base dejó de responder: lo que falta vuelve a la cola
+                self._requeue(batch[index:])
+                self._record_flush(written, start)
+                raise
+            except Exception as error:
+                self._reject(row, error)
+            else:
+                written.append(row)
+        return written
+
+    def _insert(self, rows):
+        """INSERT de las filas y actualización de user_stats en una transacción"""
+        with self.app.app_context():
+            try:
+                db.session.execute(insert(SimulationSession.__table__), rows)
+                stats_repository.record_sessions(rows)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+
+    def _requeue(self, rows, failed=False):
+        """Devuelve filas al principio de la cola para el próximo intento"""
+        with self.lock:
+            self.pending = rows + self.pending
+            if failed:
+                self.stats['failed_flushes'] += 1
+
+    def _reject(self, row, error):
+        """Descarta una fila que no se puede insertar y la deja registrada"""
+        self.app.logger.error('Sesión descartada por el buffer de escritura (usuario %s): %s', row.get('user_id'), error)
+        with self.lock:
+            self.rejected.append(row)
+            self.stats['rejected_sessions'] += 1
+            if self.journal_path:
+                with open(self.journal_path + '.rejected', 'a', encoding='utf-8') as rejected:
+                    rejected.write(json.dumps(dict(self._encode_row(row), error=str(error))) + '\n')
+
+    def _record_flush(self, rows, start):
+        """Actualiza las métricas y deja en el diario solo lo pendiente"""
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self.lock:
+            if self.journal_path:
+                self._rewrite_journal(self.pending)
+            if not rows:
+                return
+            self.stats['flushed_sessions'] += len(rows)
+            self.stats['batches'] += 1
+            self.stats['last_flush_ms'] = elapsed_ms
+            self.stats['max_flush_ms'] = max(self.stats['max_flush_ms'], elapsed_ms)
+            self.stats['total_flush_ms'] += elapsed_ms
+
+    def metrics(self):
+        """
+        Métricas del buffer
+
+        Returns:
+            dict: 'queue_depth', 'flushed_sessions', 'batches', 'failed_flushes',
+                'rejected_sessions', 'last_flush_ms', 'max_flush_ms' y 'avg_flush_ms'
+        """
+        with self.lock:
+            metrics = dict(self.stats)
+            metrics['queue_depth'] = len(self.pending)
+        total = metrics.pop('total_flush_ms')
+        metrics['avg_flush_ms'] = total / metrics['batches'] if metrics['batches'] else None
+        return metrics
+
+    def shutdown(self):
+        """Detiene el hilo y escribe lo que quede pendiente"""
+        if self.thread is not None:
+            with self.lock:
+                self.stopping = True
+                self.wakeup.notify()
+            self.thread.join()
+            self.thread = None
+        if self.app is not None and self.pending:
+            try:
+                self.flush()
+            except UNAVAILABLE_ERRORS as error:
+                self.app.logger.error('%d sesiones quedaron sin guardar%s: %s', len(self.pending),
+                                      ' (siguen en el diario)' if self.journal_path else '', error)
+
+    def _run(self):
+        """
+        Vacía el buffer al llenarse un lote o al cumplirse el intervalo
+        Si la base no responde, espera cada vez el doble (hasta MAX_RETRY_DELAY)
+        antes de reintentar, aunque se sigan llenando lotes
+        """
+        retry_delay = 0
+        while True:
+            with self.lock:
+                if retry_delay:
+                    deadline = time.monotonic() + retry_delay
+                    while not self.stopping and time.monotonic() < deadline:
+                        self.wakeup.wait(deadline - time.monotonic())
+                elif not self.stopping and len(self.pending) < self.batch_size:
+                    self.wakeup.wait(self.flush_interval)
+                stopping = self.stopping
+            try:
+                self.flush()
+                retry_delay = 0
+            except Exception as error:
+                # Las filas quedaron en la cola; se reintenta después de esperar
+                retry_delay = min(MAX_RETRY_DELAY, max(self.flush_interval, retry_delay * 2))
+                self.app.logger.warning('No se pudo vaciar el buffer de sesiones (%d pendientes), reintento en %.1f s: %s',
+                                        len(self.pending), retry_delay, error)
+            if stopping:
+                return
+
+    def _append_journal(self, rows):
+        """Agrega filas al diario (una línea JSON por sesión) y lo baja a disco"""
+        with open(self.journal_path, 'a', encoding='utf-8') as journal:
+            for row in rows:
+                journal.write(json.dumps(self._encode_row(row)) + '\n')
+            journal.flush()
+            os.fsync(journal.fileno())
+
+    def _rewrite_journal(self, rows):
+        """Deja en el diario solo las filas que siguen pendientes"""
+        temporary = self.journal_path + '.tmp'
+        with open(temporary, 'w', encoding='utf-8') as journal:
+            for row in rows:
+                journal.write(json.dumps(self._encode_row(row)) + '\n')
+            journal.flush()
+            os.fsync(journal.fileno())
+        os.replace(temporary, self.journal_path)
+
+    def _replay_journal(self):
+        """Encola las sesiones que quedaron en el diario de una ejecución anterior"""
+        if not self.journal_path or not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, encoding='utf-8') as journal:
+            rows = [self._decode_row(json.loads(line)) for line in journal if line.strip()]
+        with self.lock:
+            self.pending = rows + self.pending
+
+    @staticmethod
+    def _encode_row(row):
+        encoded = dict(row)
+        encoded['key_bits'] = row['key_bits'].hex() if row['key_bits'] is not None else None
+        encoded['timestamp'] = row['timestamp'].isoformat()
+        return encoded
+
+    @staticmethod
+    def _decode_row(encoded):
+        row = dict(encoded)
+        row['key_bits'] = bytes.fromhex(encoded['key_bits']) if encoded['key_bits'] is not None else None
+        row['timestamp'] = datetime.fromisoformat(encoded['timestamp'])
+        return row
+
+
+# Instancia compartida, se configura con session_writer.init_app(app)
+session_writer = SessionWriteBuffer()
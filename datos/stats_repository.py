@@ -0,0 +1,203 @@
+"""
+Capa de Datos - Repositorio de Estadísticas de Usuario
+Mantiene la tabla user_stats. record_session, record_sessions y
+forget_session no hacen commit: se llaman dentro de la transacción que crea
+o elimina las sesiones
+"""
+from sqlalchemy import case, func
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+
+from datos.models import SimulationSession, UserStats, db
+
+
+# Tolerancia al comparar sumas de QBER (se acumulan en punto flotante)
+FLOAT_TOLERANCE = 1e-6
+
+
+def _deltas(result, error_rate, sign):
+    """Cambios que una sesión aplica a los contadores (sign = 1 o -1)"""
+    has_error_rate = error_rate is not None
+    error_rate = error_rate or 0.0
+    return {
+        'total_simulations': sign,
+        'secure_simulations': sign if result == 'secure' else 0,
+        'compromised_simulations': sign if result == 'compromised' else 0,
+        'error_rate_count': sign if has_error_rate else 0,
+        'error_rate_sum': sign * error_rate,
+        'error_rate_sq_sum': sign * error_rate * error_rate
+    }
+
+
+def _apply_deltas(user_id, deltas, last_run_at=None):
+    """
+    Suma deltas a los contadores de un usuario, creando su fila si no existe
+    Los contadores se incrementan en SQL y la fila se crea con un upsert
+    (INSERT ... ON CONFLICT DO UPDATE), así que dos escrituras simultáneas,
+    aunque sean las primeras del usuario, no se pisan
+    """
+    values = {name: getattr(UserStats, name) + delta for name, delta in deltas.items()}
+    if last_run_at is not None:
+        values['last_run_at'] = case(
+            (UserStats.last_run_at.is_(None), last_run_at),
+            (UserStats.last_run_at < last_run_at, last_run_at),
+            else_=UserStats.last_run_at
+        )
+
+    # Sin last_run_at se están restando sesiones: si no hay fila no hay nada que restar
+    if last_run_at is None:
+        UserStats.query.filter_by(user_id=user_id).update(values, synchronize_session=False)
+        return
+
+    row = dict(deltas, user_id=user_id, last_run_at=last_run_at)
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+        statement = insert(UserStats).values(row).on_conflict_do_update(index_elements=['user_id'], set_=values)
+        db.session.execute(statement)
+    elif dialect in ('mysql', 'mariadb'):
+        db.session.execute(mysql.insert(UserStats).values(row).on_duplicate_key_update(values))
+    else:
+        _update_or_insert(user_id, values, row)
+
+
+def _update_or_insert(user_id, values, row):
+    """UPDATE y, si el usuario no tenía fila, INSERT; si otro la creó antes, se repite el UPDATE"""
+    if UserStats.query.filter_by(user_id=user_id).update(values, synchronize_session=False):
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.execute(UserStats.__table__.insert().values(row))
+    except IntegrityError:
+        UserStats.query.filter_by(user_id=user_id).update(values, synchronize_session=False)
+
+
+def record_session(session):
+    """
+    Suma una sesión nueva a las estadísticas de su usuario
+
+    Args:
+        session (SimulationSession): Sesión ya agregada (con timestamp asignado)
+    """
+    _apply_deltas(session.user_id, _deltas(session.result, session.error_rate, 1), session.timestamp)
+
+
+def record_sessions(rows):
+    """
+    Suma un lote de sesiones insertadas en bloque, con una actualización por usuario
+
+    Args:
+        rows (list): Diccionarios con 'user_id', 'result', 'error_rate' y 'timestamp'
+    """
+    per_user = {}
+    for row in rows:
+        deltas = _deltas(row['result'], row['error_rate'], 1)
+        totals, last_run_at = per_user.get(row['user_id'], (dict.fromkeys(deltas, 0), row['timestamp']))
+        for name, delta in deltas.items():
+            totals[name] += delta
+        per_user[row['user_id']] = (totals, max(last_run_at, row['timestamp']))
+
+    for user_id, (totals, last_run_at) in per_user.items():
+        _apply_deltas(user_id, totals, last_run_at)
+
+
+def forget_session(session):
+    """
+    Resta una sesión eliminada de las estadísticas de su usuario
+    last_run_at no cambia: es la fecha de la última simulación ejecutada
+
+    Args:
+        session (SimulationSession): Sesión que se está eliminando
+    """
+    _apply_deltas(session.user_id, _deltas(session.result, session.error_rate, -1))
+
+
+def get_user_stats(user_id):
+    """
+    Obtiene las estadísticas de un usuario (lectura por clave primaria)
+
+    Args:
+        user_id (int): ID del usuario
+
+    Returns:
+        UserStats: Las estadísticas o None si el usuario no tiene sesiones registradas
+    """
+    return db.session.get(UserStats, user_id)
+
+
+def compute_stats_from_sessions():
+    """
+    Recalcula las estadísticas de todos los usuarios a partir de simulation_session
+    con una consulta agregada por usuario
+
+    Returns:
+        dict: user_id -> diccionario con los mismos campos que UserStats
+    """
+    rows = db.session.query(
+        SimulationSession.user_id,
+        func.count(SimulationSession.id),
+        func.sum(case((SimulationSession.result == 'secure', 1), else_=0)),
+        func.sum(case((SimulationSession.result == 'compromised', 1), else_=0)),
+        func.count(SimulationSession.error_rate),
+        func.coalesce(func.sum(SimulationSession.error_rate), 0.0),
+        func.coalesce(func.sum(SimulationSession.error_rate * SimulationSession.error_rate), 0.0),
+        func.max(SimulationSession.timestamp)
+    ).group_by(SimulationSession.user_id).all()
+
+    return {
+        row[0]: {
+            'total_simulations': row[1],
+            'secure_simulations': row[2],
+            'compromised_simulations': row[3],
+            'error_rate_count': row[4],
+            'error_rate_sum': row[5],
+            'error_rate_sq_sum': row[6],
+            'last_run_at': row[7]
+        }
+        for row in rows
+    }
+
+
+def rebuild_user_stats():
+    """
+    Reconstruye toda la tabla user_stats desde simulation_session
+
+    Returns:
+        int: Cantidad de usuarios con estadísticas
+    """
+    computed = compute_stats_from_sessions()
+    UserStats.query.delete(synchronize_session=False)
+    db.session.add_all(UserStats(user_id=user_id, **values) for user_id, values in computed.items())
+    db.session.commit()
+    return len(computed)
+
+
+def check_user_stats():
+    """
+    Compara user_stats con lo que resulta de recorrer simulation_session
+    No modifica nada, así que puede ejecutarse con la aplicación detenida
+
+    Returns:
+        list: Un diccionario por usuario inconsistente con 'user_id', 'field',
+            'stored' y 'expected'
+    """
+    computed = compute_stats_from_sessions()
+    stored = {stats.user_id: stats for stats in UserStats.query.all()}
+    mismatches = []
+
+    for user_id in sorted(set(computed) | set(stored)):
+        expected = computed.get(user_id)
+        stats = stored.get(user_id)
+        for field in ('total_simulations', 'secure_simulations', 'compromised_simulations',
+                      'error_rate_count', 'error_rate_sum', 'error_rate_sq_sum'):
+            expected_value = expected[field] if expected else 0
+            stored_value = getattr(stats, field) if stats else 0
+            if abs(stored_value - expected_value) > FLOAT_TOLERANCE:
+                mismatches.append({
+                    'user_id': user_id,
+                    'field': field,
+                    'stored': stored_value,
+                    'expected': expected_value
+                })
+
+    return mismatches
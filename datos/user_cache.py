@@ -0,0 +1,189 @@
+"""
+Capa de Datos - Caché de Identidades de Usuario
+Guarda en memoria del proceso una identidad liviana (id y username) por
+usuario, con vencimiento (USER_CACHE_TTL segundos) y desalojo LRU
+(USER_CACHE_SIZE entradas), para que el user_loader de Flask-Login no
+consulte la base en cada petición autenticada.
+La caché es por proceso: con varios procesos, una baja o un cambio de
+contraseña hecho en otro proceso se ve recién cuando vence la entrada
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from flask_login import UserMixin
+
+
+class UserIdentity(UserMixin):
+    """
+    Identidad de un usuario autenticado, sin sesión de SQLAlchemy asociada
+    Tiene los atributos que usan las vistas y las plantillas (id y username)
+    """
+
+    def __init__(self, id, username):
+        self.id = id
+        self.username = username
+
+    def __repr__(self):
+        return f"<UserIdentity {self.username}>"
+
+
+class UserIdentityCache:
+    """
+    Caché TTL/LRU de identidades de usuario
+    Además recuerda cuándo se invalidó cada usuario, para rechazar las
+    credenciales firmadas emitidas antes de una baja o un cambio de contraseña.
+    Cada revocación se guarda mientras pueda existir una entrada o una
+    credencial anterior a ella (el mayor de ttl y claim_ttl) y después se descarta
+    """
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.ttl = 60.0
+        self.max_size = 1024
+        self.claim_ttl = 300.0
+        self.entries = OrderedDict()
+        self.revoked_at = {}
+        self.listeners = []
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Lee la configuración de la caché
+
+        Args:
+            app (Flask): Aplicación con USER_CACHE_ENABLED, USER_CACHE_TTL,
+                USER_CACHE_SIZE y USER_CLAIM_TTL
+        """
+        self.enabled = app.config.get('USER_CACHE_ENABLED', self.enabled)
+        self.ttl = float(app.config.get('USER_CACHE_TTL', self.ttl))
+        self.max_size = int(app.config.get('USER_CACHE_SIZE', self.max_size))
+        self.claim_ttl = float(app.config.get('USER_CLAIM_TTL', self.claim_ttl))
+        app.extensions['user_cache'] = self
+        self.clear()
+
+    def get(self, user_id, loader):
+        """
+        Devuelve la identidad de un usuario, llamando a loader si no está en caché
+
+        Args:
+            user_id (int): ID del usuario
+            loader (callable): Función user_id -> UserIdentity o None (consulta la base)
+
+        Returns:
+            UserIdentity: La identidad o None si el usuario no existe
+        """
+        if not self.enabled:
+            return loader(user_id)
+
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is not None and entry[1] > now:
+                self.entries.move_to_end(user_id)
+                self.stats['hits'] += 1
+                hit = True
+            else:
+                self.stats['misses'] += 1
+                hit = False
+        self._notify(user_id, hit)
+        if hit:
+            return entry[0]
+
+        identity = loader(user_id)
+        if identity is not None:
+            with self.lock:
+                self.entries[user_id] = (identity, now + self.ttl)
+                self.entries.move_to_end(user_id)
+                while len(self.entries) > self.max_size:
+                    self.entries.popitem(last=False)
+                    self.stats['evictions'] += 1
+        return identity
+
+    def invalidate(self, user_id):
+        """
+        Quita un usuario de la caché y marca como revocadas sus credenciales
+        firmadas emitidas hasta ahora
+
+        Args:
+            user_id (int): ID del usuario
+        """
+        now = time.time()
+        with self.lock:
+            self.entries.pop(user_id, None)
+            # Reinsertar deja el diccionario ordenado por momento de revocación
+            self.revoked_at.pop(user_id, None)
+            self.revoked_at[user_id] = now
+            self.stats['invalidations'] += 1
+            self._prune_revocations(now)
+
+    def _prune_revocations(self, now):
+        """Descarta las revocaciones más viejas que cualquier entrada o credencial vigente"""
+        cutoff = now - max(self.ttl, self.claim_ttl)
+        while self.revoked_at:
+            user_id, revoked_at = next(iter(self.revoked_at.items()))
+            if revoked_at >= cutoff:
+                return
+            del self.revoked_at[user_id]
+
+    def is_revoked(self, user_id, issued_at):
+        """
+        Indica si una credencial emitida en issued_at quedó invalidada
+
+        Args:
+            user_id (int): ID del usuario
+            issued_at (float): Momento de emisión (segundos desde epoch)
+
+        Returns:
+            bool: True si el usuario se invalidó después de emitirla
+        """
+        with self.lock:
+            revoked_at = self.revoked_at.get(user_id)
+        return revoked_at is not None and issued_at <= revoked_at
+
+    def clear(self):
+        """Vacía la caché y reinicia las métricas"""
+        with self.lock:
+            self.entries.clear()
+            self.revoked_at.clear()
+            self.stats = dict.fromkeys(self.stats, 0)
+
+    def add_listener(self, callback):
+        """
+        Registra un hook de instrumentación que se llama en cada consulta
+
+        Args:
+            callback (callable): Función (user_id, hit) con hit=True si se sirvió de la caché
+        """
+        self.listeners.append(callback)
+
+    def remove_listener(self, callback):
+        """Quita un hook registrado con add_listener"""
+        self.listeners.remove(callback)
+
+    def metrics(self):
+        """
+        Métricas de la caché
+
+        Returns:
+            dict: 'hits', 'misses', 'evictions', 'invalidations', 'size',
+                'revocations' y 'hit_rate' (None si todavía no hubo consultas)
+        """
+        with self.lock:
+            metrics = dict(self.stats)
+            metrics['size'] = len(self.entries)
+            metrics['revocations'] = len(self.revoked_at)
+        lookups = metrics['hits'] + metrics['misses']
+        metrics['hit_rate'] = metrics['hits'] / lookups if lookups else None
+        return metrics
+
+    def _notify(self, user_id, hit):
+        for callback in list(self.listeners):
+            callback(user_id, hit)
+
+
+# Instancia compartida, se configura con user_cache.init_app(app)
+user_cache = UserIdentityCache()
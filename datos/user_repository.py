@@ -2,7 +2,9 @@
 Capa de Datos - Repositorio de Usuarios
 Contiene todas las operaciones de acceso a datos relacionadas con usuarios
 """
+from datos import password_hasher
 from datos.models import User, db
+from datos.user_cache import UserIdentity, user_cache
 
 
 def create_user(username, password):
@@ -28,6 +30,8 @@ def create_user(username, password):
     
     db.session.add(new_user)
     db.session.commit()
+    # Un ID reutilizado no debe heredar la identidad en caché de un usuario eliminado
+    user_cache.invalidate(new_user.id)
     return new_user
 
 
@@ -44,6 +48,69 @@ def get_user_by_id(user_id):
     return User.query.get(user_id)
 
 
+def load_user_identity(user_id):
+    """
+    Obtiene la identidad de un usuario para el user_loader, pasando por la caché
+    Solo consulta la base (id y username) cuando la entrada no está o venció
+
+    Args:
+        user_id (int): ID del usuario
+
+    Returns:
+        UserIdentity: La identidad o None si el usuario no existe
+    """
+    def query_identity(user_id):
+        row = db.session.query(User.id, User.username).filter(User.id == user_id).first()
+        return UserIdentity(row.id, row.username) if row else None
+
+    return user_cache.get(user_id, query_identity)
+
+
+def is_identity_revoked(user_id, issued_at):
+    """
+    Indica si el usuario se eliminó o cambió su contraseña después de issued_at
+    (según lo registrado en este proceso)
+
+    Args:
+        user_id (int): ID del usuario
+        issued_at (float): Momento de emisión de la credencial
+
+    Returns:
+        bool: True si la credencial ya no es válida
+    """
+    return user_cache.is_revoked(user_id, issued_at)
+
+
+def get_user_cache_metrics():
+    """
+    Métricas de la caché de identidades
+
+    Returns:
+        dict: Aciertos, fallos, tamaño y tasa de aciertos
+    """
+    return user_cache.metrics()
+
+
+def update_user_password(user_id, password):
+    """
+    Cambia la contraseña de un usuario e invalida su identidad en caché
+
+    Args:
+        user_id (int): ID del usuario
+        password (str): Nueva contraseña en texto plano (será hasheada)
+
+    Returns:
+        bool: True si se actualizó, False si el usuario no existe
+    """
+    user = get_user_by_id(user_id)
+    if not user:
+        return False
+    user.set_password(password)
+    db.session.commit()
+    user_cache.invalidate(user_id)
+    return True
+
+
 def get_user_by_username(username):
     """
     Obtiene un usuario por su nombre de usuario
@@ -74,6 +141,45 @@ def verify_user_password(username, password):
     return None
 
 
+def check_password_hash(password_hash, password):
+    """
+    Verifica una contraseña contra un hash y, si coincide pero el hash usa
+    parámetros viejos, calcula el hash nuevo
+    No accede a la base: es el trabajo de CPU que se ejecuta fuera del hilo
+    de la petición
+
+    Args:
+        password_hash (str): Hash guardado del usuario
+        password (str): Contraseña en texto plano
+
+    Returns:
+        tuple: (bool si coincide, hash nuevo o None si no hace falta regenerarlo)
+    """
+    if not password_hasher.verify_password(password_hash, password):
+        return False, None
+    if password_hasher.needs_rehash(password_hash):
+        return True, password_hasher.hash_password(password)
+    return True, None
+
+
+def store_password_hash(user_id, password_hash):
+    """
+    Reemplaza el hash de un usuario por otro de la misma contraseña
+    (regeneración con parámetros nuevos). No invalida la caché de identidades
+    porque la contraseña no cambió
+
+    Args:
+        user_id (int): ID del usuario
+        password_hash (str): Hash nuevo
+
+    Returns:
+        bool: True si se actualizó
+    """
+    updated = User.query.filter_by(id=user_id).update({User.password_hash: password_hash})
+    db.session.commit()
+    return bool(updated)
+
+
 def get_all_users():
     """
     Obtiene todos los usuarios (útil para admin)
@@ -98,5 +204,6 @@ def delete_user(user_id):
     if user:
         db.session.delete(user)
         db.session.commit()
+        user_cache.invalidate(user_id)
         return True
     return False
@@ -1,6 +1,7 @@
 # run.py
 
-from app import app
-
 if __name__ == '__main__':
+    # Importar dentro del bloque: los procesos del pool de qiskit_parallel
+    # vuelven a importar este módulo y no deben cargar la aplicación
+    from app import app
     app.run(debug=True)
@@ -13,8 +13,18 @@ try:
         generate_random_bits,
         generate_random_bases,
         encode_qubit,
-        measure_qubit
+        measure_qubit,
+        circuit_index,
+        get_circuit_table,
+        get_simulator,
+        run_batch,
+        transmit_sequential,
+        transmit_batch,
+        simulate_bb84,
+        simulate_bb84_cached,
+        result_cache_info
     )
+    from business.bb84_parallel import transmit_parallel, shutdown_pool
     BB84_AVAILABLE = True
 except ImportError as e:
     # Si hay incompatibilidad de versiones, saltamos estos tests
@@ -125,3 +135,275 @@ class TestBB84Simulation:
         assert all(b in [0, 1] for b in alice_bits)
         assert all(b in [0, 1] for b in alice_bases)
         assert all(b in [0, 1] for b in bob_bases)
+
+
+@pytest.mark.skipif(not BB84_AVAILABLE, reason="BB84 simulation no disponible")
+class TestBB84Batch:
+    """Tests para el modo de ejecución agrupado (qiskit_batch) y la tabla de circuitos"""
+    
+    def test_circuit_table_sizes(self):
+        """Test: la tabla tiene 8 circuitos sin Eve y 16 con Eve"""
+        assert len(get_circuit_table(False)) == 8
+        assert len(get_circuit_table(True)) == 16
+        assert get_circuit_table(True)[0].num_clbits == 2
+    
+    def test_circuit_index_unique(self):
+        """Test: cada combinación de bit y bases tiene su propio circuito"""
+        plain = {circuit_index(b, a, m) for b in (0, 1) for a in (0, 1) for m in (0, 1)}
+        with_eve = {circuit_index(b, a, m, e) for b in (0, 1) for a in (0, 1) for m in (0, 1) for e in (0, 1)}
+        
+        assert plain == set(range(8))
+        assert with_eve == set(range(16))
+    
+    def test_simulator_is_cached(self):
+        """Test: el backend de Aer se obtiene una sola vez"""
+        assert get_simulator() is get_simulator()
+    
+    def test_run_batch_matching_bases(self):
+        """Test: con bases coincidentes Bob obtiene exactamente los bits de Alice"""
+        n = 300
+        bits = generate_random_bits(n)
+        bases = generate_random_bases(n)
+        
+        bob_results, eve_results = run_batch(bits, bases, bases)
+        
+        assert bob_results == bits
+        assert eve_results is None
+    
+    def test_simulate_bb84_batch_result(self):
+        """Test: el modo batch devuelve el mismo diccionario que el modo secuencial"""
+        result = simulate_bb84(64, has_eve=False, backend='qiskit_batch')
+        expected = simulate_bb84(64, has_eve=False, backend='qiskit')
+        
+        assert result['success'] is True
+        assert result['result'] == 'secure'
+        assert result['error_rate'] == 0
+        assert set(result['final_key']) <= {'0', '1'}
+        assert set(result.keys()) == set(expected.keys())
+    
+    def test_simulate_bb84_unknown_backend(self):
+        """Test: un backend desconocido se rechaza"""
+        with pytest.raises(ValueError):
+            simulate_bb84(64, backend='inexistente')
+
+
+@pytest.mark.skipif(not BB84_AVAILABLE, reason="BB84 simulation no disponible")
+class TestSeededSimulation:
+    """Tests de las simulaciones con semilla"""
+    
+    @pytest.mark.parametrize('backend', ['qiskit', 'qiskit_batch', 'numpy'])
+    def test_same_seed_same_result(self, backend):
+        """Test: con la misma semilla (y Eve) la simulación se repite exactamente"""
+        first = simulate_bb84(80, has_eve=True, backend=backend, seed=2024)
+        second = simulate_bb84(80, has_eve=True, backend=backend, seed=2024)
+        other = simulate_bb84(80, has_eve=True, backend=backend, seed=2025)
+        
+        assert first == second
+        assert first != other
+    
+    def test_seeded_generators(self):
+        """Test: los generadores de bits y bases aceptan un random.Random propio"""
+        import random
+        
+        assert generate_random_bits(50, random.Random(7)) == generate_random_bits(50, random.Random(7))
+        assert generate_random_bases(50, random.Random(7)) == generate_random_bits(50, random.Random(7))
+    
+    def test_result_cache(self):
+        """Test: repetir una simulación con semilla se sirve de la caché sin volver a simular"""
+        first = simulate_bb84_cached(64, True, 'qiskit_batch', 31337)
+        hits = result_cache_info().hits
+        first['final_key'] = 'modificado'
+        first['qber_interval'][0] = -1.0
+        first['qber_interval'].append(2.0)
+        second = simulate_bb84_cached(64, True, 'qiskit_batch', 31337)
+        
+        assert result_cache_info().hits == hits + 1
+        assert second == simulate_bb84(64, has_eve=True, backend='qiskit_batch', seed=31337)
+
+
+@pytest.mark.skipif(not BB84_AVAILABLE, reason="BB84 simulation no disponible")
+class TestNoisyChannel:
+    """Tests del canal ruidoso con el NoiseModel de Aer"""
+    
+    def test_noise_model_error_rates(self):
+        """Test: con despolarización λ=0.2 y bit flip p=0.1 los errores siguen λ/2 y p"""
+        from business.bb84_channel import build_noise_model
+        
+        n = 4000
+        bits = [i % 2 for i in range(n)]
+        bases = [(i // 2) % 2 for i in range(n)]
+        noise_model = build_noise_model((0.2, 0.1, 0.0))
+        outcomes, _ = run_batch(bits, bases, bases, seed_simulator=11, noise_model=noise_model)
+        
+        errors = [outcomes[i] != bits[i] for i in range(n)]
+        rectilinear = sum(errors[i] for i in range(n) if bases[i] == 0) / (n / 2)
+        diagonal = sum(errors[i] for i in range(n) if bases[i] == 1) / (n / 2)
+        # El error X solo se ve en la base rectilínea: 0.1 + 0.1 - 2·0.1·0.1
+        assert rectilinear == pytest.approx(0.18, abs=0.03)
+        assert diagonal == pytest.approx(0.10, abs=0.03)
+        assert len(get_circuit_table(False, True)) == 8
+    
+    @pytest.mark.parametrize('backend', ['qiskit', 'qiskit_batch'])
+    def test_simulate_bb84_noisy_channel(self, backend):
+        """Test: el canal ruidoso es reproducible con semilla e informa los qubits perdidos"""
+        channel = {'depolarizing': 0.05, 'loss': 0.3}
+        first = simulate_bb84(120, backend=backend, seed=8, channel=channel)
+        
+        assert first == simulate_bb84(120, backend=backend, seed=8, channel=channel)
+        assert first['key_length_initial'] == 120
+        assert first['qubits_received'] + first['qubits_lost'] == 120
+        assert 0 < first['qubits_lost'] < 80
+        assert 'channel' not in simulate_bb84(120, backend=backend, seed=8)
+    
+    def test_parallel_backend_rejects_noise(self):
+        """Test: el backend paralelo solo admite el canal ideal"""
+        with pytest.raises(ValueError):
+            simulate_bb84(64, backend='qiskit_parallel', channel={'bit_flip': 0.1})
+
+
+@pytest.mark.skipif(not BB84_AVAILABLE, reason="BB84 simulation no disponible")
+class TestLazyImportAndWarmUp:
+    """Tests del import diferido de Qiskit y del precalentamiento"""
+    
+    def test_numpy_backend_does_not_import_qiskit(self):
+        """Test: importar la simulación y usar el backend numpy no carga Qiskit"""
+        import subprocess
+        
+        script = (
+            'import sys\n'
+            'from business.bb84_simulation import simulate_bb84\n'
+            'assert simulate_bb84(64, backend="numpy", seed=1)["success"]\n'
+            'print("qiskit" in sys.modules, "matplotlib" in sys.modules)\n'
+        )
+        output = subprocess.run([sys.executable, '-c', script], check=True, capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout
+        
+        assert output.split() == ['False', 'False']
+    
+    def test_start_warm_up_modes(self):
+        """Test: 'sync' prepara los backends configurados, 'off' no prepara nada"""
+        from flask import Flask
+        from business.simulation_warmup import start_warm_up, wait_until_ready, warm_up_status
+        
+        warm_app = Flask(__name__)
+        warm_app.config.update(SIMULATION_WARMUP='sync', SIMULATION_WARMUP_BACKENDS='numpy, qiskit_batch, otro')
+        assert start_warm_up(warm_app) is None
+        status = warm_up_status()
+        assert status['ready'] is True
+        assert status['error'] is None
+        assert set(status['timings']) == {'numpy', 'qiskit_batch'}
+        
+        warm_app.config['SIMULATION_WARMUP'] = 'background'
+        start_warm_up(warm_app).join(30)
+        assert wait_until_ready(0)
+        
+        warm_app.config['SIMULATION_WARMUP'] = 'nunca'
+        with pytest.raises(ValueError):
+            start_warm_up(warm_app)
+
+
+def assert_interception_consistent(alice_bits, alice_bases, bob_bases, bob_results, eve_bases, eve_results):
+    """Verifica las reglas deterministas de la intercepción-reenvío de Eve"""
+    for i in range(len(alice_bits)):
+        # Si Eve eligió la base de Alice, leyó su bit sin perturbarlo
+        if eve_bases[i] == alice_bases[i]:
+            assert eve_results[i] == alice_bits[i]
+        # Si Bob eligió la base de Eve, recibe exactamente lo que ella reenvió
+        if bob_bases[i] == eve_bases[i]:
+            assert bob_results[i] == eve_results[i]
+
+
+@pytest.mark.skipif(not BB84_AVAILABLE, reason="BB84 simulation no disponible")
+class TestEveInterception:
+    """Tests para la interceptación de Eve como medición intermedia"""
+    
+    def test_transmit_sequential_with_eve(self, monkeypatch):
+        """Test: con Eve se ejecuta un solo trabajo por qubit"""
+        simulator_class = type(get_simulator())
+        original_run = simulator_class.run
+        calls = []
+        
+        def counting_run(self, *args, **kwargs):
+            calls.append(1)
+            return original_run(self, *args, **kwargs)
+        
+        monkeypatch.setattr(simulator_class, 'run', counting_run)
+        
+        n = 40
+        alice_bits = generate_random_bits(n)
+        alice_bases = generate_random_bases(n)
+        bob_bases = generate_random_bases(n)
+        bob_results, eve_bases, eve_results = transmit_sequential(alice_bits, alice_bases, bob_bases, has_eve=True)
+        
+        assert len(calls) == n
+        assert_interception_consistent(alice_bits, alice_bases, bob_bases, bob_results, eve_bases, eve_results)
+    
+    def test_transmit_batch_with_eve(self):
+        """Test: en modo batch Eve y Bob se leen de la misma memoria"""
+        n = 300
+        alice_bits = generate_random_bits(n)
+        alice_bases = generate_random_bases(n)
+        bob_bases = generate_random_bases(n)
+        bob_results, eve_bases, eve_results = transmit_batch(alice_bits, alice_bases, bob_bases, has_eve=True)
+        
+        assert len(bob_results) == len(eve_results) == n
+        assert_interception_consistent(alice_bits, alice_bases, bob_bases, bob_results, eve_bases, eve_results)
+
+
+@pytest.mark.skipif(not BB84_AVAILABLE, reason="BB84 simulation no disponible")
+class TestBB84Parallel:
+    """Tests para la ejecución por bloques en un pool de procesos"""
+    
+    @pytest.fixture(autouse=True, scope='class')
+    def pool(self):
+        """Detiene el pool de procesos al terminar la clase"""
+        yield
+        shutdown_pool()
+    
+    def test_transmit_parallel_reproducible(self):
+        """Test: la misma semilla reproduce todos los bloques"""
+        first = transmit_parallel(300, has_eve=True, seed=1234, chunk_size=64)
+        second = transmit_parallel(300, has_eve=True, seed=1234, chunk_size=64)
+        
+        for name in ('alice_bits', 'alice_bases', 'bob_bases', 'bob_results', 'eve_bases', 'eve_results'):
+            assert len(first[name]) == 300
+            assert first[name].tolist() == second[name].tolist()
+    
+    def test_transmit_parallel_merges_in_order(self):
+        """Test: los bloques se unen en orden (Bob coincide con Alice en las bases iguales)"""
+        data = transmit_parallel(300, has_eve=False, seed=99, chunk_size=64)
+        matching = data['alice_bases'] == data['bob_bases']
+        
+        assert data['eve_results'] is None
+        assert data['bob_results'][matching].tolist() == data['alice_bits'][matching].tolist()
+    
+    def test_workers_do_not_start_the_app(self, tmp_path):
+        """Test: los procesos del pool reimportan el módulo principal sin arrancar la aplicación"""
+        import json
+        import subprocess
+        
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        script = tmp_path / 'main.py'
+        script.write_text(
+            'import json, sys\n'
+            f'sys.path.insert(0, {root!r})\n'
+            # Como app.py ejecutado directamente: el módulo principal carga la aplicación
+            'import app as application\n'
+            'from business.bb84_parallel import get_process_pool, shutdown_pool\n'
+            'def probe():\n'
+            '    application = sys.modules["app"]\n'
+            '    return [application.SERVING_PROCESS, sorted(application.app.extensions)]\n'
+            'if __name__ == "__main__":\n'
+            '    print(json.dumps([sorted(application.app.extensions), get_process_pool().submit(probe).result()]))\n'
+            '    shutdown_pool()\n'
+        )
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp_path / 'main.db'}", SIMULATION_WARMUP='off',
+                   BB84_PARALLEL_WORKERS='1')
+        output = subprocess.run([sys.executable, str(script)], check=True, capture_output=True, text=True,
+                                cwd=str(tmp_path), env=env).stdout
+        serving, (worker_serving, worker_extensions) = json.loads(output.strip().splitlines()[-1])
+        
+        started = {'simulation_jobs', 'password_verifier', 'session_writer'}
+        assert started <= set(serving)
+        assert worker_serving is False
+        assert not started & set(worker_extensions)
@@ -0,0 +1,131 @@
+"""
+Tests para el backend analítico de NumPy del protocolo BB84
+"""
+import pytest
+import sys
+import os
+
+import numpy as np
+
+# Agregar el directorio TPI al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from business.bb84_channel import normalize_channel
+from business.bb84_numpy import measure_analytic, transmit_numpy, simulate_bb84_numpy, sift_and_estimate
+
+
+class TestBB84Numpy:
+    """Tests para la simulación vectorizada sin Qiskit"""
+    
+    def test_transmit_numpy_arrays(self):
+        """Test: todos los arreglos son uint8 y tienen la longitud pedida"""
+        n = 1000
+        data = transmit_numpy(n, has_eve=True)
+        
+        for name in ('alice_bits', 'alice_bases', 'bob_bases', 'bob_results', 'eve_bases', 'eve_results'):
+            assert data[name].dtype == np.uint8
+            assert len(data[name]) == n
+    
+    def test_transmit_numpy_without_eve(self):
+        """Test: sin Eve, Bob obtiene el bit de Alice cuando las bases coinciden"""
+        data = transmit_numpy(10000, has_eve=False)
+        matching = data['alice_bases'] == data['bob_bases']
+        
+        assert data['eve_results'] is None
+        assert np.array_equal(data['bob_results'][matching], data['alice_bits'][matching])
+    
+    def test_transmit_numpy_with_eve_error_rate(self):
+        """Test: con Eve, el error en la clave filtrada ronda el 25%"""
+        data = transmit_numpy(100000, has_eve=True, rng=np.random.default_rng(7))
+        matching = data['alice_bases'] == data['bob_bases']
+        errors = np.mean(data['bob_results'][matching] != data['alice_bits'][matching])
+        
+        assert 0.22 < errors < 0.28
+    
+    def test_measure_analytic_mismatched_bases(self):
+        """Test: con bases distintas el resultado es una moneda justa"""
+        n = 10000
+        bits = np.zeros(n, dtype=np.uint8)
+        results = measure_analytic(bits, np.zeros(n, dtype=np.uint8), np.ones(n, dtype=np.uint8),
+                                   np.random.default_rng(1))
+        
+        assert 0.45 < results.mean() < 0.55
+    
+    def test_simulate_bb84_numpy_secure(self):
+        """Test: un canal ideal sin Eve produce una clave segura"""
+        result = simulate_bb84_numpy(1000000, has_eve=False)
+        
+        assert result['success'] is True
+        assert result['result'] == 'secure'
+        assert result['error_rate'] == 0
+        assert len(result['final_key']) == result['key_length_final']
+        assert set(result['final_key']) <= {'0', '1'}
+    
+    def test_sift_and_estimate_lists_and_arrays(self):
+        """Test: listas y arreglos dan el mismo resultado y la clave excluye la muestra"""
+        alice_bits = [1, 0, 1, 1, 0, 0, 1, 0] * 20
+        bases = [0, 1] * 80
+        
+        from_lists = sift_and_estimate(alice_bits, bases, bases, alice_bits, np.random.default_rng(5))
+        from_arrays = sift_and_estimate(np.array(alice_bits, dtype=np.uint8), np.array(bases),
+                                        np.array(bases), np.array(alice_bits, dtype=np.uint8),
+                                        np.random.default_rng(5))
+        
+        assert from_lists == from_arrays
+        assert from_lists['result'] == 'secure'
+        # Muestra limitada al 25% de la clave filtrada
+        assert from_lists['sample_size'] == 40
+        assert from_lists['key_length_final'] == 160 - 40
+    
+    def test_sift_and_estimate_counts_errors(self):
+        """Test: si Bob obtiene siempre el bit opuesto, el QBER es 100%"""
+        alice_bits = np.random.default_rng(6).integers(0, 2, size=400, dtype=np.uint8)
+        bases = np.zeros(400, dtype=np.uint8)
+        
+        result = sift_and_estimate(alice_bits, bases, bases, 1 - alice_bits)
+        
+        assert result['result'] == 'compromised'
+        assert result['error_rate'] == 1
+        assert result['matching_bases'] == 400
+
+
+class TestNoisyChannelNumpy:
+    """Tests del canal ruidoso sorteado con NumPy"""
+    
+    def test_noise_raises_sifted_qber(self):
+        """Test: la despolarización aporta λ/2 al QBER y el bit flip p/2 (solo en la base rectilínea)"""
+        rng = np.random.default_rng(5)
+        data = transmit_numpy(200000, rng=rng, channel=normalize_channel({'depolarizing': 0.1, 'bit_flip': 0.2}))
+        matching = data['alice_bases'] == data['bob_bases']
+        errors = data['alice_bits'] != data['bob_results']
+        
+        rectilinear = matching & (data['bob_bases'] == 0)
+        diagonal = matching & (data['bob_bases'] == 1)
+        # Rectilínea: 0.05 + 0.2 - 2·0.05·0.2; diagonal: solo la despolarización
+        assert errors[rectilinear].mean() == pytest.approx(0.23, abs=0.01)
+        assert errors[diagonal].mean() == pytest.approx(0.05, abs=0.01)
+    
+    def test_loss_and_validation(self):
+        """Test: la pérdida descarta qubits antes del filtrado y los parámetros inválidos se rechazan"""
+        result = simulate_bb84_numpy(10000, rng=np.random.default_rng(1), channel=normalize_channel({'loss': 0.5}))
+        
+        assert result['key_length_initial'] == 10000
+        assert result['qubits_received'] + result['qubits_lost'] == 10000
+        assert result['qubits_lost'] == pytest.approx(5000, abs=250)
+        assert result['key_length_after_sifting'] < result['qubits_received']
+        assert result['channel'] == {'depolarizing': 0.0, 'bit_flip': 0.0, 'loss': 0.5}
+        
+        assert normalize_channel({'depolarizing': 0, 'loss': None}) is None
+        for channel in ({'loss': 1}, {'bit_flip': -0.1}, {'gain': 0.1}, {'depolarizing': '0.1'}):
+            with pytest.raises(ValueError):
+                normalize_channel(channel)
+    
+    def test_eve_with_loss(self):
+        """Test: Eve mide solo los qubits que llegan a Bob cuando el canal tiene pérdida"""
+        channel = normalize_channel({'loss': 0.3})
+        data = transmit_numpy(2000, has_eve=True, rng=np.random.default_rng(2), channel=channel)
+        result = simulate_bb84_numpy(2000, has_eve=True, rng=np.random.default_rng(2), channel=channel)
+        
+        assert len(data['eve_bases']) == len(data['eve_results']) == len(data['alice_bits'])
+        assert result['qubits_received'] + result['qubits_lost'] == 2000
+        assert result['result'] == 'compromised'
@@ -0,0 +1,108 @@
+"""
+Tests para la simulación BB84 en streaming (bloques y clave empaquetada)
+"""
+import pytest
+import sys
+import os
+import io
+import tracemalloc
+
+import numpy as np
+
+# Agregar el directorio TPI al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from business import bb84_stream
+from business.bb84_stream import PackedBitWriter, simulate_bb84_stream
+
+
+class TestBB84Stream:
+    """Tests para el pipeline de generadores por bloques"""
+
+    def test_packed_writer_across_blocks(self):
+        """Test: bloques de cualquier tamaño se empaquetan igual que la clave completa"""
+        rng = np.random.default_rng(1)
+        blocks = [rng.integers(0, 2, size=size, dtype=np.uint8) for size in (3, 13, 0, 8, 21, 1)]
+        stream = io.BytesIO()
+        writer = PackedBitWriter(stream)
+        for block in blocks:
+            writer.write(block)
+        writer.close()
+
+        expected = np.concatenate(blocks)
+        unpacked = np.unpackbits(np.frombuffer(stream.getvalue(), dtype=np.uint8))
+
+        assert writer.bits_written == len(expected)
+        assert np.array_equal(unpacked[:len(expected)], expected)
+        assert not unpacked[len(expected):].any()
+
+    def test_stream_without_eve_returns_bytes(self):
+        """Test: sin Eve la clave es segura y se devuelve empaquetada"""
+        result = simulate_bb84_stream(20000, block_size=1000, sample_fraction=0.1, rng=np.random.default_rng(2))
+
+        assert result['success'] is True
+        assert result['result'] == 'secure'
+        assert result['error_rate'] == 0
+        assert result['key_length_final'] == result['key_length_after_sifting'] - result['sample_size']
+        assert len(result['final_key_bytes']) == (result['key_length_final'] + 7) // 8
+
+    def test_stream_with_eve_detected(self, tmp_path):
+        """Test: con Eve se detecta el espionaje y no queda ningún archivo"""
+        output = tmp_path / 'key.bin'
+        result = simulate_bb84_stream(20000, has_eve=True, output=str(output), block_size=1000,
+                                      sample_fraction=0.1, rng=np.random.default_rng(3))
+
+        assert result['result'] == 'compromised'
+        assert result['error_rate'] == pytest.approx(0.25, abs=0.05)
+        assert list(tmp_path.iterdir()) == []
+
+    def test_stream_failure_removes_partial_file(self, tmp_path, monkeypatch):
+        """Test: si el pipeline falla a mitad de camino se borra el archivo parcial y se propaga el error"""
+        sample_blocks = bb84_stream.sample_blocks
+
+        def failing_sample_blocks(sifted_blocks, sample_fraction, rng):
+            blocks = sample_blocks(sifted_blocks, sample_fraction, rng)
+            yield next(blocks)
+            raise RuntimeError('fallo del backend')
+
+        monkeypatch.setattr(bb84_stream, 'sample_blocks', failing_sample_blocks)
+        output = tmp_path / 'key.bin'
+
+        with pytest.raises(RuntimeError, match='fallo del backend'):
+            simulate_bb84_stream(20000, output=str(output), block_size=1000, sample_fraction=0.1,
+                                 rng=np.random.default_rng(5))
+
+        assert list(tmp_path.iterdir()) == []
+
+    def test_stream_qiskit_batch_backend(self):
+        """Test: el pipeline también puede transmitir cada bloque con Qiskit"""
+        result = simulate_bb84_stream(600, backend='qiskit_batch', block_size=200,
+                                      sample_fraction=0.2, rng=np.random.default_rng(4))
+
+        assert result['result'] == 'secure'
+        assert result['error_rate'] == 0
+
+    def test_stream_bounded_memory(self, tmp_path):
+        """Test: la memoria usada depende del bloque, no de la longitud de la clave"""
+        output = tmp_path / 'key.bin'
+        tracemalloc.start()
+        result = simulate_bb84_stream(4_000_000, output=str(output), block_size=65536, sample_fraction=0.01)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        assert result['result'] == 'secure'
+        assert output.stat().st_size == (result['key_length_final'] + 7) // 8
+        # Con listas de Python serían cientos de MB; los bloques ocupan pocos MB
+        assert peak < 8 * 1024 * 1024
+
+    def test_cli_stream_key(self, tmp_path):
+        """Test: el comando `flask stream-key` escribe la clave en el archivo"""
+        output = tmp_path / 'key.bin'
+        runner = app.test_cli_runner()
+        result = runner.invoke(args=['stream-key', '--key-length', '5000', '--output', str(output),
+                                     '--block-size', '1000', '--sample-fraction', '0.1'])
+
+        assert result.exit_code == 0
+        assert output.exists()
+        assert 'Clave final' in result.output
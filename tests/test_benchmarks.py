@@ -0,0 +1,49 @@
+"""
+Tests de la comparación de la suite de benchmarks
+"""
+import json
+import sys
+import os
+
+# Agregar el directorio TPI al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.suite import compare, main, metric
+
+
+def results(**metrics):
+    """Resultados con las métricas indicadas"""
+    return {'created_at': '2026-01-01T00:00:00', 'profile': 'quick', 'environment': {}, 'metrics': metrics}
+
+
+class TestBenchmarkComparison:
+    """Tests de compare y del modo --compare"""
+
+    def test_compare_flags_regressions(self):
+        """Test: se marca lo que empeora más que la tolerancia, según si la métrica debe bajar o subir"""
+        baseline = results(latency=metric(10.0, 'ms'), throughput=metric(500.0, 'sessions/s', False),
+                           faster=metric(10.0, 'ms'), removed=metric(1.0, 'ms'))
+        current = results(latency=metric(13.0, 'ms'), throughput=metric(350.0, 'sessions/s', False),
+                          faster=metric(5.0, 'ms'), added=metric(1.0, 'ms'))
+
+        status = {row['name']: row['status'] for row in compare(baseline, current, tolerance=0.25)}
+
+        assert status == {'latency': 'regression', 'throughput': 'regression', 'faster': 'improvement',
+                          'removed': 'missing', 'added': 'new'}
+        relaxed = {row['name']: row['status'] for row in compare(baseline, current, tolerance=0.5)}
+        assert relaxed['latency'] == 'ok'
+
+    def test_compare_mode_exit_code(self, tmp_path, capsys):
+        """Test: python -m benchmarks --compare termina con 1 si hay regresiones y con 0 si no"""
+        baseline_path = tmp_path / 'baseline.json'
+        current_path = tmp_path / 'current.json'
+        baseline_path.write_text(json.dumps(results(latency=metric(10.0, 'ms'))))
+        current_path.write_text(json.dumps(results(latency=metric(20.0, 'ms'))))
+
+        regressed = main(['--results', str(current_path), '--compare', '--baseline', str(baseline_path)])
+        assert 'REGRESIÓN' in capsys.readouterr().out
+        assert regressed == 1
+
+        saved = main(['--results', str(current_path), '--save-baseline', '--baseline', str(baseline_path)])
+        assert saved == 0
+        assert main(['--results', str(current_path), '--compare', '--baseline', str(baseline_path)]) == 0
@@ -0,0 +1,161 @@
+"""
+Tests del perfil del motor de base de datos (PRAGMAs de SQLite y pool)
+Incluye una prueba de carga con varios procesos escritores concurrentes
+"""
+import pytest
+import sys
+import os
+import multiprocessing
+
+from flask import Flask
+from sqlalchemy import event, text
+
+# Agregar el directorio TPI al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datos import db, session_repository, stats_repository
+from datos.engine import build_engine_options, configure_engine
+from datos.models import User, SimulationSession
+
+WRITERS = 8
+SESSIONS_PER_WRITER = 40
+
+# Marca de la sentencia que crea la fila de user_stats con un upsert
+UPSERT_STATEMENT = 'ON CONFLICT (user_id) DO UPDATE'
+
+
+@pytest.fixture
+def tuned_app(tmp_path):
+    """Aplicación con una base SQLite en archivo y el perfil ajustado"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'engine.db'}"
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = build_engine_options(app.config['SQLALCHEMY_DATABASE_URI'], app.config)
+    db.init_app(app)
+    configure_engine(app)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+class TestEngineProfile:
+    """Tests de las opciones del motor"""
+
+    def test_sqlite_file_options(self):
+        """Test: una base SQLite en archivo usa un pool y el busy_timeout como timeout del driver"""
+        options = build_engine_options('sqlite:////tmp/qsec.db', {'SQLITE_BUSY_TIMEOUT': 2000})
+
+        assert options['connect_args']['timeout'] == 2
+        assert options['pool_size'] == 5
+
+    def test_server_database_pool(self):
+        """Test: una base de servidor recibe un pool con verificación de conexiones"""
+        options = build_engine_options('postgresql://qsec@localhost/qsec', {'DB_POOL_SIZE': '4'})
+
+        assert options['pool_size'] == 4
+        assert options['pool_pre_ping'] is True
+        assert 'connect_args' not in options
+
+    def test_default_profile_and_memory(self):
+        """Test: DB_PROFILE=default y las bases en memoria no cambian la configuración"""
+        assert build_engine_options('sqlite:////tmp/qsec.db', {'DB_PROFILE': 'default'}) == {}
+        assert build_engine_options('sqlite:///:memory:', {}) == {}
+
+    def test_pragmas_applied(self, tuned_app):
+        """Test: cada conexión nueva abre la base en modo WAL con los PRAGMAs del perfil"""
+        pragmas = {name: db.session.execute(text(f'PRAGMA {name}')).scalar()
+                   for name in ('journal_mode', 'synchronous', 'busy_timeout')}
+
+        assert pragmas == {'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 5000}
+
+
+def writer_process(database_uri, user_id, sessions, barrier, results):
+    """
+    Escritor en un proceso aparte, con su propia aplicación y su propio motor
+    (como un worker de gunicorn) sobre el mismo archivo de base de datos
+
+    Args:
+        database_uri (str): URI de la base compartida
+        user_id (int): Usuario dueño de las sesiones
+        sessions (int): Sesiones a guardar
+        barrier (multiprocessing.Barrier): Hace que todos los procesos empiecen a la vez
+        results (multiprocessing.Queue): Recibe (error o None, si se usó el upsert de user_stats)
+    """
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_uri
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = build_engine_options(database_uri, app.config)
+    db.init_app(app)
+    configure_engine(app)
+
+    statements = []
+    error = None
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute',
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+        barrier.wait(timeout=60)
+        try:
+            for i in range(sessions):
+                session_repository.create_session(user_id, 100, i % 2 == 0,
+                                                  'compromised' if i % 4 == 0 else 'secure',
+                                                  final_key='1010' * 8, error_rate=i / 100)
+        except Exception as e:
+            error = repr(e)
+        finally:
+            db.session.remove()
+            db.engine.dispose()
+    results.put((error, any(UPSERT_STATEMENT in statement for statement in statements)))
+
+
+def run_writer_processes(database_uri, user_ids, sessions):
+    """
+    Lanza un proceso escritor por usuario y espera sus resultados
+
+    Returns:
+        list: (error o None, si se usó el upsert) de cada proceso
+    """
+    context = multiprocessing.get_context('spawn')
+    barrier = context.Barrier(len(user_ids))
+    results = context.Queue()
+    processes = [context.Process(target=writer_process, args=(database_uri, user_id, sessions, barrier, results))
+                 for user_id in user_ids]
+    for process in processes:
+        process.start()
+    outcomes = [results.get(timeout=120) for _ in processes]
+    for process in processes:
+        process.join(timeout=30)
+    assert [process.exitcode for process in processes] == [0] * len(processes)
+    return outcomes
+
+
+class TestConcurrentWriters:
+    """Prueba de carga: varios procesos, cada uno con su propio motor, guardan sesiones a la vez"""
+
+    def test_concurrent_create_session(self, tuned_app):
+        """Test: procesos escritores concurrentes no fallan con "database is locked" ni pierden filas"""
+        users = [User(username=f'writer{i}', password_hash='-') for i in range(WRITERS)]
+        db.session.add_all(users)
+        db.session.commit()
+        user_ids = [user.id for user in users]
+
+        outcomes = run_writer_processes(tuned_app.config['SQLALCHEMY_DATABASE_URI'], user_ids, SESSIONS_PER_WRITER)
+
+        assert [error for error, _ in outcomes] == [None] * WRITERS
+        assert SimulationSession.query.count() == WRITERS * SESSIONS_PER_WRITER
+        assert stats_repository.check_user_stats() == []
+        assert stats_repository.get_user_stats(user_ids[0]).total_simulations == SESSIONS_PER_WRITER
+
+    def test_first_sessions_of_same_user(self, tuned_app):
+        """Test: las primeras sesiones simultáneas de un usuario crean su fila de estadísticas con un upsert"""
+        user = User(username='racer', password_hash='-')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+
+        outcomes = run_writer_processes(tuned_app.config['SQLALCHEMY_DATABASE_URI'], [user_id] * WRITERS, 1)
+
+        assert [error for error, _ in outcomes] == [None] * WRITERS
+        assert stats_repository.get_user_stats(user_id).total_simulations == WRITERS
+        assert stats_repository.check_user_stats() == []
+        assert all(upserted for _, upserted in outcomes)
@@ -0,0 +1,122 @@
+"""
+Tests para los experimentos Monte-Carlo del protocolo BB84
+"""
+import pytest
+import sys
+import os
+import json
+
+# Agregar el directorio TPI al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from datos.models import User, SimulationSession, ExperimentSummary
+from business import experiment_controller
+
+
+@pytest.fixture
+def client():
+    """Crea un cliente de prueba con base de datos temporal"""
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    
+    with app.app_context():
+        db.create_all()
+        yield app.test_client()
+        db.session.remove()
+        db.drop_all()
+
+
+class TestExperimentController:
+    """Tests del controlador de experimentos"""
+    
+    def test_stream_experiment_events(self, client, monkeypatch):
+        """Test: se informa el progreso por lotes y se guarda un único resumen"""
+        monkeypatch.setattr(experiment_controller, 'BATCH_QUBITS', 256 * 100)  # Lotes de 100 ensayos
+        
+        with app.app_context():
+            events = list(experiment_controller.stream_experiment(None, 256, False, 350, seed=1))
+            
+            assert [event['event'] for event in events] == ['progress'] * 4 + ['summary']
+            assert [event['trials_done'] for event in events[:4]] == [100, 200, 300, 350]
+            
+            summary = events[-1]
+            assert summary['detection_rate'] == 0.0
+            assert sum(summary['qber_histogram']['counts']) == 350
+            assert ExperimentSummary.query.count() == 1
+            assert SimulationSession.query.count() == 0
+    
+    def test_experiment_detects_eve(self, client):
+        """Test: con Eve casi todos los ensayos detectan el espionaje"""
+        with app.app_context():
+            summary = experiment_controller.run_experiment(None, 256, True, 2000, seed=7)
+            
+            assert summary['detection_rate'] > 0.8
+            assert 0.2 < summary['mean_error_rate'] < 0.3
+    
+    def test_experiment_reproducible(self, client):
+        """Test: la misma semilla reproduce las estadísticas"""
+        with app.app_context():
+            first = experiment_controller.run_experiment(None, 64, True, 500, seed=3)
+            second = experiment_controller.run_experiment(None, 64, True, 500, seed=3)
+            
+            assert first['qber_histogram'] == second['qber_histogram']
+            assert first['detection_rate'] == second['detection_rate']
+    
+    def test_experiment_validation(self, client):
+        """Test: parámetros fuera de rango se rechazan sin guardar nada"""
+        with app.app_context():
+            result = experiment_controller.run_experiment(None, 5, False, 10)
+            
+            assert result['event'] == 'error'
+            assert result['success'] is False
+            
+            # Semilla inválida y experimento por encima del presupuesto de qubits
+            for seed in ('abc', -1, True):
+                assert experiment_controller.run_experiment(None, 64, False, 10, seed=seed)['event'] == 'error'
+            too_many_trials = experiment_controller.MAX_EXPERIMENT_QUBITS // 1000 + 1
+            assert experiment_controller.validate_experiment(1000, too_many_trials) is not None
+            assert experiment_controller.validate_experiment(1000, too_many_trials - 1) is None
+            assert ExperimentSummary.query.count() == 0
+
+
+class TestExperimentInterfaces:
+    """Tests de la API y la línea de comandos"""
+    
+    def test_api_streams_ndjson(self, client):
+        """Test: la API responde una línea JSON por evento"""
+        with app.app_context():
+            user = User(username='scientist')
+            user.set_password('password123')
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+        
+        with client.session_transaction() as sess:
+            sess['_user_id'] = str(user_id)
+            sess['_fresh'] = True
+        
+        response = client.post('/api/experiments', json={'key_length': 128, 'trials': 300, 'has_eve': True})
+        events = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        assert events[-1]['event'] == 'summary'
+        
+        listed = client.get('/api/experiments').get_json()
+        assert listed['experiments'][0]['id'] == events[-1]['experiment_id']
+        
+        # Los parámetros inválidos se rechazan con 400 antes de empezar el stream
+        bad_seed = client.post('/api/experiments', json={'key_length': 128, 'trials': 10, 'seed': 'abc'})
+        too_large = client.post('/api/experiments', json={'key_length': 100000, 'trials': 1000000})
+        assert bad_seed.status_code == 400
+        assert too_large.status_code == 400
+        assert too_large.mimetype == 'application/json'
+    
+    def test_cli_experiment(self, client):
+        """Test: el comando `flask experiment` imprime el resumen"""
+        runner = app.test_cli_runner()
+        result = runner.invoke(args=['experiment', '--key-length', '64', '--trials', '200', '--eve', '--seed', '5'])
+        
+        assert result.exit_code == 0
+        assert 'Tasa de detección' in result.output
@@ -139,3 +139,192 @@ class TestBB84Integration:
             assert saved_session is not None
             assert saved_session.result == 'compromised'
             assert saved_session.final_key == '10101010'
+    
+    def test_run_simulation_key_length_cap(self, client):
+        """Test: el límite de longitud depende del backend elegido"""
+        from business.simulation_controller import run_bb84_simulation
+        
+        with app.app_context():
+            user = User(username='numpyuser')
+            user.set_password('password123')
+            db.session.add(user)
+            db.session.commit()
+            
+            rejected = run_bb84_simulation(user.id, 5000, False, backend='qiskit_batch')
+            accepted = run_bb84_simulation(user.id, 5000, False, backend='numpy')
+            
+            assert rejected['success'] is False
+            assert accepted['success'] is True
+            assert accepted['simulation_details']['key_length_initial'] == 5000
+    
+    def test_user_statistics_maintained(self, client):
+        """Test: crear y eliminar sesiones actualiza las estadísticas del usuario"""
+        from business.simulation_controller import get_user_statistics
+        from datos import session_repository
+        
+        with app.app_context():
+            user = User(username='statsuser')
+            user.set_password('password123')
+            db.session.add(user)
+            db.session.commit()
+            
+            sessions = [
+                session_repository.create_session(user.id, 100, result == 'compromised', result, error_rate=error_rate)
+                for result, error_rate in (('secure', 0.0), ('secure', 0.05), ('compromised', 0.25), ('secure', None))
+            ]
+            
+            stats = get_user_statistics(user.id)
+            empty = get_user_statistics(user.id + 1)
+            
+            assert stats['total_simulations'] == 4
+            assert stats['secure_simulations'] == 3
+            assert stats['compromised_simulations'] == 1
+            assert stats['success_rate'] == 75.0
+            assert stats['average_error_rate'] == pytest.approx(0.1)
+            assert stats['last_run_at'] is not None
+            assert empty['total_simulations'] == 0
+            assert empty['average_error_rate'] is None
+            
+            session_repository.delete_session(sessions[2].id)
+            stats = get_user_statistics(user.id)
+            
+            assert stats['total_simulations'] == 3
+            assert stats['compromised_simulations'] == 0
+            assert stats['average_error_rate'] == pytest.approx(0.025)
+            
+            indexes = {index['name'] for index in db.inspect(db.engine).get_indexes('simulation_session')}
+            assert 'ix_simulation_session_user_result' in indexes
+    
+    def test_stats_rebuild_and_check(self, client):
+        """Test: `flask stats check` detecta sesiones sin contar y `rebuild` las corrige"""
+        from business.simulation_controller import get_user_statistics
+        
+        with app.app_context():
+            user = User(username='backfill')
+            user.set_password('password123')
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+            
+            # Sesiones guardadas sin pasar por el repositorio (como en una base anterior)
+            for result in ('secure', 'compromised', 'secure'):
+                db.session.add(SimulationSession(key_length=100, has_eve=False, result=result,
+                                                 error_rate=0.1, user_id=user_id))
+            db.session.commit()
+        
+        runner = app.test_cli_runner()
+        before = runner.invoke(args=['stats', 'check'])
+        rebuilt = runner.invoke(args=['stats', 'rebuild'])
+        after = runner.invoke(args=['stats', 'check'])
+        
+        assert before.exit_code != 0
+        assert 'total_simulations' in before.output
+        assert rebuilt.exit_code == 0
+        assert after.exit_code == 0
+        
+        with app.app_context():
+            stats = get_user_statistics(user_id)
+            assert stats['total_simulations'] == 3
+            assert stats['secure_simulations'] == 2
+            assert stats['error_rate_std'] == pytest.approx(0.0, abs=1e-6)
+    
+    def test_history_keyset_pagination(self, client):
+        """Test: `/api/history` recorre todas las sesiones por cursor, sin repetir ni saltear"""
+        from datetime import datetime, timedelta
+        from sqlalchemy import text
+        
+        with app.app_context():
+            user = User(username='pager')
+            user.set_password('password123')
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+            
+            # Varias sesiones comparten timestamp: el id desempata el orden
+            start = datetime(2024, 1, 1)
+            for i in range(45):
+                db.session.add(SimulationSession(key_length=100 + i, has_eve=False, result='secure',
+                                                 final_key='1' * 30, timestamp=start + timedelta(seconds=i // 3),
+                                                 user_id=user_id))
+            db.session.commit()
+            expected = [s.id for s in SimulationSession.query.filter_by(user_id=user_id).order_by(
+                SimulationSession.timestamp.desc(), SimulationSession.id.desc())]
+            
+            plan = db.session.execute(text(
+                'EXPLAIN QUERY PLAN SELECT id FROM simulation_session WHERE user_id = 1 '
+                'ORDER BY timestamp DESC, id DESC LIMIT 21'
+            )).all()
+            assert 'ix_simulation_session_user_timestamp' in plan[0][3]
+        
+        with client.session_transaction() as sess:
+            sess['_user_id'] = str(user_id)
+            sess['_fresh'] = True
+        
+        seen = []
+        cursor = None
+        while True:
+            url = '/api/history?limit=20' + (f'&cursor={cursor}' if cursor else '')
+            page = client.get(url).get_json()
+            seen += [session['id'] for session in page['sessions']]
+            assert 'final_key' not in page['sessions'][0]
+            assert page['sessions'][0]['final_key_preview'] == '1' * 20
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+        
+        assert seen == expected
+        assert client.get('/api/history?cursor=not-a-cursor').status_code == 400
+        assert b'Cargar m' in client.get('/history').data
+    
+    def test_replay_session(self, client):
+        """Test: una sesión guardada se reproduce con su semilla y las repeticiones salen de la caché"""
+        from business.bb84_simulation import result_cache_info
+        from business.simulation_controller import run_bb84_simulation
+        
+        with app.app_context():
+            user = User(username='replayer')
+            user.set_password('password123')
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+            
+            run = run_bb84_simulation(user_id, 120, True, backend='qiskit_batch', seed=42)
+            session_id = run['session']['id']
+            assert run['session']['seed'] == 42
+            assert run['session']['backend'] == 'qiskit_batch'
+            assert run_bb84_simulation(user_id, 120, True, seed=-1)['success'] is False
+        
+        with client.session_transaction() as sess:
+            sess['_user_id'] = str(user_id)
+            sess['_fresh'] = True
+        
+        hits = result_cache_info().hits
+        replay = client.get(f'/api/sessions/{session_id}/replay').get_json()
+        
+        assert replay['replayed'] is True
+        assert replay['session']['final_key'] == run['session']['final_key']
+        assert replay['simulation_details'] == run['simulation_details']
+        assert result_cache_info().hits == hits + 1
+        assert client.get(f'/api/sessions/{session_id + 1}/replay').status_code == 404
+    
+    def test_noisy_channel_session(self, client):
+        """Test: los parámetros del canal se guardan con la sesión y se reutilizan al reproducirla"""
+        from business.simulation_controller import replay_simulation, run_bb84_simulation
+        
+        with app.app_context():
+            user = User(username='noisy')
+            user.set_password('password123')
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+            
+            channel = {'depolarizing': 0.02, 'bit_flip': 0.01, 'loss': 0.25}
+            run = run_bb84_simulation(user_id, 400, False, backend='numpy', seed=9, channel=channel)
+            replay = replay_simulation(run['session']['id'], user_id)
+            
+            assert run['session']['channel'] == channel
+            assert run['simulation_details']['qubits_lost'] > 0
+            assert replay['simulation_details'] == run['simulation_details']
+            assert run_bb84_simulation(user_id, 400, False, channel={'loss': 2})['success'] is False
+            assert run_bb84_simulation(user_id, 400, False, backend='qiskit_parallel',
+                                       channel=channel)['success'] is False
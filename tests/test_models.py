@@ -10,6 +10,8 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app import app, db
 from datos.models import User, SimulationSession
+from datos.migrations import upgrade_schema
+from sqlalchemy import text
 from datetime import datetime
 
 
@@ -150,3 +152,93 @@ class TestSimulationSessionModel:
             
             # La sesión debería tener una representación
             assert str(session.id) is not None
+    
+    def test_session_packed_key(self, client):
+        """Test: la clave se guarda empaquetada y se recupera igual"""
+        with app.app_context():
+            user = User(username='testuser5')
+            user.set_password('pass123')
+            db.session.add(user)
+            db.session.commit()
+            
+            key = '1011001' * 143  # 1001 bits
+            session = SimulationSession(key_length=2048, has_eve=False, result='secure',
+                                        final_key=key, user_id=user.id)
+            db.session.add(session)
+            db.session.commit()
+            session_id = session.id
+            db.session.expunge_all()
+            
+            saved = db.session.get(SimulationSession, session_id)
+            assert saved.final_key_length == 1001
+            assert len(saved.key_bits) == 126
+            assert saved.final_key == key
+    
+    def test_session_listing_defers_key(self, client):
+        """Test: listar sesiones no carga la clave completa, solo un adelanto"""
+        with app.app_context():
+            user = User(username='testuser6')
+            user.set_password('pass123')
+            db.session.add(user)
+            db.session.commit()
+            
+            user_id = user.id
+            db.session.add(SimulationSession(key_length=512, has_eve=False, result='secure',
+                                             final_key='01' * 100, user_id=user_id))
+            db.session.commit()
+            db.session.expunge_all()
+            
+            listed = SimulationSession.query.filter_by(user_id=user_id).first()
+            data = listed.to_dict()
+            
+            assert 'key_bits' not in listed.__dict__
+            assert data['final_key_preview'] == '01' * 10
+            assert data['final_key_length'] == 200
+            assert 'final_key' not in data
+    
+    def test_legacy_text_keys_migrated(self, client):
+        """Test: una base con el esquema anterior (clave como texto) se migra"""
+        with app.app_context():
+            user = User(username='testuser7')
+            user.set_password('pass123')
+            db.session.add(user)
+            db.session.commit()
+            
+            # Recrear la tabla con el esquema anterior
+            SimulationSession.__table__.drop(db.engine)
+            with db.engine.begin() as connection:
+                connection.execute(text(
+                    'CREATE TABLE simulation_session (id INTEGER PRIMARY KEY, key_length INTEGER NOT NULL, '
+                    'has_eve BOOLEAN NOT NULL, result VARCHAR(50) NOT NULL, final_key TEXT, error_rate FLOAT, '
+                    'timestamp DATETIME NOT NULL, user_id INTEGER NOT NULL)'
+                ))
+                connection.execute(text(
+                    "INSERT INTO simulation_session (key_length, has_eve, result, final_key, timestamp, user_id) "
+                    "VALUES (128, 0, 'secure', '110100111', '2024-01-01 00:00:00', :user_id)"
+                ), {'user_id': user.id})
+            
+            assert upgrade_schema() == 1
+            assert upgrade_schema() == 0
+            
+            migrated = SimulationSession.query.first()
+            assert migrated.final_key == '110100111'
+            assert migrated.final_key_length == 9
+            assert migrated.legacy_final_key is None
+            assert migrated.to_dict(include_key=True)['final_key_base64'] == '04A='
+    
+    def test_stale_index_recreated(self, client):
+        """Test: un índice declarado que en la base tiene otras columnas se vuelve a crear"""
+        with app.app_context():
+            index = next(index for index in SimulationSession.__table__.indexes
+                         if index.name == 'ix_simulation_session_user_result')
+            # Definición anterior del índice, sin error_rate
+            with db.engine.begin() as connection:
+                index.drop(connection)
+                connection.execute(text(f'CREATE INDEX {index.name} ON simulation_session (user_id, result)'))
+            
+            upgrade_schema()
+            upgrade_schema()
+            
+            indexes = {existing['name']: existing['column_names']
+                       for existing in db.inspect(db.engine).get_indexes('simulation_session')}
+            assert indexes[index.name] == ['user_id', 'result', 'error_rate']
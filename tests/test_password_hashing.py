@@ -0,0 +1,139 @@
+"""
+Tests del hash de contraseñas configurable y de la verificación acotada
+"""
+import pytest
+import sys
+import os
+import threading
+
+from flask import Flask
+
+# Agregar el directorio TPI al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from business import auth_controller
+from business.password_verifier import PasswordVerifier
+from datos import password_hasher, user_repository
+
+
+@pytest.fixture
+def client():
+    """Crea un cliente de prueba con parámetros de hash baratos"""
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    password_hasher.set_hash_method('pbkdf2:sha256:1000')
+
+    with app.app_context():
+        db.create_all()
+        yield app.test_client()
+        db.session.remove()
+        db.drop_all()
+    password_hasher.set_hash_method(app.config['PASSWORD_HASH_METHOD'])
+
+
+class TestPasswordHashing:
+    """Tests de los parámetros de hash"""
+
+    def test_rehash_on_login(self, client):
+        """Test: al cambiar los parámetros, el hash se regenera en el siguiente inicio de sesión"""
+        user_repository.create_user('rehashed', 'password123')
+        old_hash = user_repository.get_user_by_username('rehashed').password_hash
+        assert old_hash.startswith('pbkdf2:sha256:1000$')
+
+        password_hasher.set_hash_method('pbkdf2:sha256:2000')
+        assert password_hasher.needs_rehash(old_hash)
+        assert auth_controller.authenticate_user('rehashed', 'password123')['success'] is True
+
+        new_hash = user_repository.get_user_by_username('rehashed').password_hash
+        assert new_hash.startswith('pbkdf2:sha256:2000$')
+        assert not password_hasher.needs_rehash(new_hash)
+
+        # Con la contraseña incorrecta no se regenera nada
+        assert auth_controller.authenticate_user('rehashed', 'wrongpassword')['success'] is False
+        assert user_repository.get_user_by_username('rehashed').password_hash == new_hash
+
+    def test_default_method_matches_existing_hashes(self):
+        """Test: 'scrypt' equivale a los parámetros por defecto, así que los hashes actuales no se regeneran"""
+        assert password_hasher.method_prefix('scrypt') == 'scrypt:32768:8:1'
+
+    def test_hashes_fit_column(self, client):
+        """Test: los hashes de los métodos configurables entran en la columna y las bases de servidor se amplían"""
+        from sqlalchemy.dialects import mysql, postgresql
+        from werkzeug.security import generate_password_hash
+        from datos.migrations import widen_column_statement, widen_string_columns
+        from datos.models import User
+
+        length = User.__table__.c.password_hash.type.length
+        for method in ('scrypt', 'scrypt:16384:16:2', 'pbkdf2:sha512:100000'):
+            assert len(generate_password_hash('password123', method)) <= length
+
+        assert widen_column_statement(postgresql.dialect(), 'user', 'password_hash', 255, False) == \
+            'ALTER TABLE "user" ALTER COLUMN password_hash TYPE VARCHAR(255)'
+        assert widen_column_statement(mysql.dialect(), 'user', 'password_hash', 255, False) == \
+            'ALTER TABLE user MODIFY password_hash VARCHAR(255) NOT NULL'
+        # SQLite no controla el largo: no hay nada que migrar
+        assert widen_string_columns('user', {'password_hash': length}) == []
+
+
+class TestPasswordVerifier:
+    """Tests del pool acotado de verificación"""
+
+    def test_rejects_when_full(self, monkeypatch):
+        """Test: con el cupo lleno la verificación se rechaza sin esperar"""
+        verifier_app = Flask(__name__)
+        verifier_app.config.update(PASSWORD_VERIFY_WORKERS=1, PASSWORD_VERIFY_QUEUE=1)
+        verifier = PasswordVerifier(verifier_app)
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_check(password_hash, password):
+            started.set()
+            release.wait(5)
+            return True, None
+
+        monkeypatch.setattr(user_repository, 'check_password_hash', slow_check)
+        results = []
+        worker = threading.Thread(target=lambda: results.append(verifier.verify('hash', 'password')))
+        worker.start()
+        assert started.wait(5)
+
+        assert verifier.verify('hash', 'password') is None
+        release.set()
+        worker.join()
+
+        assert results == [(True, None)]
+        assert verifier.metrics() == {'verified': 1, 'rejected': 1, 'rehashed': 0}
+        assert verifier.verify('hash', 'password') == (True, None)
+        verifier.shutdown()
+
+    def test_login_busy_returns_503(self, client, monkeypatch):
+        """Test: si el pool rechaza la verificación, /login responde 503"""
+        from business.password_verifier import password_verifier
+
+        user_repository.create_user('busyuser', 'password123')
+        monkeypatch.setattr(password_verifier, 'verify', lambda password_hash, password: None)
+        app.config['WTF_CSRF_ENABLED'] = False
+        try:
+            response = client.post('/login', data={'username': 'busyuser', 'password': 'password123'})
+        finally:
+            app.config.pop('WTF_CSRF_ENABLED')
+
+        assert response.status_code == 503
+
+    def test_change_password_uses_verifier(self, client, monkeypatch):
+        """Test: cambiar la contraseña verifica la actual en el pool y respeta su rechazo por carga"""
+        from business import auth_controller
+        from business.password_verifier import password_verifier
+
+        user = user_repository.create_user('changer', 'password123')
+        calls = []
+        monkeypatch.setattr(password_verifier, 'verify',
+                            lambda password_hash, password: calls.append(password) or None)
+
+        result = auth_controller.change_password(user.id, 'password123', 'newpassword')
+
+        assert calls == ['password123']
+        assert result['success'] is False
+        assert result['reason'] == 'busy'
+        assert user_repository.get_user_by_id(user.id).check_password('password123')
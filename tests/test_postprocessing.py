@@ -0,0 +1,87 @@
+"""
+Tests del post-procesamiento de la clave (Cascade y amplificación de privacidad)
+"""
+import pytest
+import sys
+import os
+
+import numpy as np
+
+# Agregar el directorio TPI al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from business.bb84_numpy import simulate_bb84_numpy
+from business.bb84_postprocessing import binary_entropy, cascade, secret_key_length, toeplitz_hash
+from datos import user_repository
+
+
+@pytest.fixture
+def user_id():
+    """Crea un usuario en una base de datos temporal"""
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+
+    with app.app_context():
+        db.create_all()
+        yield user_repository.create_user('amplifier', 'password123').id
+        db.session.remove()
+        db.drop_all()
+
+
+class TestPostProcessing:
+    """Tests de las etapas de post-procesamiento"""
+
+    def test_toeplitz_hash_matches_matrix_product(self):
+        """Test: el producto por FFT coincide con la matriz de Toeplitz explícita módulo 2"""
+        rng = np.random.default_rng(3)
+        bits = rng.integers(0, 2, size=300, dtype=np.uint8)
+        seed_bits = rng.integers(0, 2, size=300 + 120 - 1, dtype=np.uint8)
+        matrix = seed_bits[np.arange(120)[:, None] - np.arange(300)[None, :] + 300 - 1]
+
+        assert toeplitz_hash(bits, 120, seed_bits).tolist() == (matrix.astype(int) @ bits % 2).tolist()
+        assert len(toeplitz_hash(bits, 0, seed_bits)) == 0
+
+    def test_cascade_corrects_errors(self):
+        """Test: Cascade deja la clave de Bob igual a la de Alice revelando cerca de n·h(QBER) bits"""
+        rng = np.random.default_rng(4)
+        alice_key = rng.integers(0, 2, size=50000, dtype=np.uint8)
+        bob_key = alice_key ^ (rng.random(50000) < 0.05).astype(np.uint8)
+
+        corrected, stats = cascade(alice_key, bob_key, 0.05, rng)
+
+        assert corrected.tolist() == alice_key.tolist()
+        assert stats['corrected_errors'] == int(np.count_nonzero(alice_key != bob_key))
+        assert 50000 * binary_entropy(0.05) < stats['leaked_bits'] < 1.5 * 50000 * binary_entropy(0.05)
+
+    def test_simulation_reports_key_rate(self):
+        """Test: la clave final es la amplificada e informa bits filtrados y tasa de clave secreta"""
+        result = simulate_bb84_numpy(20000, rng=np.random.default_rng(5), post_processing=True)
+        stage = result['post_processing']
+        sifted = result['key_length_after_sifting'] - result['sample_size']
+
+        assert stage['keys_match'] is True
+        assert stage['residual_errors'] == 0
+        assert result['key_length_final'] == len(result['final_key'])
+        # Sin errores, la amplificación usa la cota superior del QBER de la muestra
+        qber_bound = result['qber_interval'][1]
+        assert result['key_length_final'] == secret_key_length(sifted, qber_bound, stage['leaked_bits'])
+        assert result['secret_key_rate'] == result['key_length_final'] / 20000
+
+        compromised = simulate_bb84_numpy(2000, has_eve=True, rng=np.random.default_rng(5), post_processing=True)
+        assert compromised['result'] == 'compromised'
+        assert compromised['secret_key_rate'] == 0.0
+
+    def test_post_processed_session_replay(self, user_id):
+        """Test: la sesión recuerda que se post-procesó y la reproducción devuelve la misma clave"""
+        from business.simulation_controller import replay_simulation, run_bb84_simulation
+
+        with app.app_context():
+            run = run_bb84_simulation(user_id, 5000, False, backend='numpy', seed=12, post_processing=True)
+            replay = replay_simulation(run['session']['id'], user_id)
+
+            assert run['session']['post_processed'] is True
+            assert run['simulation_details']['secret_key_rate'] > 0
+            assert replay['session']['final_key'] == run['session']['final_key']
+            assert replay['simulation_details'] == run['simulation_details']
+            assert run_bb84_simulation(user_id, 500, False, post_processing='sí')['success'] is False
@@ -0,0 +1,141 @@
+"""
+Tests de regresión de los planes de consulta de session_repository
+Siembra una base SQLite con 10^6 sesiones (CTE recursiva), ejecuta las
+consultas frecuentes del repositorio y revisa su EXPLAIN QUERY PLAN: ninguna
+puede recorrer la tabla completa ni ordenar con un B-tree temporal
+"""
+import pytest
+import sys
+import os
+
+from flask import Flask
+from sqlalchemy import event, text
+
+# Agregar el directorio TPI al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datos import db, session_repository, stats_repository
+from datos.models import SimulationSession
+
+# Filas sembradas (se puede reducir por entorno para una corrida rápida)
+SEED_ROWS = int(os.getenv('QUERY_PLAN_ROWS', 1000000))
+SEED_USERS = 1000
+
+
+def seed(connection):
+    """Inserta usuarios y sesiones con CTE recursivas, sin pasar por el ORM"""
+    connection.execute(text(
+        'WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n WHERE x < :users) '
+        "INSERT INTO user (id, username, password_hash) SELECT x, 'user' || x, '-' FROM n"
+    ), {'users': SEED_USERS})
+    # Mismo formato de timestamp que usa SQLAlchemy para DateTime en SQLite
+    connection.execute(text(
+        'WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n WHERE x < :rows) '
+        'INSERT INTO simulation_session '
+        '(id, key_length, has_eve, result, error_rate, final_key_length, timestamp, user_id) '
+        "SELECT x, 256, x % 2, CASE WHEN x % 3 = 0 THEN 'compromised' ELSE 'secure' END, "
+        "(x % 30) / 100.0, 100, strftime('%Y-%m-%d %H:%M:%S', '2024-01-01', '+' || (x / 2) || ' seconds') "
+        "|| '.000000', (x % :users) + 1 FROM n"
+    ), {'rows': SEED_ROWS, 'users': SEED_USERS})
+
+
+@pytest.fixture(scope='module')
+def seeded_app(tmp_path_factory):
+    """Aplicación con una base SQLite propia sembrada con SEED_ROWS sesiones"""
+    path = tmp_path_factory.mktemp('plans') / 'plans.db'
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        indexes = list(SimulationSession.__table__.indexes)
+
+        # Sembrar sin índices y crearlos al final es mucho más rápido
+        with db.engine.begin() as connection:
+            connection.exec_driver_sql('PRAGMA journal_mode = OFF')
+            connection.exec_driver_sql('PRAGMA synchronous = OFF')
+            for index in indexes:
+                index.drop(connection)
+            seed(connection)
+            for index in indexes:
+                index.create(connection)
+            connection.exec_driver_sql('ANALYZE')
+
+        yield app
+        db.session.remove()
+
+
+def query_plans(func, *args):
+    """
+    Ejecuta una función del repositorio y devuelve el plan de cada consulta
+
+    Returns:
+        list: (sql, lista de pasos del plan) por consulta ejecutada
+    """
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    try:
+        func(*args)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', capture)
+
+    connection = db.session.connection()
+    return [
+        (statement, [row[3] for row in connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters)])
+        for statement, parameters in statements
+    ]
+
+
+def assert_indexed(plans):
+    """Falla si algún paso recorre una tabla completa o usa un B-tree temporal"""
+    assert plans
+    for statement, steps in plans:
+        for step in steps:
+            assert 'TEMP B-TREE' not in step, f'Ordenamiento temporal en: {statement}\n{steps}'
+            assert not (step.startswith('SCAN') and 'INDEX' not in step), f'Recorrido completo en: {statement}\n{steps}'
+
+
+class TestSessionQueryPlans:
+    """Planes de las consultas frecuentes sobre simulation_session"""
+
+    def test_get_user_sessions(self, seeded_app):
+        """Test: el historial de un usuario se lee ordenado desde el índice"""
+        with seeded_app.app_context():
+            assert_indexed(query_plans(session_repository.get_user_sessions, 7, 10))
+            assert_indexed(query_plans(session_repository.get_user_sessions, 7))
+
+    def test_count_user_sessions(self, seeded_app):
+        """Test: el conteo por usuario se resuelve solo con el índice"""
+        with seeded_app.app_context():
+            plans = query_plans(session_repository.count_user_sessions, 7)
+            assert_indexed(plans)
+            assert 'COVERING INDEX' in plans[0][1][0]
+
+    def test_get_all_sessions(self, seeded_app):
+        """Test: las últimas sesiones del sistema se leen en el orden del índice de timestamp"""
+        with seeded_app.app_context():
+            assert_indexed(query_plans(session_repository.get_all_sessions, 10))
+
+    def test_user_session_page(self, seeded_app):
+        """Test: las páginas siguientes saltan al cursor por el índice"""
+        with seeded_app.app_context():
+            sessions, has_more = session_repository.get_user_session_page(7, 20)
+            before = (sessions[-1]['timestamp'], sessions[-1]['id'])
+            plans = query_plans(session_repository.get_user_session_page, 7, 20, before)
+            next_page, _ = session_repository.get_user_session_page(7, 20, before)
+
+            assert has_more
+            assert_indexed(plans)
+            assert 'timestamp<?' in plans[0][1][0]
+            assert next_page[0]['id'] < sessions[-1]['id']
+
+    def test_primary_key_reads(self, seeded_app):
+        """Test: las lecturas por ID usan la clave primaria"""
+        with seeded_app.app_context():
+            assert_indexed(query_plans(session_repository.get_session_by_id, 5))
+            assert_indexed(query_plans(stats_repository.get_user_stats, 7))
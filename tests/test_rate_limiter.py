@@ -0,0 +1,205 @@
+"""
+Tests del control de admisión de /api/run-simulation
+"""
+import pytest
+import sys
+import os
+import threading
+
+from flask import Flask
+
+# Agregar el directorio TPI al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from business.rate_limiter import MemoryBucketStore, SimulationAdmission, simulation_admission
+from datos import user_repository
+
+
+@pytest.fixture
+def client():
+    """Crea un cliente de prueba con un usuario autenticado"""
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+
+    with app.app_context():
+        db.create_all()
+        user = user_repository.create_user('limited', 'password123')
+        test_client = app.test_client()
+        with test_client.session_transaction() as sess:
+            sess['_user_id'] = str(user.id)
+            sess['_fresh'] = True
+        yield test_client
+        db.session.remove()
+        db.drop_all()
+
+
+class FakeBucketStore:
+    """Almacén sustituto: solo necesita implementar take"""
+
+    def __init__(self, allowed):
+        self.allowed = allowed
+        self.calls = []
+
+    def take(self, key, cost, capacity, refill_rate, now):
+        self.calls.append((key, cost))
+        return (True, 0) if self.allowed else (False, 12.3)
+
+
+class TestTokenBucket:
+    """Tests del almacén en memoria"""
+
+    def test_refill_and_retry_after(self):
+        """Test: el bucket se vacía, informa cuánto esperar y se recupera con el tiempo"""
+        store = MemoryBucketStore()
+
+        assert store.take('user:1', 60, 100, 10, now=0) == (True, 0.0)
+        allowed, retry_after = store.take('user:1', 60, 100, 10, now=0)
+        assert allowed is False
+        assert retry_after == pytest.approx(2.0)
+        assert store.take('user:1', 60, 100, 10, now=2)[0] is True
+        # Otro usuario tiene su propio bucket
+        assert store.take('user:2', 100, 100, 10, now=2)[0] is True
+
+    def test_cost_weighting_and_pluggable_store(self):
+        """Test: el costo es key_length × (1 + has_eve) y se usa el almacén configurado"""
+        admission_app = Flask(__name__)
+        store = FakeBucketStore(allowed=False)
+        admission_app.config.update(RATE_LIMIT_ENABLED=True, RATE_LIMIT_STORE=store)
+        admission = SimulationAdmission(admission_app)
+
+        assert admission.cost(1000, True, 'qiskit_batch') == 2000
+        assert admission.cost(1000, False, 'qiskit_batch') == 1000
+        assert admission.cost(10 ** 6, True, 'numpy') == admission.capacity
+
+        result = admission.acquire(7, 500, True, 'qiskit_batch')
+        assert result['reason'] == 'rate_limited'
+        assert result['retry_after'] == 13
+        assert store.calls == [('user:7', 1000)]
+        # El rechazo devolvió el lugar del tope global
+        assert admission.slots.acquire(blocking=False)
+
+
+class TestRunSimulationAdmission:
+    """Tests de las respuestas de la API"""
+
+    def test_over_limit_returns_429(self, client, monkeypatch):
+        """Test: al agotar las fichas la API responde 429 con Retry-After"""
+        monkeypatch.setattr(simulation_admission, 'enabled', True)
+        monkeypatch.setattr(simulation_admission, 'capacity', 2.0)
+        monkeypatch.setattr(simulation_admission, 'refill_rate', 0.01)
+        monkeypatch.setattr(simulation_admission, 'store', MemoryBucketStore())
+
+        payload = {'key_length': 100, 'has_eve': False, 'backend': 'numpy'}
+        statuses = [client.post('/api/run-simulation', json=payload).status_code for _ in range(2)]
+        response = client.post('/api/run-simulation', json=payload)
+
+        assert statuses == [200, 200]
+        assert response.status_code == 429
+        assert int(response.headers['Retry-After']) >= 1
+        assert response.get_json()['reason'] == 'rate_limited'
+
+    def test_concurrency_cap_returns_503(self, client, monkeypatch):
+        """Test: con el tope global ocupado la API responde 503 sin consumir fichas"""
+        store = FakeBucketStore(allowed=True)
+        slots = threading.BoundedSemaphore(1)
+        monkeypatch.setattr(simulation_admission, 'enabled', True)
+        monkeypatch.setattr(simulation_admission, 'store', store)
+        monkeypatch.setattr(simulation_admission, 'slots', slots)
+        slots.acquire()
+
+        response = client.post('/api/run-simulation', json={'key_length': 100, 'backend': 'numpy'})
+
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '1'
+        assert store.calls == []
+        slots.release()
+
+    def test_invalid_request_spends_no_tokens(self, client, monkeypatch):
+        """Test: un pedido inválido se rechaza con 400 antes de descontar fichas"""
+        store = FakeBucketStore(allowed=True)
+        monkeypatch.setattr(simulation_admission, 'enabled', True)
+        monkeypatch.setattr(simulation_admission, 'store', store)
+
+        too_long = client.post('/api/run-simulation', json={'key_length': 5000, 'backend': 'qiskit_batch'})
+        bad_seed = client.post('/api/simulations', json={'key_length': 100, 'backend': 'numpy', 'seed': -1})
+
+        assert too_long.status_code == 400
+        assert bad_seed.status_code == 400
+        assert store.calls == []
+
+    def test_queue_and_experiments_pay_tokens(self, client, monkeypatch):
+        """Test: encolar y lanzar experimentos descuenta las mismas fichas y responde 429 al agotarlas"""
+        store = FakeBucketStore(allowed=False)
+        monkeypatch.setattr(simulation_admission, 'enabled', True)
+        monkeypatch.setattr(simulation_admission, 'store', store)
+
+        queued = client.post('/api/simulations', json={'key_length': 500, 'has_eve': True, 'backend': 'qiskit_batch'})
+        experiment = client.post('/api/experiments', json={'key_length': 100, 'trials': 20})
+
+        assert queued.status_code == 429
+        assert queued.headers['Retry-After'] == '13'
+        assert experiment.status_code == 429
+        user_key = store.calls[0][0]
+        assert store.calls == [(user_key, 1000), (user_key, 100 * 20 * 0.01)]
+        # Encolar no ocupa el tope global de simulaciones síncronas
+        assert simulation_admission.slots.acquire(blocking=False)
+        simulation_admission.slots.release()
+
+    def test_rejected_queue_spends_no_tokens(self, client, monkeypatch):
+        """Test: si la cola rechaza el trabajo (llena o límite del usuario) no se descuentan fichas"""
+        from business.simulation_jobs import job_queue
+
+        store = MemoryBucketStore()
+        monkeypatch.setattr(simulation_admission, 'enabled', True)
+        monkeypatch.setattr(simulation_admission, 'store', store)
+        monkeypatch.setattr(job_queue, 'max_queue', 0)
+
+        payload = {'key_length': 500, 'has_eve': False, 'backend': 'qiskit_batch'}
+        full = client.post('/api/simulations', json=payload)
+        monkeypatch.setattr(job_queue, 'max_queue', 32)
+        monkeypatch.setattr(job_queue, 'max_per_user', 0)
+        limited = client.post('/api/simulations', json=payload)
+
+        assert full.status_code == 503
+        assert limited.status_code == 429
+        assert limited.get_json()['reason'] == 'user_limit'
+        assert store.buckets == {}
+
+    def test_replay_goes_through_admission(self, client, monkeypatch):
+        """Test: reproducir una sesión ocupa el tope global y paga fichas como /api/run-simulation"""
+        run = client.post('/api/run-simulation', json={'key_length': 100, 'backend': 'numpy', 'seed': 7}).get_json()
+        replay_url = f"/api/sessions/{run['session']['id']}/replay"
+
+        store = FakeBucketStore(allowed=False)
+        slots = threading.BoundedSemaphore(1)
+        monkeypatch.setattr(simulation_admission, 'enabled', True)
+        monkeypatch.setattr(simulation_admission, 'store', store)
+        monkeypatch.setattr(simulation_admission, 'slots', slots)
+
+        limited = client.get(replay_url)
+        slots.acquire()
+        busy = client.get(replay_url)
+        slots.release()
+
+        assert limited.status_code == 429
+        assert limited.headers['Retry-After'] == '13'
+        assert busy.status_code == 503
+        assert busy.headers['Retry-After'] == '1'
+        assert store.calls == [(store.calls[0][0], 100 * 0.01)]
+        # El rechazo devolvió el lugar del tope global
+        assert slots.acquire(blocking=False)
+
+    def test_non_boolean_has_eve_rejected(self, client, monkeypatch):
+        """Test: has_eve que no es booleano se rechaza con 400 antes de descontar fichas"""
+        store = FakeBucketStore(allowed=True)
+        monkeypatch.setattr(simulation_admission, 'enabled', True)
+        monkeypatch.setattr(simulation_admission, 'store', store)
+
+        payload = {'key_length': 100, 'backend': 'numpy', 'has_eve': 'yes'}
+        synchronous = client.post('/api/run-simulation', json=payload)
+        queued = client.post('/api/simulations', json=payload)
+
+        assert synchronous.status_code == 400
+        assert queued.status_code == 400
+        assert store.calls == []
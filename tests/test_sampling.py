@@ -0,0 +1,89 @@
+"""
+Tests del muestreo del QBER con cotas de clave finita
+"""
+import pytest
+import sys
+import os
+
+import numpy as np
+from flask import Flask
+
+# Agregar el directorio TPI al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from business import bb84_sampling
+from business.bb84_numpy import sift_and_estimate, simulate_trials_numpy
+from business.bb84_sampling import hoeffding_sample_size, qber_interval, sample_size
+
+
+@pytest.fixture
+def restore_sampling():
+    """Restaura los parámetros de muestreo al terminar"""
+    settings = bb84_sampling.get_sampling()
+    yield
+    bb84_sampling.set_sampling(**settings)
+
+
+class TestSampleSize:
+    """Tests del tamaño de la muestra"""
+
+    def test_sample_size_scales_with_key(self):
+        """Test: la muestra es la de Hoeffding, limitada a una fracción de la clave y nunca cero"""
+        lengths = np.array([0, 1, 3, 10, 160, 10 ** 5, 10 ** 7])
+
+        assert hoeffding_sample_size(0.95, 0.02) == 4612
+        assert sample_size(lengths).tolist() == [0, 1, 1, 2, 40, 4612, 4612]
+        assert sample_size(10 ** 7, confidence=0.99, error_bound=0.005) == 105967
+
+    def test_tiny_key_does_not_divide_by_zero(self):
+        """Test: con menos de 4 bits filtrados se estima el QBER con al menos un bit"""
+        result = sift_and_estimate([1, 0, 1], [0, 1, 0], [0, 1, 0], [1, 0, 1], np.random.default_rng(1))
+
+        assert result['sample_size'] == 1
+        assert result['error_rate'] == 0
+        assert result['key_length_final'] == 2
+        assert result['qber_interval'][0] == 0
+
+    def test_configure_sampling(self, restore_sampling):
+        """Test: los parámetros se toman de la configuración y se validan"""
+        app = Flask(__name__)
+        app.config.update(SAMPLE_CONFIDENCE=0.99, SAMPLE_ERROR_BOUND=0.05,
+                          SAMPLE_MAX_FRACTION=0.5, QBER_INTERVAL_METHOD='hoeffding')
+        bb84_sampling.configure_sampling(app)
+
+        assert sample_size(100) == 50
+        assert sample_size(10 ** 6) == hoeffding_sample_size(0.99, 0.05)
+        for invalid in ({'confidence': 1}, {'error_bound': 0}, {'max_fraction': 2}, {'interval': 'wald'}):
+            with pytest.raises(ValueError):
+                bb84_sampling.set_sampling(**invalid)
+
+
+class TestQberInterval:
+    """Tests del intervalo de confianza del QBER"""
+
+    @pytest.mark.parametrize('method', ['binomial', 'hoeffding'])
+    def test_interval_coverage(self, method):
+        """Test: en 20000 muestras simuladas a la vez el intervalo contiene el QBER real al menos el 95%"""
+        rng = np.random.default_rng(7)
+        errors = rng.binomial(500, 0.05, size=20000)
+        low, high = qber_interval(errors, np.full(20000, 500), confidence=0.95, method=method)
+
+        assert np.mean((low <= 0.05) & (0.05 <= high)) >= 0.95
+        assert np.all(low <= errors / 500) and np.all(errors / 500 <= high)
+
+    def test_interval_edge_cases(self):
+        """Test: sin muestra el intervalo es NaN y el binomial es más angosto que el de Hoeffding"""
+        binomial = qber_interval(2, 400, method='binomial')
+        hoeffding = qber_interval(2, 400, method='hoeffding')
+
+        assert all(np.isnan(qber_interval(0, 0)))
+        assert qber_interval(0, 50, method='binomial')[0] == 0
+        assert qber_interval(50, 50, method='binomial')[1] == 1
+        assert binomial[1] - binomial[0] < hoeffding[1] - hoeffding[0]
+
+    def test_trials_use_finite_key_sample(self):
+        """Test: los ensayos Monte-Carlo usan el mismo tamaño de muestra que la simulación"""
+        batch = simulate_trials_numpy(400, False, 1000, np.random.default_rng(8))
+
+        assert batch['sample_size'].tolist() == sample_size(batch['sifted_length']).tolist()
+        assert np.all(batch['sample_size'] > 0)
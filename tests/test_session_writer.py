@@ -0,0 +1,170 @@
+"""
+Tests de la escritura diferida (write-behind) de sesiones de simulación
+"""
+import pytest
+import sys
+import os
+import time
+
+from flask import Flask
+
+# Agregar el directorio TPI al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datos import db, session_repository, stats_repository
+from datos.models import User, SimulationSession
+from datos.session_writer import SessionWriteBuffer
+
+
+@pytest.fixture
+def writer_app(tmp_path):
+    """Aplicación con una base SQLite propia y un usuario"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'writer.db'}"
+    app.config['SESSION_WRITE_BEHIND'] = True
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(id=1, username='bulk', password_hash='-'))
+        db.session.commit()
+    yield app
+
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+def wait_until(condition, timeout=5.0):
+    """Espera a que se cumpla una condición del hilo de escritura"""
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def count_sessions(app):
+    with app.app_context():
+        return SimulationSession.query.count()
+
+
+class TestSessionWriteBuffer:
+    """Tests del buffer de inserción por lotes"""
+
+    def test_flush_by_batch_size(self, writer_app):
+        """Test: un lote completo se inserta sin esperar el intervalo y el resto al cerrar"""
+        writer_app.config.update(SESSION_BATCH_SIZE=10, SESSION_FLUSH_INTERVAL=60)
+        writer = SessionWriteBuffer(writer_app)
+
+        for i in range(25):
+            writer.enqueue(1, 100, False, 'secure' if i % 5 else 'compromised', final_key='1011', error_rate=0.02)
+
+        assert wait_until(lambda: writer.metrics()['flushed_sessions'] >= 20)
+        writer.shutdown()
+
+        assert count_sessions(writer_app) == 25
+        metrics = writer.metrics()
+        assert metrics['queue_depth'] == 0
+        assert metrics['batches'] >= 3
+        assert metrics['avg_flush_ms'] is not None
+        with writer_app.app_context():
+            assert stats_repository.check_user_stats() == []
+            assert stats_repository.get_user_stats(1).compromised_simulations == 5
+            assert SimulationSession.query.first().final_key == '1011'
+
+    def test_flush_by_interval(self, writer_app):
+        """Test: un lote incompleto se inserta al cumplirse el intervalo"""
+        writer_app.config.update(SESSION_BATCH_SIZE=1000, SESSION_FLUSH_INTERVAL=0.05)
+        writer = SessionWriteBuffer(writer_app)
+
+        for _ in range(3):
+            writer.enqueue(1, 100, True, 'compromised', error_rate=0.3)
+
+        assert wait_until(lambda: count_sessions(writer_app) == 3)
+        writer.shutdown()
+
+    def test_create_session_uses_buffer(self, writer_app, monkeypatch):
+        """Test: con la escritura diferida, create_session encola y devuelve la sesión sin id"""
+        writer_app.config.update(SESSION_BATCH_SIZE=1000, SESSION_FLUSH_INTERVAL=60)
+        writer = SessionWriteBuffer(writer_app)
+        monkeypatch.setattr(session_repository, 'session_writer', writer)
+
+        with writer_app.app_context():
+            session = session_repository.create_session(1, 64, False, 'secure', final_key='0110', error_rate=0.0)
+
+        assert session.id is None
+        assert session.to_dict(include_key=True)['final_key'] == '0110'
+        assert writer.metrics()['queue_depth'] == 1
+        writer.shutdown()
+        assert count_sessions(writer_app) == 1
+
+    def test_journal_replayed_after_crash(self, writer_app, tmp_path):
+        """Test: las sesiones del diario de un proceso que no llegó a vaciar el buffer se insertan al reiniciar"""
+        journal = tmp_path / 'sessions.journal'
+        writer_app.config.update(SESSION_BATCH_SIZE=1000, SESSION_FLUSH_INTERVAL=60,
+                                 SESSION_WRITE_JOURNAL=str(journal))
+        crashed = SessionWriteBuffer(writer_app)
+        for _ in range(4):
+            crashed.enqueue(1, 128, False, 'secure', final_key='111', error_rate=0.0)
+
+        # Simular la caída: el buffer en memoria se pierde
+        with crashed.lock:
+            crashed.pending = []
+        crashed.shutdown()
+        assert count_sessions(writer_app) == 0
+        assert len(journal.read_text().splitlines()) == 4
+
+        restarted = SessionWriteBuffer(writer_app)
+        assert restarted.metrics()['queue_depth'] == 4
+        restarted.shutdown()
+
+        assert count_sessions(writer_app) == 4
+        assert journal.read_text() == ''
+
+    def test_rejects_bad_row_and_keeps_writing(self, writer_app, tmp_path):
+        """Test: una fila que falla sola se descarta y las que vienen detrás se guardan"""
+        journal = tmp_path / 'sessions.journal'
+        writer_app.config.update(SESSION_BATCH_SIZE=10, SESSION_FLUSH_INTERVAL=0.05,
+                                 SESSION_WRITE_JOURNAL=str(journal))
+        writer = SessionWriteBuffer(writer_app)
+
+        writer.enqueue(1, 100, False, None)
+        for _ in range(14):
+            writer.enqueue(1, 100, False, 'secure', final_key='01', error_rate=0.0)
+
+        assert wait_until(lambda: count_sessions(writer_app) == 14)
+        writer.shutdown()
+
+        metrics = writer.metrics()
+        assert metrics['rejected_sessions'] == 1
+        assert metrics['failed_flushes'] == 1
+        assert metrics['queue_depth'] == 0
+        assert len(writer.rejected) == 1
+        assert len((tmp_path / 'sessions.journal.rejected').read_text().splitlines()) == 1
+        assert journal.read_text() == ''
+        with writer_app.app_context():
+            assert stats_repository.check_user_stats() == []
+
+    def test_backs_off_while_database_unavailable(self, writer_app, monkeypatch):
+        """Test: si la base no responde, el hilo espera cada vez más entre intentos y no pierde filas"""
+        from sqlalchemy.exc import OperationalError
+
+        writer_app.config.update(SESSION_BATCH_SIZE=1, SESSION_FLUSH_INTERVAL=0.05)
+        writer = SessionWriteBuffer(writer_app)
+        insert_rows = writer._insert
+
+        def unavailable(rows):
+            raise OperationalError('INSERT', {}, Exception('database is locked'))
+
+        monkeypatch.setattr(writer, '_insert', unavailable)
+        for _ in range(3):
+            writer.enqueue(1, 100, True, 'compromised', error_rate=0.3)
+        time.sleep(0.5)
+
+        # Intervalos de 0.05, 0.1 y 0.2 s: unos pocos intentos, no miles
+        assert 1 <= writer.metrics()['failed_flushes'] <= 5
+        assert writer.metrics()['queue_depth'] == 3
+
+        monkeypatch.setattr(writer, '_insert', insert_rows)
+        writer.shutdown()
+        assert count_sessions(writer_app) == 3
@@ -0,0 +1,150 @@
+"""
+Tests para la cola de simulaciones asíncronas
+"""
+import pytest
+import sys
+import os
+import threading
+import time
+
+# Agregar el directorio TPI al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from datos.models import User, SimulationSession
+from business import simulation_controller
+from business.simulation_jobs import SimulationJobQueue, job_queue, DONE
+
+
+@pytest.fixture
+def client():
+    """Crea un cliente de prueba con base de datos temporal"""
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    
+    with app.app_context():
+        db.create_all()
+        yield app.test_client()
+        db.session.remove()
+        db.drop_all()
+
+
+def create_user(username):
+    """Crea un usuario de prueba y devuelve su ID"""
+    user = User(username=username)
+    user.set_password('password123')
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+
+def wait_for(queue, job_id, user_id, timeout=10):
+    """Espera a que un trabajo termine y lo devuelve"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get_job(job_id, user_id)
+        if job['result'] is not None:
+            return job
+        time.sleep(0.05)
+    raise AssertionError('La simulación no terminó a tiempo')
+
+
+@pytest.fixture
+def blocked_queue(monkeypatch):
+    """Cola cuyos trabajos quedan bloqueados hasta liberar el evento"""
+    release = threading.Event()
+    
+    def blocking_run(**kwargs):
+        release.wait(5)
+        return {'success': True}
+    
+    monkeypatch.setattr(simulation_controller, 'run_bb84_simulation', blocking_run)
+    queue = SimulationJobQueue()
+    queue.init_app(app)
+    yield queue
+    release.set()
+    queue.executor.shutdown(wait=True)
+    app.extensions['simulation_jobs'] = job_queue
+
+
+class TestSimulationJobQueue:
+    """Tests de la cola acotada de simulaciones"""
+    
+    def test_job_runs_in_background(self, client):
+        """Test: un trabajo encolado termina y guarda la sesión"""
+        with app.app_context():
+            user_id = create_user('jobuser')
+            submitted = job_queue.submit(user_id, 200, False, backend='numpy')
+            
+            assert submitted['success'] is True
+            job = wait_for(job_queue, submitted['job_id'], user_id)
+            
+            assert job['status'] == DONE
+            assert job['result']['session']['key_length'] == 200
+            assert SimulationSession.query.filter_by(user_id=user_id).count() == 1
+    
+    def test_job_hidden_from_other_users(self, client):
+        """Test: un usuario no puede consultar trabajos ajenos"""
+        with app.app_context():
+            user_id = create_user('owner')
+            submitted = job_queue.submit(user_id, 200, False, backend='numpy')
+            
+            assert job_queue.get_job(submitted['job_id'], user_id + 1) is None
+            wait_for(job_queue, submitted['job_id'], user_id)
+    
+    def test_per_user_limit(self, blocked_queue):
+        """Test: un usuario no puede superar su cantidad de trabajos activos"""
+        blocked_queue.max_per_user = 2
+        
+        assert blocked_queue.submit(1, 100, False)['success'] is True
+        assert blocked_queue.submit(1, 100, False)['success'] is True
+        rejected = blocked_queue.submit(1, 100, False)
+        
+        assert rejected['success'] is False
+        assert rejected['reason'] == 'user_limit'
+        # Otro usuario todavía puede encolar
+        assert blocked_queue.submit(2, 100, False)['success'] is True
+    
+    def test_queue_depth_limit(self, blocked_queue):
+        """Test: la cola rechaza trabajos cuando está llena"""
+        blocked_queue.max_queue = 2
+        
+        blocked_queue.submit(1, 100, False)
+        blocked_queue.submit(2, 100, False)
+        rejected = blocked_queue.submit(3, 100, False)
+        
+        assert rejected['success'] is False
+        assert rejected['reason'] == 'queue_full'
+        assert blocked_queue.pending_count() == 2
+
+
+class TestSimulationJobRoutes:
+    """Tests de los endpoints de envío y consulta"""
+    
+    def test_submit_requires_login(self, client):
+        """Test: encolar sin sesión iniciada devuelve 403"""
+        response = client.post('/api/simulations', json={'key_length': 100})
+        
+        assert response.status_code == 403
+    
+    def test_submit_and_poll_result(self, client):
+        """Test: el envío responde 202 y el resultado se obtiene consultando"""
+        with app.app_context():
+            user_id = create_user('poller')
+        
+        with client.session_transaction() as sess:
+            sess['_user_id'] = str(user_id)
+            sess['_fresh'] = True
+        
+        response = client.post('/api/simulations', json={'key_length': 100, 'has_eve': False, 'backend': 'numpy'})
+        assert response.status_code == 202
+        result_url = response.get_json()['result_url']
+        
+        deadline = time.time() + 10
+        response = client.get(result_url)
+        while response.status_code == 202 and time.time() < deadline:
+            time.sleep(0.05)
+            response = client.get(result_url)
+        
+        assert response.status_code == 200
+        assert response.get_json()['success'] is True
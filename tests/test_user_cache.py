@@ -0,0 +1,174 @@
+"""
+Tests de la caché de identidades del user_loader y de la credencial firmada
+"""
+import pytest
+import sys
+import os
+import time
+
+# Agregar el directorio TPI al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from business import auth_controller
+from datos import user_repository
+from datos.user_cache import UserIdentity, UserIdentityCache, user_cache
+
+
+@pytest.fixture
+def client():
+    """Crea un cliente de prueba con la caché vacía"""
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+
+    with app.app_context():
+        db.create_all()
+        user_cache.clear()
+        yield app.test_client()
+        db.session.remove()
+        db.drop_all()
+    app.config['USER_IDENTITY_CLAIM'] = False
+
+
+def login(client, user_id, claim=None):
+    """Simula una sesión iniciada con Flask-Login"""
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user_id)
+        sess['_fresh'] = True
+        if claim is not None:
+            sess[auth_controller.IDENTITY_CLAIM_KEY] = claim
+
+
+def get(client, url):
+    """GET en un contexto de aplicación nuevo, para que Flask-Login no reuse el usuario de g"""
+    with app.app_context():
+        return client.get(url)
+
+
+class TestUserIdentityCache:
+    """Tests de la caché TTL/LRU"""
+
+    def test_ttl_and_lru(self):
+        """Test: las entradas vencen a los ttl segundos y se desaloja la menos usada"""
+        cache = UserIdentityCache()
+        cache.ttl = 0.05
+        cache.max_size = 2
+        loads = []
+
+        def loader(user_id):
+            loads.append(user_id)
+            return UserIdentity(user_id, f'user{user_id}')
+
+        cache.get(1, loader)
+        cache.get(2, loader)
+        cache.get(1, loader)
+        cache.get(3, loader)
+        assert loads == [1, 2, 3]
+        assert set(cache.entries) == {1, 3}
+
+        time.sleep(0.06)
+        cache.get(1, loader)
+        assert loads == [1, 2, 3, 1]
+
+        metrics = cache.metrics()
+        assert metrics['hits'] == 1
+        assert metrics['evictions'] == 1
+        assert metrics['hit_rate'] == pytest.approx(1 / 5)
+
+    def test_revocations_pruned(self, monkeypatch):
+        """Test: las revocaciones más viejas que el ttl de la caché y de las credenciales se descartan"""
+        cache = UserIdentityCache()
+        cache.ttl = 60
+        cache.claim_ttl = 300
+        now = [1000.0]
+        monkeypatch.setattr(time, 'time', lambda: now[0])
+
+        cache.invalidate(1)
+        cache.invalidate(2)
+        now[0] += 200
+        cache.invalidate(1)
+        assert cache.is_revoked(2, 999.0)
+
+        now[0] += 150
+        cache.invalidate(3)
+        assert list(cache.revoked_at) == [1, 3]
+        assert cache.metrics()['revocations'] == 2
+        assert not cache.is_revoked(2, 999.0)
+        assert cache.is_revoked(1, 1100.0)
+
+    def test_missing_user_not_cached(self):
+        """Test: un usuario inexistente no queda en caché"""
+        cache = UserIdentityCache()
+        assert cache.get(7, lambda user_id: None) is None
+        assert cache.metrics()['size'] == 0
+
+
+class TestUserLoader:
+    """Tests del user_loader con la caché"""
+
+    def test_loader_hits_cache(self, client):
+        """Test: las peticiones autenticadas siguientes no vuelven a consultar la base"""
+        user = user_repository.create_user('cached', 'password123')
+        lookups = []
+        user_cache.add_listener(lambda user_id, hit: lookups.append(hit))
+        login(client, user.id)
+
+        try:
+            for _ in range(3):
+                assert get(client, '/api/history').status_code == 200
+        finally:
+            user_cache.listeners.clear()
+
+        assert lookups == [False, True, True]
+        assert user_repository.get_user_cache_metrics()['hit_rate'] == pytest.approx(2 / 3)
+
+    def test_delete_and_password_change_invalidate(self, client):
+        """Test: eliminar el usuario o cambiar su contraseña lo saca de la caché"""
+        user = user_repository.create_user('rotating', 'password123')
+        user_id = user.id
+        user_repository.load_user_identity(user_id)
+        assert user_id in user_cache.entries
+
+        result = auth_controller.change_password(user_id, 'password123', 'newpassword')
+        assert result['success'] is True
+        assert user_id not in user_cache.entries
+        assert auth_controller.change_password(user_id, 'password123', 'otherpass')['success'] is False
+
+        login(client, user_id)
+        assert get(client, '/api/history').status_code == 200
+        user_repository.delete_user(user_id)
+        assert get(client, '/api/history').status_code != 200
+
+
+class TestIdentityClaim:
+    """Tests de la credencial firmada de /api/run-simulation"""
+
+    def test_claim_skips_user_lookup(self, client):
+        """Test: con una credencial válida la simulación no carga el usuario"""
+        app.config['USER_IDENTITY_CLAIM'] = True
+        user = user_repository.create_user('claimed', 'password123')
+        lookups = []
+        user_cache.add_listener(lambda user_id, hit: lookups.append(hit))
+        login(client, user.id, auth_controller.issue_identity_claim(user))
+
+        try:
+            response = client.post('/api/run-simulation', json={'key_length': 32, 'backend': 'numpy'})
+        finally:
+            user_cache.listeners.clear()
+
+        assert response.status_code == 200
+        assert response.get_json()['success'] is True
+        assert lookups == []
+
+    def test_claim_rejected_when_expired_or_revoked(self, client):
+        """Test: una credencial vencida o anterior a un cambio de contraseña no vale"""
+        user = user_repository.create_user('revoked', 'password123')
+        claim = auth_controller.issue_identity_claim(user)
+
+        assert auth_controller.resolve_identity_claim(claim) == user.id
+        assert auth_controller.resolve_identity_claim({'user_id': user.id, 'issued_at': time.time() - 600}) is None
+        assert auth_controller.resolve_identity_claim('forged') is None
+
+        user_repository.update_user_password(user.id, 'newpassword')
+        assert auth_controller.resolve_identity_claim(claim) is None
+        assert auth_controller.resolve_identity_claim(auth_controller.issue_identity_claim(user)) == user.id
@@ -0,0 +1,103 @@
+"""
+Comandos de línea de comandos de la aplicación (Capa de Presentación)
+Se ejecutan con `flask --app app <comando>` y, al igual que las rutas,
+solo usan la capa de negocio
+"""
+import json
+
+import click
+
+from business import auth_controller, experiment_controller, simulation_controller
+from business.bb84_stream import BLOCK_SIZE, STREAM_BACKENDS, simulate_bb84_stream
+
+
+def configure_cli(app):
+    """Registra los comandos de la aplicación"""
+    
+    @app.cli.command('experiment')
+    @click.option('--key-length', type=int, default=256, show_default=True, help='Longitud de la clave de cada ensayo')
+    @click.option('--trials', type=int, default=1000, show_default=True, help='Cantidad de ensayos')
+    @click.option('--eve/--no-eve', default=False, show_default=True, help='Incluir un espía en cada ensayo')
+    @click.option('--seed', type=int, default=None, help='Semilla para reproducir el experimento')
+    @click.option('--username', default=None, help='Usuario al que se asocia el resumen')
+    @click.option('--json-lines', is_flag=True, help='Imprimir cada evento como una línea JSON')
+    def experiment(key_length, trials, eve, seed, username, json_lines):
+        """Ejecuta un experimento Monte-Carlo de BB84 y guarda su resumen"""
+        user_id = None
+        if username:
+            user = auth_controller.get_user_by_username(username)
+            if user is None:
+                raise click.ClickException(f'No existe el usuario "{username}"')
+            user_id = user.id
+        
+        for event in experiment_controller.stream_experiment(user_id, key_length, eve, trials, seed):
+            if json_lines:
+                click.echo(json.dumps(event))
+            elif event['event'] == 'error':
+                raise click.ClickException(event['message'])
+            elif event['event'] == 'progress':
+                click.echo(f"{event['trials_done']}/{trials} ensayos - detección: {event['detection_rate']:.2%}")
+            else:
+                _print_summary(event)
+    
+    @app.cli.group('stats')
+    def stats():
+        """Mantenimiento de las estadísticas por usuario"""
+    
+    @stats.command('rebuild')
+    def stats_rebuild():
+        """Recalcula user_stats a partir de todas las sesiones guardadas"""
+        users = simulation_controller.rebuild_statistics()
+        click.echo(f'Estadísticas reconstruidas para {users} usuarios')
+    
+    @stats.command('check')
+    def stats_check():
+        """Verifica que user_stats coincida con las sesiones guardadas"""
+        mismatches = simulation_controller.check_statistics()
+        for mismatch in mismatches:
+            click.echo(f"Usuario {mismatch['user_id']}: {mismatch['field']} = {mismatch['stored']}, "
+                       f"se esperaba {mismatch['expected']}")
+        if mismatches:
+            raise click.ClickException(f'{len(mismatches)} diferencias; ejecuta `flask stats rebuild`')
+        click.echo('Las estadísticas son consistentes')
+    
+    @app.cli.command('stream-key')
+    @click.option('--key-length', type=int, required=True, help='Cantidad de qubits que envía Alice')
+    @click.option('--output', type=click.Path(dir_okay=False, writable=True), required=True,
+                  help='Archivo donde se escribe la clave final empaquetada')
+    @click.option('--eve/--no-eve', default=False, show_default=True, help='Incluir un espía')
+    @click.option('--backend', type=click.Choice(STREAM_BACKENDS), default='numpy', show_default=True)
+    @click.option('--block-size', type=int, default=BLOCK_SIZE, show_default=True, help='Qubits por bloque')
+    @click.option('--sample-fraction', type=float, default=None, help='Fracción de la clave filtrada usada para el QBER')
+    def stream_key(key_length, output, eve, backend, block_size, sample_fraction):
+        """Genera una clave BB84 muy larga por bloques y la escribe en un archivo"""
+        if key_length < 1 or block_size < 1:
+            raise click.ClickException('La longitud de la clave y el tamaño de bloque deben ser positivos')
+        
+        result = simulate_bb84_stream(key_length, eve, output=output, backend=backend,
+                                      block_size=block_size, sample_fraction=sample_fraction)
+        if not result['success']:
+            raise click.ClickException(result['message'])
+        
+        click.echo(result['message'])
+        click.echo(f"  Clave filtrada:  {result['key_length_after_sifting']} bits")
+        click.echo(f"  Muestra:         {result['sample_size']} bits")
+        if result['result'] == 'secure':
+            click.echo(f"  Clave final:     {result['key_length_final']} bits en {output}")
+
+
+def _print_summary(summary):
+    """Imprime el resumen final de un experimento"""
+    mean_error_rate = summary['mean_error_rate']
+    click.echo(f"Experimento #{summary['experiment_id']} guardado")
+    click.echo(f"  Ensayos:                  {summary['trials']}")
+    click.echo(f"  Tasa de detección:        {summary['detection_rate']:.2%}")
+    click.echo(f"  QBER promedio:            {mean_error_rate:.2%}" if mean_error_rate is not None
+               else "  QBER promedio:            N/A")
+    click.echo(f"  Clave filtrada promedio:  {summary['mean_sifted_length']:.1f} bits")
+    click.echo(f"  Clave final promedio:     {summary['mean_final_length']:.1f} bits")
+    click.echo('  Histograma de QBER:')
+    edges = summary['qber_histogram']['edges']
+    for i, count in enumerate(summary['qber_histogram']['counts']):
+        if count:
+            click.echo(f"    [{edges[i]:.2f}, {edges[i + 1]:.2f}): {count}")
@@ -2,7 +2,7 @@
 Formularios de la aplicación usando Flask-WTF
 """
 from flask_wtf import FlaskForm
-from wtforms import StringField, PasswordField, BooleanField, IntegerField, SubmitField
+from wtforms import StringField, PasswordField, BooleanField, IntegerField, SelectField, SubmitField
 from wtforms.validators import DataRequired, Length, NumberRange
 
 
@@ -45,9 +45,19 @@ class SimulationForm(FlaskForm):
         'Longitud de la clave',
         validators=[
             DataRequired(message='La longitud es obligatoria'),
-            NumberRange(min=10, max=1000, message='La longitud debe estar entre 10 y 1000 bits')
+            NumberRange(min=10, max=1000000, message='La longitud debe estar entre 10 y 1000000 bits')
         ],
         default=64
     )
     has_eve = BooleanField('Incluir espía (Eve)')
+    backend = SelectField(
+        'Motor de simulación',
+        choices=[
+            ('qiskit_batch', 'Qiskit (circuitos agrupados, hasta 1000 bits)'),
+            ('qiskit', 'Qiskit (un circuito por qubit, hasta 1000 bits)'),
+            ('qiskit_parallel', 'Qiskit en paralelo (varios procesos, hasta 100000 bits)'),
+            ('numpy', 'NumPy analítico (canal ideal, hasta 1000000 bits)')
+        ],
+        default='qiskit_batch'
+    )
     submit = SubmitField('Ejecutar Simulación')
@@ -3,11 +3,15 @@ Rutas de la aplicación (Capa de Presentación)
 Esta capa NO accede directamente a la base de datos
 Solo usa la capa de negocio (business)
 """
-from flask import render_template, redirect, url_for, flash, request, jsonify
+import json
+
+from flask import render_template, redirect, url_for, flash, request, jsonify, Response, session, stream_with_context
 from flask_login import login_user, logout_user, login_required, current_user
 
 from views.forms import RegisterForm, LoginForm, SimulationForm
-from business import auth_controller, simulation_controller
+from business import auth_controller, simulation_controller, experiment_controller
+from business.simulation_jobs import job_queue
+from business.rate_limiter import simulation_admission
 
 
 def configure_routes(app):
@@ -63,6 +67,8 @@ def configure_routes(app):
             
             if result['success']:
                 login_user(result['user'], remember=remember)
+                if app.config.get('USER_IDENTITY_CLAIM'):
+                    session[auth_controller.IDENTITY_CLAIM_KEY] = auth_controller.issue_identity_claim(result['user'])
                 flash(result['message'], 'success')
                 
                 # Redirigir a la página solicitada o al home
@@ -70,6 +76,8 @@ def configure_routes(app):
                 return redirect(next_page) if next_page else redirect(url_for('dashboard'))
             else:
                 flash(result['message'], 'danger')
+                if result.get('reason') == 'busy':
+                    return render_template('login.html', form=form), 503
         
         return render_template('login.html', form=form)
     
@@ -79,6 +87,7 @@ def configure_routes(app):
     def logout():
         """Ruta de cierre de sesión"""
         logout_user()
+        session.pop(auth_controller.IDENTITY_CLAIM_KEY, None)
         flash('Has cerrado sesión exitosamente', 'info')
         return redirect(url_for('home'))
     
@@ -105,10 +114,11 @@ def configure_routes(app):
         if form.validate_on_submit():
             key_length = form.key_length.data
             has_eve = form.has_eve.data
+            backend = form.backend.data
             
             # Redirigir a la animación con parámetros
             # Convertir bool a int para la URL (True -> 1, False -> 0)
-            return redirect(url_for('animation', key_length=key_length, has_eve=int(has_eve)))
+            return redirect(url_for('animation', key_length=key_length, has_eve=int(has_eve), backend=backend))
         
         return render_template('simulator.html', form=form)
     
@@ -127,8 +137,8 @@ def configure_routes(app):
     @login_required
     def history():
         """Historial completo de simulaciones del usuario"""
-        sessions = simulation_controller.get_user_simulation_history(current_user.id, limit=50)
-        return render_template('history.html', sessions=sessions)
+        page = simulation_controller.get_user_history_page(current_user.id)
+        return render_template('history.html', sessions=page['sessions'], next_cursor=page['next_cursor'])
     
     
     @app.route('/animation')
@@ -142,9 +152,19 @@ def configure_routes(app):
     def run_simulation():
         """API para ejecutar la simulación BB84"""
         try:
+            # Con USER_IDENTITY_CLAIM la credencial firmada evita cargar el usuario
+            user_id = None
+            if app.config.get('USER_IDENTITY_CLAIM'):
+                user_id = auth_controller.resolve_identity_claim(
+                    session.get(auth_controller.IDENTITY_CLAIM_KEY),
+                    app.config.get('USER_CLAIM_TTL', auth_controller.IDENTITY_CLAIM_TTL)
+                )
+            
             # Verificar si el usuario está autenticado
-            if not current_user.is_authenticated:
-                return jsonify({'success': False, 'message': 'No autorizado'}), 403
+            if user_id is None:
+                if not current_user.is_authenticated:
+                    return jsonify({'success': False, 'message': 'No autorizado'}), 403
+                user_id = current_user.id
             
             data = request.get_json()
             if not data:
@@ -152,15 +172,198 @@ def configure_routes(app):
             
             key_length = data.get('key_length', 256)
             has_eve = data.get('has_eve', False)
+            backend = data.get('backend', simulation_controller.DEFAULT_BACKEND)
+            seed = data.get('seed')
+            channel = data.get('channel')
+            post_processing = data.get('post_processing', False)
+            
+            # Validar antes de la admisión: un pedido inválido no gasta fichas
+            error = simulation_controller.validate_simulation(key_length, backend, seed, channel,
+                                                              post_processing, has_eve)
+            if error:
+                return jsonify(error), 400
+            
+            # Admisión: límite por usuario (429) y tope global de simulaciones simultáneas (503)
+            admission = simulation_admission.acquire(user_id, key_length, has_eve, backend)
+            if not admission['success']:
+                status_code = 429 if admission['reason'] == 'rate_limited' else 503
+                return jsonify(admission), status_code, {'Retry-After': str(admission['retry_after'])}
             
             # Ejecutar simulación (capa de negocio)
-            result = simulation_controller.run_bb84_simulation(
-                user_id=current_user.id,
-                key_length=key_length,
-                has_eve=has_eve
-            )
+            try:
+                result = simulation_controller.run_bb84_simulation(
+                    user_id=user_id,
+                    key_length=key_length,
+                    has_eve=has_eve,
+                    backend=backend,
+                    seed=seed,
+                    channel=channel,
+                    post_processing=post_processing
+                )
+            finally:
+                simulation_admission.release()
             
             return jsonify(result), 200
         
         except Exception as e:
             return jsonify({'success': False, 'message': str(e)}), 500
+    
+    
+    @app.route('/api/simulations', methods=['POST'])
+    def submit_simulation():
+        """API para encolar una simulación BB84; responde de inmediato con el ID del trabajo"""
+        if not current_user.is_authenticated:
+            return jsonify({'success': False, 'message': 'No autorizado'}), 403
+        
+        data = request.get_json(silent=True)
+        if not data:
+            return jsonify({'success': False, 'message': 'Datos inválidos'}), 400
+        
+        key_length = data.get('key_length', 256)
+        has_eve = data.get('has_eve', False)
+        backend = data.get('backend', simulation_controller.DEFAULT_BACKEND)
+        seed = data.get('seed')
+        channel = data.get('channel')
+        post_processing = data.get('post_processing', False)
+        
+        error = simulation_controller.validate_simulation(key_length, backend, seed, channel,
+                                                          post_processing, has_eve)
+        if error:
+            return jsonify(error), 400
+        
+        # Mismas fichas que /api/run-simulation, cobradas solo si la cola acepta el trabajo
+        result = job_queue.submit(
+            user_id=current_user.id,
+            key_length=key_length,
+            has_eve=has_eve,
+            backend=backend,
+            seed=seed,
+            channel=channel,
+            post_processing=post_processing,
+            charge=lambda: simulation_admission.charge(current_user.id, key_length, has_eve, backend)
+        )
+        
+        if not result['success']:
+            if result['reason'] == 'rate_limited':
+                return jsonify(result), 429, {'Retry-After': str(result['retry_after'])}
+            # Cola llena: 503; límite del usuario: 429
+            status_code = 503 if result['reason'] == 'queue_full' else 429
+            return jsonify(result), status_code
+        
+        result['status_url'] = url_for('simulation_status', job_id=result['job_id'])
+        result['result_url'] = url_for('simulation_job_result', job_id=result['job_id'])
+        return jsonify(result), 202
+    
+    
+    @app.route('/api/simulations/<job_id>')
+    def simulation_status(job_id):
+        """API para consultar el estado de una simulación encolada"""
+        if not current_user.is_authenticated:
+            return jsonify({'success': False, 'message': 'No autorizado'}), 403
+        
+        job = job_queue.get_job(job_id, current_user.id)
+        if job is None:
+            return jsonify({'success': False, 'message': 'Simulación no encontrada'}), 404
+        
+        return jsonify({'success': True, 'job_id': job_id, 'status': job['status']}), 200
+    
+    
+    @app.route('/api/simulations/<job_id>/result')
+    def simulation_job_result(job_id):
+        """API para obtener el resultado de una simulación encolada (202 mientras no termine)"""
+        if not current_user.is_authenticated:
+            return jsonify({'success': False, 'message': 'No autorizado'}), 403
+        
+        job = job_queue.get_job(job_id, current_user.id)
+        if job is None:
+            return jsonify({'success': False, 'message': 'Simulación no encontrada'}), 404
+        
+        if job['result'] is None:
+            return jsonify({'success': True, 'job_id': job_id, 'status': job['status']}), 202
+        
+        return jsonify(job['result']), 200
+    
+    
+    @app.route('/api/sessions/<int:session_id>/replay')
+    def replay_simulation(session_id):
+        """API que reproduce una sesión guardada con su semilla (para la animación)"""
+        if not current_user.is_authenticated:
+            return jsonify({'success': False, 'message': 'No autorizado'}), 403
+        
+        result = simulation_controller.replay_simulation(session_id, current_user.id)
+        if not result['success']:
+            reason = result.get('reason')
+            # Admisión: límite por usuario (429) y tope global de simulaciones simultáneas (503)
+            if reason in ('rate_limited', 'busy'):
+                status_code = 429 if reason == 'rate_limited' else 503
+                return jsonify(result), status_code, {'Retry-After': str(result['retry_after'])}
+            status_code = 404 if reason == 'not_found' else 400
+            return jsonify(result), status_code
+        
+        return jsonify(result), 200
+    
+    
+    @app.route('/api/experiments', methods=['POST'])
+    def run_experiment():
+        """
+        API para ejecutar un experimento Monte-Carlo de BB84
+        Responde en streaming (una línea JSON por lote) con las estadísticas acumuladas
+        """
+        if not current_user.is_authenticated:
+            return jsonify({'success': False, 'message': 'No autorizado'}), 403
+        
+        data = request.get_json(silent=True)
+        if not data:
+            return jsonify({'success': False, 'message': 'Datos inválidos'}), 400
+        
+        key_length = data.get('key_length', 256)
+        trials = data.get('trials', 1000)
+        seed = data.get('seed')
+        
+        # Validar antes de responder: una vez enviado el 200 el error solo cortaría el stream
+        error = experiment_controller.validate_experiment(key_length, trials, seed)
+        if error:
+            return jsonify(error), 400
+        
+        # Los experimentos se simulan con NumPy: pagan las fichas de todos sus qubits
+        has_eve = data.get('has_eve', False)
+        admission = simulation_admission.charge(current_user.id, key_length * trials, has_eve, 'numpy')
+        if not admission['success']:
+            return jsonify(admission), 429, {'Retry-After': str(admission['retry_after'])}
+        
+        events = experiment_controller.stream_experiment(
+            user_id=current_user.id,
+            key_length=key_length,
+            has_eve=has_eve,
+            trials=trials,
+            seed=seed
+        )
+        lines = (json.dumps(event) + '\n' for event in events)
+        return Response(stream_with_context(lines), mimetype='application/x-ndjson')
+    
+    
+    @app.route('/api/experiments')
+    def list_experiments():
+        """API con los últimos experimentos del usuario"""
+        if not current_user.is_authenticated:
+            return jsonify({'success': False, 'message': 'No autorizado'}), 403
+        
+        experiments = experiment_controller.get_user_experiments(current_user.id, limit=20)
+        return jsonify({'success': True, 'experiments': experiments}), 200
+    
+    
+    @app.route('/api/history')
+    def history_page():
+        """API con una página del historial del usuario (paginación por cursor)"""
+        if not current_user.is_authenticated:
+            return jsonify({'success': False, 'message': 'No autorizado'}), 403
+        
+        page = simulation_controller.get_user_history_page(
+            current_user.id,
+            limit=request.args.get('limit', simulation_controller.HISTORY_PAGE_SIZE, type=int),
+            cursor=request.args.get('cursor')
+        )
+        if not page['success']:
+            return jsonify(page), 400
+        
+        return jsonify(page), 200